@@ -13,8 +13,8 @@ The example_parameters.json contains the parameters that are used to render the
 """
 import os
 import sys
-import json
 from networkconfgen import NetworkConfGen
+from networkconfgen.parameter_loader import load_parameters
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
@@ -36,8 +36,7 @@ if __name__ == "__main__":
 
     # load parameters
     try:
-        with open(parameter_file) as f:
-            params = json.loads(f.read())
+        params = load_parameters(parameter_file)
 
     except Exception as ex:
         print("unable to load JSON parameters: %s" % ex)
@@ -14,6 +14,7 @@ The example_parameters.json contains the parameters that are used to render the
 import os
 import sys
 from networkconfgen import NetworkConfGen
+from networkconfgen.parameter_loader import load_parameters
 
 try:
     import yaml
@@ -42,11 +43,10 @@ if __name__ == "__main__":
 
     # load parameters
     try:
-        with open(parameter_file) as f:
-            params = yaml.load(f.read())
+        params = load_parameters(parameter_file)
 
     except Exception as ex:
-        print("unable to load JSON parameters: %s" % ex)
+        print("unable to load YAML parameters: %s" % ex)
         sys.exit()
 
     # load template
@@ -8,4 +8,6 @@ network devices. It's build on top of the Jinja2 template engine.
 """
 from networkconfgen.base import NetworkConfGen
 from networkconfgen.base import NetworkConfGenResult
+from networkconfgen.hashing import parameter_digest
+from networkconfgen.parameter_store import ParameterStore
 import networkconfgen.constants
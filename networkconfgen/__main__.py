@@ -0,0 +1,4 @@
+import sys
+from networkconfgen.cli import main
+
+sys.exit(main())
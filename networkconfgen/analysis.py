@@ -0,0 +1,169 @@
+"""
+Static analysis of Jinja2 templates (e.g. to identify the parameters, that are actually used by a template)
+"""
+from jinja2 import meta, nodes
+
+try:
+    from collections.abc import Mapping
+
+except ImportError:  # pragma: no cover (python 2.7)
+    from collections import Mapping
+
+
+def _record(variable_paths, name, path):
+    variable_paths.setdefault(name, set()).add(tuple(path))
+
+
+def _collect(node, variable_paths, stored_names):
+    """
+    walk the AST and record all attribute/item paths, that are accessed on a variable, e.g. `{{ a.b["c"] }}` results
+    in the path ("b", "c") for the variable "a". An empty path is recorded if the variable is used as a whole.
+    """
+    if isinstance(node, nodes.Name):
+        if node.ctx == "load":
+            _record(variable_paths, node.name, ())
+
+        else:
+            stored_names.add(node.name)
+
+        return
+
+    if isinstance(node, nodes.Call) and isinstance(node.node, nodes.Getattr):
+        # method call (e.g. `a.b.items()`), the object is required as a whole
+        _collect(node.node.node, variable_paths, stored_names)
+        for child in node.iter_child_nodes(exclude=("node",)):
+            _collect(child, variable_paths, stored_names)
+
+        return
+
+    if isinstance(node, (nodes.Getattr, nodes.Getitem)):
+        chain = []
+        current = node
+        while isinstance(current, (nodes.Getattr, nodes.Getitem)):
+            if isinstance(current, nodes.Getattr):
+                chain.append(current.attr)
+
+            elif isinstance(current.arg, nodes.Const) and isinstance(current.arg.value, (str, int)):
+                chain.append(current.arg.value)
+
+            else:
+                # dynamic lookup (e.g. `a.b[c]`), everything below this level is required
+                _collect(current.arg, variable_paths, stored_names)
+                chain = []
+
+            current = current.node
+
+        if isinstance(current, nodes.Name) and current.ctx == "load":
+            _record(variable_paths, current.name, reversed(chain))
+
+        else:
+            _collect(current, variable_paths, stored_names)
+
+        return
+
+    for child in node.iter_child_nodes():
+        _collect(child, variable_paths, stored_names)
+
+
+def find_variable_paths(ast):
+    """
+    returns a dictionary with all variables, that are expected from the template context (undeclared variables) and
+    the attribute/item paths that are accessed on them (an empty path tuple indicates, that the entire variable is
+    required)
+
+    :param ast: Jinja2 AST (result of `Environment.parse`)
+    :return: dictionary that maps variable names to a set of path tuples
+    """
+    variable_paths = dict()
+    stored_names = set()
+    _collect(ast, variable_paths, stored_names)
+
+    result = dict()
+    for name in meta.find_undeclared_variables(ast):
+        paths = variable_paths.get(name, set())
+        if () in paths or not paths or name in stored_names:
+            # variable is used as a whole (or also assigned within the template, don't try to be smart)
+            result[name] = {()}
+
+        else:
+            result[name] = paths
+
+    return result
+
+
+def referenced_variable_paths(environment, name=None, source=None):
+    """
+    find the variable paths of a template (by name or source) including all templates, that are referenced using
+    `include`, `import` or `extends` statements
+
+    :param environment: Jinja2 environment, that should be used to load and parse the templates
+    :param name: name of the template within the loader of the environment
+    :param source: source of the template (if not loaded by name)
+    :return: tuple with the variable paths (None if the variables can't be determined, e.g. dynamic includes) and a
+             list of uptodate functions of all loaded templates
+    """
+    result = dict()
+    uptodate_functions = []
+    pending = []
+    visited = set()
+
+    if source is not None:
+        pending.append((None, source))
+
+    else:
+        pending.append((name, None))
+
+    while pending:
+        template_name, template_source = pending.pop()
+        if template_name is not None:
+            if template_name in visited:
+                continue
+
+            visited.add(template_name)
+            template_source, _, uptodate = environment.loader.get_source(environment, template_name)
+            uptodate_functions.append(uptodate)
+
+        ast = environment.parse(template_source)
+        for variable, paths in find_variable_paths(ast).items():
+            result.setdefault(variable, set()).update(paths)
+
+        for referenced_template in meta.find_referenced_templates(ast):
+            if referenced_template is None:
+                # dynamic template reference, cannot determine the variables
+                return None, uptodate_functions
+
+            pending.append((referenced_template, None))
+
+    return result, uptodate_functions
+
+
+def _project_value(value, paths):
+    if () in paths or not isinstance(value, Mapping):
+        return value
+
+    grouped_paths = dict()
+    for path in paths:
+        grouped_paths.setdefault(path[0], set()).add(path[1:])
+
+    result = dict()
+    for key, sub_paths in grouped_paths.items():
+        if key in value:
+            result[key] = _project_value(value[key], sub_paths)
+
+    return result
+
+
+def project_parameters(parameters, variable_paths):
+    """
+    returns a new (shallow) dictionary, that only contains the given variable paths of the parameters
+
+    :param parameters: dictionary that contains all parameters
+    :param variable_paths: result of the `find_variable_paths` function
+    :return: projected dictionary
+    """
+    result = dict()
+    for name, paths in variable_paths.items():
+        if name in parameters:
+            result[name] = _project_value(parameters[name], paths)
+
+    return result
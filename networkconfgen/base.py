@@ -2,9 +2,30 @@ import logging
 import jinja2
 import os
 import json
+import time
 from networkconfgen import custom_filters
+from networkconfgen.analysis import referenced_variable_paths, project_parameters
+from networkconfgen import batch
+from networkconfgen import schedule
+from networkconfgen.diff import config_hash, diff_config, ConfigDiff
+from networkconfgen.watcher import TemplateWatcher
+from networkconfgen.error_log import RateLimitedErrorLog
+from networkconfgen.hashing import parameter_digest
+from networkconfgen import tracing
+from networkconfgen import bundle as template_bundle
+from networkconfgen import environment_pool
+from networkconfgen.limits import LoopLimitExtension, RenderLimitExceeded, MemoryLimitExceeded, MemoryTracker, \
+    render_with_limits
+from networkconfgen import render_context
+from networkconfgen.render_context import RenderError, STRICT_ERROR_CODES
 from networkconfgen.constants import ERROR_UNKNOWN, ERROR_INVALID_VLAN_RANGE, ERROR_INVALID_VALUE, ERROR_CODES
 
+try:
+    from collections.abc import Mapping
+
+except ImportError:  # pragma: no cover (python 2.7)
+    from collections import Mapping
+
 logger = logging.getLogger("networkconfgen")
 
 
@@ -16,6 +37,24 @@ class NetworkConfGenResult(object):
     error_text = None
     search_path = None
     template_file_name = None
+    strict = False
+    render_time = None
+    peak_memory = None
+    _tracer = None
+    _trace_parent = None
+
+    def __getstate__(self):
+        # the tracer of the worker process (see render_batch) is not passed to the parent process
+        state = dict(self.__dict__)
+        state.pop("_tracer", None)
+        state.pop("_trace_parent", None)
+        return state
+
+    def _span(self, name):
+        if self._tracer is None:
+            return tracing.NO_SPAN
+
+        return self._tracer.start_span(name, parent=self._trace_parent)
 
     @property
     def render_error(self):
@@ -29,6 +68,14 @@ class NetworkConfGenResult(object):
         """
         identify errors within render content (known error codes)
         """
+        with self._span(tracing.SPAN_RESULT_SCAN_ERRORS):
+            return self._scan_content_errors()
+
+    def _scan_content_errors(self):
+        if self.strict:
+            # any error aborts the render process in strict mode, therefore the content is not verified
+            return False
+
         content_has_error = False
 
         if self.template_result is not None:
@@ -55,6 +102,10 @@ class NetworkConfGenResult(object):
         returns a cleaned template result (trim tabs on the left side, whitespace on the right side and remove
         empty lines)
         """
+        with self._span(tracing.SPAN_RESULT_CLEAN):
+            return self._clean_template_result()
+
+    def _clean_template_result(self):
         if self.template_result is None:
             return None
 
@@ -75,6 +126,56 @@ class NetworkConfGenResult(object):
 
         return result
 
+    @property
+    def template_result_hash(self):
+        """
+        SHA256 hex digest of the template result (None, if no template result exists)
+        """
+        if self.template_result is None:
+            return None
+
+        return config_hash(self.template_result)
+
+    def diff(self, previous, previous_hash=None):
+        """
+        compare the template result with a previous configuration (e.g. the golden configuration of the device) based
+        on IOS-style configuration blocks (see networkconfgen.diff)
+
+        :param previous: previous configuration string or NetworkConfGenResult instance (not required if the
+                         previous_hash is given and matches)
+        :param previous_hash: SHA256 hex digest of the previous configuration, if it matches the hash of the template
+                              result, the configurations are not compared
+        :return: ConfigDiff instance or None, if no template result exists
+        """
+        if self.template_result is None:
+            return None
+
+        if previous_hash is not None and previous_hash == self.template_result_hash:
+            return ConfigDiff()
+
+        if isinstance(previous, NetworkConfGenResult):
+            previous = previous.template_result
+
+        if type(previous) is not str:
+            raise AttributeError("previous must be a string or a NetworkConfGenResult with a template result")
+
+        return diff_config(previous, self.template_result)
+
+    @classmethod
+    def from_json(cls, data):
+        """
+        create a NetworkConfGenResult instance from its dictionary representation (see to_json)
+        """
+        obj = cls()
+        obj.template_file_name = data.get("template_file_name")
+        obj.search_path = data.get("search_path")
+        obj.template_result = data.get("template_result")
+        obj.error_text = data.get("error_text")
+        obj.render_time = data.get("render_time")
+        obj.peak_memory = data.get("peak_memory")
+
+        return obj
+
     def to_json(self):
         return {
             "template_file_name": self.template_file_name,
@@ -83,7 +184,9 @@ class NetworkConfGenResult(object):
             "from_string": self.from_string,
             "search_path": self.search_path,
             "template_result": self.template_result,
-            "error_text": self.error_text
+            "error_text": self.error_text,
+            "render_time": self.render_time,
+            "peak_memory": self.peak_memory
         }
 
     def __str__(self):
@@ -108,6 +211,17 @@ class NetworkConfGen(object):
     """
     _template_engine = None
     _searchpath = None
+    _variable_paths_cache = None
+    _init_arguments = None
+    _production_mode = False
+    _template_watcher = None
+    _bundle = None
+    _render_limits = None
+    _strict = False
+    _memory_accounting = False
+    _tracer = None
+    _environment_key = None
+    _environment_release = None
 
     def __init__(self, searchpath=None,
                  block_start_string="{%",
@@ -117,122 +231,718 @@ class NetworkConfGen(object):
                  comment_end_string="#}",
                  line_comment_prefix=None,
                  variable_start_string="{{",
-                 variable_end_string="}}"):
+                 variable_end_string="}}",
+                 production_mode=False,
+                 bundle=None,
+                 render_limits=None,
+                 strict=False,
+                 macro_libraries=None,
+                 memory_accounting=False,
+                 tracer=None,
+                 shared_environment=False):
+        """
+        :param production_mode: keep all loaded templates in memory and don't check the template files for changes
+                                on every render (use `reload` or `start_template_watcher` to apply changes)
+        :param bundle: path to a precompiled template bundle (see `compile_bundle`), that is used instead of the
+                       searchpath to load the templates
+        :param render_limits: default RenderLimits instance, that is used for every render process
+        :param strict: abort the render process on the first error of a custom filter or error code variable
+                       (`_ERROR_.*`) and raise an error if an undefined variable is used
+        :param macro_libraries: dictionary with the global variable name and the template file of the macro libraries,
+                                that are available in all templates (see `add_macro_library`)
+        :param memory_accounting: measure the peak memory allocation of every render process (`peak_memory` of the
+                                  result), slows down the render process
+        :param tracer: tracing.Tracer instance to export spans of the render processes (e.g. to a local file using the
+                       tracing.JsonLinesExporter), tracing is disabled if not set
+        :param shared_environment: share the Jinja2 environment (and the compiled templates) with all other instances
+                                   with the same configuration (see environment_pool), `reload` affects all of them
+        """
         self._searchpath = searchpath
+        self._bundle = bundle
+        self._render_limits = render_limits
+        self._strict = strict
+        if memory_accounting:
+            # raises an AttributeError if the tracemalloc module is not available
+            MemoryTracker()
+
+        self._memory_accounting = memory_accounting
+        self._tracer = tracer
+        self._production_mode = production_mode
+        self._variable_paths_cache = dict()
+        self._macro_libraries = dict()
+        self._error_log = RateLimitedErrorLog(logger)
+
+        # required to create the same configuration generator within the worker processes (see render_batch)
+        self._init_arguments = dict(
+            searchpath=searchpath,
+            block_start_string=block_start_string,
+            block_end_string=block_end_string,
+            line_statement_prefix=line_statement_prefix,
+            comment_start_string=comment_start_string,
+            comment_end_string=comment_end_string,
+            line_comment_prefix=line_comment_prefix,
+            variable_start_string=variable_start_string,
+            variable_end_string=variable_end_string,
+            production_mode=production_mode,
+            bundle=bundle,
+            render_limits=render_limits,
+            strict=strict,
+            macro_libraries=None,
+            memory_accounting=memory_accounting,
+            tracer=tracer,
+            shared_environment=shared_environment
+        )
+
+        if shared_environment:
+            self._acquire_environment(macro_libraries or dict())
 
-        if searchpath is None:
+        else:
+            self._template_engine = self._create_template_engine()
+
+        for name, file in (macro_libraries or dict()).items():
+            self.add_macro_library(name, file)
+
+    def _create_template_engine(self):
+        """
+        create the Jinja2 environment with the custom filters based on the arguments of the instance
+        """
+        arguments = self._init_arguments
+        bundle = arguments["bundle"]
+        searchpath = arguments["searchpath"]
+
+        if bundle is not None:
+            # load precompiled templates, no parsing and compilation required
+            loader = jinja2.ModuleLoader(bundle)
+
+        elif searchpath is None:
             # if no searchpath is given, use an empty Dict loader
             loader = jinja2.DictLoader({})
 
         else:
             loader = jinja2.FileSystemLoader(searchpath=searchpath)
 
-        self._template_engine = jinja2.Environment(
+        template_engine = jinja2.Environment(
             loader=loader,
             lstrip_blocks=True,
             trim_blocks=True,
-            block_start_string=block_start_string,
-            block_end_string=block_end_string,
-            comment_start_string=comment_start_string,
-            comment_end_string=comment_end_string,
-            line_statement_prefix=line_statement_prefix,
-            line_comment_prefix=line_comment_prefix,
-            variable_start_string=variable_start_string,
-            variable_end_string=variable_end_string
+            block_start_string=arguments["block_start_string"],
+            block_end_string=arguments["block_end_string"],
+            comment_start_string=arguments["comment_start_string"],
+            comment_end_string=arguments["comment_end_string"],
+            line_statement_prefix=arguments["line_statement_prefix"],
+            line_comment_prefix=arguments["line_comment_prefix"],
+            variable_start_string=arguments["variable_start_string"],
+            variable_end_string=arguments["variable_end_string"],
+            undefined=jinja2.StrictUndefined if arguments["strict"] else jinja2.Undefined,
+            auto_reload=not arguments["production_mode"],
+            cache_size=-1 if arguments["production_mode"] else 400     # unlimited cache, templates are never evicted
         )
 
-        self._template_engine.filters["clean_string"] = custom_filters.valid_vlan_name  # removes special characters
-        self._template_engine.filters["valid_vlan_name"] = custom_filters.valid_vlan_name
-        self._template_engine.filters["dotted_decimal"] = custom_filters.dotted_decimal
-        self._template_engine.filters["expand_vlan_list"] = custom_filters.expand_vlan_list
-        self._template_engine.filters["wildcard_mask"] = custom_filters.wildcard_mask       # aka hostmask
-        self._template_engine.filters["convert_interface_name"] = custom_filters.convert_interface_name
-        self._template_engine.filters["split_interface"] = custom_filters.split_interface
-        self._template_engine.filters["split_interface_cisco_ios"] = custom_filters.split_interface_cisco_ios
-        self._template_engine.filters["split_interface_juniper_junos"] = custom_filters.split_interface_juniper_junos
-        self._template_engine.add_extension('jinja2.ext.do')
+        template_engine.filters["clean_string"] = custom_filters.valid_vlan_name  # removes special characters
+        template_engine.filters["valid_vlan_name"] = custom_filters.valid_vlan_name
+        template_engine.filters["sanitize"] = custom_filters.sanitize
+        template_engine.filters["sanitize_list"] = custom_filters.sanitize_list
+        template_engine.filters["dotted_decimal"] = custom_filters.dotted_decimal
+        template_engine.filters["expand_vlan_list"] = custom_filters.expand_vlan_list
+        template_engine.filters["wildcard_mask"] = custom_filters.wildcard_mask       # aka hostmask
+        template_engine.filters["nth_host"] = custom_filters.nth_host
+        template_engine.filters["peer_address"] = custom_filters.peer_address
+        template_engine.filters["subnet_split"] = custom_filters.subnet_split
+        template_engine.filters["supernet"] = custom_filters.supernet
+        template_engine.filters["in_subnet"] = custom_filters.in_subnet
+        template_engine.filters["aggregate_prefixes"] = custom_filters.aggregate_prefixes
+        template_engine.filters["convert_interface_name"] = custom_filters.convert_interface_name
+        template_engine.filters["split_interface"] = custom_filters.split_interface
+        template_engine.filters["split_interface_cisco_ios"] = custom_filters.split_interface_cisco_ios
+        template_engine.filters["split_interface_juniper_junos"] = custom_filters.split_interface_juniper_junos
+        template_engine.filters["expand_interface_range"] = custom_filters.expand_interface_range
+        template_engine.filters["compress_interface_range"] = custom_filters.compress_interface_range
+        template_engine.add_extension('jinja2.ext.do')
+        template_engine.add_extension(LoopLimitExtension)     # required to limit the loop iterations
+
+        if bundle is not None:
+            template_bundle.verify_manifest(template_bundle.load_manifest(bundle), template_engine,
+                                            self._environment_configuration())
+
+        return template_engine
+
+    def _acquire_environment(self, macro_libraries):
+        """
+        use the shared Jinja2 environment of the configuration (and the given macro libraries) from the environment
+        pool, the environment is released if the instance is deleted
+        """
+        configuration = dict(self._init_arguments)
+        for key in ("render_limits", "memory_accounting", "tracer", "shared_environment"):
+            del configuration[key]
+
+        if isinstance(configuration["searchpath"], list):
+            configuration["searchpath"] = tuple(configuration["searchpath"])
+
+        # the macro libraries are part of the globals of the environment
+        configuration["macro_libraries"] = tuple(sorted(macro_libraries.items()))
+        key = (type(self), tuple(sorted(configuration.items())))
+
+        template_engine = environment_pool.DEFAULT_POOL.acquire(key, self._create_template_engine)
+        if self._environment_release is not None:
+            self._environment_release()
+
+        self._template_engine = template_engine
+        self._environment_key = key
+        self._environment_release = environment_pool.DEFAULT_POOL.release_on_delete(self, key)
+        self._shared_macro_libraries = dict(macro_libraries)
+
+    def _environment_configuration(self):
+        """
+        configuration of the Jinja2 environment, that affects the compiled templates
+        """
+        configuration = dict(self._init_arguments)
+        for key in ("searchpath", "production_mode", "bundle", "render_limits", "macro_libraries", "memory_accounting",
+                    "tracer", "shared_environment"):
+            del configuration[key]
+
+        configuration["lstrip_blocks"] = True
+        configuration["trim_blocks"] = True
+
+        return configuration
+
+    def compile_bundle(self, target, filter_func=None, ignore_errors=True):
+        """
+        compile all templates within the searchpath (including the delimiter configuration and the custom filters of
+        this instance) to a bundle of precompiled Python modules. Use the `bundle` argument of the NetworkConfGen
+        class to render the templates from the bundle without parsing and compilation.
+
+        :param target: path of the bundle (ZIP archive)
+        :param filter_func: function, that returns True for all template names that should be compiled
+        :param ignore_errors: skip templates with syntax errors (otherwise the TemplateSyntaxError is raised)
+        :return: manifest of the bundle (dictionary)
+        """
+        if not self._template_engine.loader.has_source_access:
+            raise AttributeError("templates are loaded from a bundle, searchpath required to compile a bundle")
+
+        with self._activate_render_context():
+            return template_bundle.compile_bundle(self._template_engine, target, self._environment_configuration(),
+                                                  filter_func=filter_func, ignore_errors=ignore_errors)
+
+    def add_macro_library(self, name, file):
+        """
+        register a macro library (template file within the searchpath), that is loaded and evaluated once and is
+        available as global variable in all templates, e.g. `{{ m.interface("gi0/1") }}` instead of
+        `{% import "macros/common.j2" as m %}` in every template. The library is loaded again if the template file
+        is changed (in production mode, if the template is reloaded).
+
+        :param name: name of the global variable
+        :param file: name of the template file within the searchpath
+        """
+        if type(name) is not str or type(file) is not str:
+            raise AttributeError("name and file attribute must be a string")
+
+        if self._environment_key is not None and self._shared_macro_libraries.get(name) != file:
+            # switch to the shared environment with the additional macro library
+            self._acquire_environment(dict(self._macro_libraries, **{name: file}))
+
+        with self._activate_render_context():
+            self._template_engine.globals[name] = self._template_engine.get_template(file).module
+
+        self._macro_libraries[name] = file
+        self._init_arguments["macro_libraries"] = dict(self._macro_libraries)
+
+    def _load_macro_libraries(self):
+        """
+        update the macro library modules within the globals of the environment, the modules are cached by the template
+        instances (a new instance is only created if the template file is changed or reloaded)
+
+        :return: dictionary with the module per name of the macro library
+        """
+        modules = dict()
+        for name, file in self._macro_libraries.items():
+            module = modules[name] = self._template_engine.get_template(file).module
+            if self._template_engine.globals.get(name) is not module:
+                logger.debug("load macro library '%s' as '%s'", file, name)
+                self._template_engine.globals[name] = module
+
+        return modules
+
+    @staticmethod
+    def _add_macro_libraries(parameters, modules):
+        """
+        returns the variables of the render process with the macro library modules. Jinja2 versions before 3.0 copy
+        the globals of the environment when a template is loaded, therefore the modules are also passed as variables
+        (cached templates wouldn't see libraries that are added or reloaded later). The parameters take precedence.
+        """
+        if not modules:
+            return parameters
+
+        variables = dict(modules)
+        variables.update(parameters)
+
+        return variables
 
     def _add_error_codes(self, parameter_dictionary):
-        if type(parameter_dictionary) is not dict:
+        if not isinstance(parameter_dictionary, Mapping):
             raise AttributeError("parameter_dictionary must be a dict type")
 
-        parameter_dictionary.update(ERROR_CODES)
+        if type(parameter_dictionary) is not dict:
+            # read-only mapping (e.g. LayeredParameters), only the top-level variables are copied
+            parameter_dictionary = dict(parameter_dictionary)
+
+        parameter_dictionary.update(STRICT_ERROR_CODES if self._strict else ERROR_CODES)
 
         return parameter_dictionary
 
-    def render_from_string(self, template_content, parameters):
+    def _activate_render_context(self, render_limits=None, filter_cache=None):
+        """
+        activate the render context (required for the render limits, the strict mode and the filter cache), the context
+        is also active while the template is compiled because Jinja2 may evaluate filters with constant arguments at
+        compile time
+        """
+        render_limits = render_limits or self._render_limits
+        if render_limits is None and not self._strict and filter_cache is None:
+            return render_context.activate(None)
+
+        return render_context.activate(render_context.RenderContext(render_limits, strict=self._strict,
+                                                                    filter_cache=filter_cache))
+
+    def _render_template(self, template, parameters, context, obj):
+        memory_limit = context is not None and context.render_limits is not None and \
+            context.render_limits.max_memory_bytes is not None
+        if not self._memory_accounting and not memory_limit:
+            return self._render_template_with_limits(template, parameters, context)
+
+        memory_tracker = MemoryTracker()
+        memory_tracker.start()
+        if context is not None:
+            context.memory_tracker = memory_tracker
+
+        try:
+            return self._render_template_with_limits(template, parameters, context)
+
+        finally:
+            obj.peak_memory = memory_tracker.stop()
+
+    def _render_template_with_limits(self, template, parameters, context):
+        if context is None or context.render_limits is None:
+            return template.render(parameters)
+
+        return render_with_limits(template, parameters, context)
+
+    def _span(self, name):
+        """
+        start a child span of the active render process (no-op if tracing is disabled)
+        """
+        if self._tracer is None:
+            return tracing.NO_SPAN
+
+        return self._tracer.start_span(name)
+
+    def _start_render_span(self, obj, parameters):
+        if self._tracer is None:
+            return None
+
+        attributes = {tracing.ATTRIBUTE_TEMPLATE: obj.template_file_name or "<string>"}
+        try:
+            # the error codes are added to the parameter dictionary during the render process
+            attributes[tracing.ATTRIBUTE_PARAMETER_HASH] = parameter_digest(
+                parameters, variables=[key for key in parameters if key not in ERROR_CODES]
+            )
+
+        except TypeError:
+            # parameters with unsupported types
+            pass
+
+        span = self._tracer.start_span(tracing.SPAN_RENDER, attributes)
+
+        # cleaning and error scanning of the result are child spans of the render process
+        obj._tracer = self._tracer
+        obj._trace_parent = span.context
+
+        return span
+
+    def _end_render_span(self, span, obj):
+        if span is None:
+            return
+
+        if obj.render_error:
+            span.set_attribute(tracing.ATTRIBUTE_ERROR_TEXT, obj.error_text)
+            span.set_error(obj.error_text)
+
+        span.end()
+
+    def _log_error(self, obj, exc_info=False):
+        """
+        log the error of a result, identical errors of the same template are rate limited (see RateLimitedErrorLog)
+        """
+        self._error_log.error((obj.template_file_name, obj.error_text), obj.error_text, exc_info=exc_info)
+
+    def _new_result(self, file=None):
+        obj = NetworkConfGenResult()
+        obj.strict = self._strict
+        if file is not None:
+            obj.search_path = self._searchpath
+            obj.template_file_name = file
+
+        return obj
+
+    def _variable_paths(self, file=None, template_content=None):
+        if template_content is not None:
+            variable_paths, _ = referenced_variable_paths(self._template_engine, source=template_content)
+            return variable_paths
+
+        if not self._template_engine.loader.has_source_access:
+            # template sources are not available (e.g. precompiled bundle)
+            return None
+
+        cached = self._variable_paths_cache.get(file)
+        if cached is not None:
+            if self._production_mode or all(uptodate is None or uptodate() for uptodate in cached[1]):
+                return cached[0]
+
+        variable_paths, uptodate_functions = referenced_variable_paths(self._template_engine, name=file)
+        self._variable_paths_cache[file] = (variable_paths, uptodate_functions)
+
+        return variable_paths
+
+    def reload(self, files=None):
+        """
+        remove templates from the cache, they are loaded again on the next render (required in production mode to
+        apply changes of the template files)
+
+        :param files: list of template names, that should be reloaded (all templates if not set)
+        """
+        cache = self._template_engine.cache
+        self._variable_paths_cache.clear()
+
+        if cache is None:
+            return
+
+        if files is None:
+            cache.clear()
+            return
+
+        for key in list(cache.keys()):
+            if key[1] in files:
+                try:
+                    del cache[key]
+
+                except KeyError:
+                    # already removed by another thread
+                    pass
+
+    def reload_outdated(self):
+        """
+        reload all templates, that are changed since they were loaded
+
+        :return: list with the names of the reloaded templates
+        """
+        cache = self._template_engine.cache
+        if cache is None:
+            return []
+
+        outdated_templates = [key[1] for key, template in list(cache.items()) if not template.is_up_to_date]
+        if outdated_templates:
+            self.reload(outdated_templates)
+
+        return outdated_templates
+
+    def start_template_watcher(self, interval=5.0):
+        """
+        start a background thread, that checks the loaded templates for changes in the given interval and reloads
+        only the changed templates (primarily used in production mode)
+
+        :param interval: interval in seconds
+        """
+        if self._template_watcher is not None:
+            raise RuntimeError("template watcher already started")
+
+        self._template_watcher = TemplateWatcher(self, interval=interval)
+        self._template_watcher.start()
+
+    def stop_template_watcher(self):
+        """
+        stop the background thread, that checks the templates for changes
+        """
+        if self._template_watcher is not None:
+            self._template_watcher.stop()
+            self._template_watcher = None
+
+    def referenced_variables(self, file=None, template_content=None):
+        """
+        returns the names of all variables, that are used within a template (from a file within the searchpath or a
+        string) and all templates that are referenced by it (include, import and extends statements)
+
+        :param file: name of the template file within the searchpath
+        :param template_content: template string (used instead of the file)
+        :return: set of variable names or None, if the variables can't be determined (e.g. dynamic includes)
+        """
+        variable_paths = self._variable_paths(file=file, template_content=template_content)
+        if variable_paths is None:
+            return None
+
+        return set(variable_paths.keys())
+
+    def project_parameters(self, parameters, file=None, template_content=None):
+        """
+        returns a copy of the parameters, that only contains the variables used within the given template. Nested
+        dictionaries are also reduced if the template only accesses certain keys of them (e.g. `{{ site.name }}`).
+        If the variables can't be determined, the parameters are returned unmodified.
+
+        :param parameters: dictionary that contains all parameters
+        :param file: name of the template file within the searchpath
+        :param template_content: template string (used instead of the file)
+        :return: dictionary with the used parameters
+        """
+        if not isinstance(parameters, Mapping):
+            raise AttributeError("parameters must be a dictionary")
+
+        variable_paths = self._variable_paths(file=file, template_content=template_content)
+        if variable_paths is None:
+            return parameters
+
+        return project_parameters(parameters, variable_paths)
+
+    def render_from_string(self, template_content, parameters, render_limits=None):
         """
         render a Jinja2 template from a string using the custom Jinja2 environment
 
         :param template_content:
         :param parameters: dictionary that contains all parameters
+        :param render_limits: RenderLimits instance for this render process (overrides the default limits)
         :return:
         """
-        if type(parameters) is not dict:
+        if not isinstance(parameters, Mapping):
             raise AttributeError("parameters must be a dictionary")
 
         if type(template_content) is not str:
             raise AttributeError("file attribute must be a string")
 
-        obj = NetworkConfGenResult()
+        obj = self._new_result()
+        span = self._start_render_span(obj, parameters)
+        start_time = time.time()
 
         try:
-            template = self._template_engine.from_string(template_content)
-            obj.template_result = template.render(self._add_error_codes(parameters))
+            with self._activate_render_context(render_limits) as context:
+                macro_libraries = self._load_macro_libraries()
+                with self._span(tracing.SPAN_TEMPLATE_COMPILE):
+                    template = self._template_engine.from_string(template_content)
+
+                with self._span(tracing.SPAN_TEMPLATE_RENDER):
+                    variables = self._add_macro_libraries(self._add_error_codes(parameters), macro_libraries)
+                    obj.template_result = self._render_template(template, variables, context, obj)
 
         except jinja2.TemplateSyntaxError as ex:
             obj.error_text = "Template Syntax Exception in line '%d' (%s)" % (ex.lineno, ex)
             obj.template_result = None
-            logger.error(obj.error_text, exc_info=True)
+            self._log_error(obj, exc_info=True)
+
+        except RenderError as ex:
+            obj.error_text = "Render Error (%s: %s)" % (ex.error_name, ex)
+            obj.template_result = None
+            self._log_error(obj)
+
+        except jinja2.UndefinedError as ex:
+            obj.error_text = ("Undefined Variable (%s)" if self._strict else "Unexpected Exception (%s)") % ex
+            obj.template_result = None
+            self._log_error(obj, exc_info=not self._strict)
+
+        except MemoryLimitExceeded as ex:
+            obj.error_text = "Memory Limit Exceeded (%s)" % ex
+            obj.template_result = None
+            self._log_error(obj)
+
+        except RenderLimitExceeded as ex:
+            obj.error_text = "Render Limit Exceeded (%s)" % ex
+            obj.template_result = None
+            self._log_error(obj)
 
         except Exception as ex:
             obj.error_text = "Unexpected Exception (%s)" % ex
             obj.template_result = None
-            logger.error(obj.error_text, exc_info=True)
+            self._log_error(obj, exc_info=True)
+
+        except BaseException as ex:
+            # interrupted render process (e.g. KeyboardInterrupt), the exception is raised after the span is finished
+            if span is not None:
+                span.set_error("%s: %s" % (type(ex).__name__, ex))
+
+            raise
+
+        finally:
+            obj.render_time = time.time() - start_time
+            self._end_render_span(span, obj)
 
         return obj
 
-    def render_from_file(self, file, parameters):
+    def render_from_file(self, file, parameters, prune_parameters=False, render_limits=None):
         """
         render a Jinja2 template from a file within the searchpath using the custom Jinja2 environment (required to use
         more advanced template features).
 
         :param file:
         :param parameters:
+        :param prune_parameters: only pass the parameters to the template, that are actually used by it
+        :param render_limits: RenderLimits instance for this render process (overrides the default limits)
         :return:
         """
-        if type(parameters) is not dict:
+        if not isinstance(parameters, Mapping):
             raise AttributeError("parameters attribute must be a dictionary")
 
         if type(file) is not str:
             raise AttributeError("file attribute must be a string")
 
-        if not self._searchpath:
+        if not self._searchpath and not self._bundle:
             # add a warning message if no search path is set (won't load a FileSystemLoader in Jinja2)
             logger.warning("searchpath attribute not set, don't expect to find anything")
 
-        obj = NetworkConfGenResult()
-        obj.search_path = self._searchpath
-        obj.template_file_name = file
+        return self._render_file(file, parameters, prune_parameters=prune_parameters, render_limits=render_limits)
+
+    def _render_file(self, file, parameters, prune_parameters=False, render_limits=None, filter_cache=None):
+        obj = self._new_result(file)
+        span = self._start_render_span(obj, parameters)
+        start_time = time.time()
 
         try:
-            logger.debug("render template from file '%s'" % os.path.abspath(os.path.join(self._searchpath, file)))
-            template = self._template_engine.get_template(file)
-            obj.template_result = template.render(self._add_error_codes(parameters))
+            if self._bundle:
+                logger.debug("render template '%s' from bundle '%s'", file, self._bundle)
+
+            elif logger.isEnabledFor(logging.DEBUG):
+                # the absolute path is only computed if the debug level is enabled
+                logger.debug("render template from file '%s'", os.path.abspath(os.path.join(self._searchpath, file)))
+
+            with self._activate_render_context(render_limits, filter_cache) as context:
+                macro_libraries = self._load_macro_libraries()
+                with self._span(tracing.SPAN_TEMPLATE_LOAD):
+                    template = self._template_engine.get_template(file)
+
+                if prune_parameters:
+                    parameters = self.project_parameters(parameters, file=file)
+
+                with self._span(tracing.SPAN_TEMPLATE_RENDER):
+                    variables = self._add_macro_libraries(self._add_error_codes(parameters), macro_libraries)
+                    obj.template_result = self._render_template(template, variables, context, obj)
 
         except jinja2.TemplateNotFound as ex:
             obj.error_text = "Template %s not found" % (ex.name)
             obj.template_result = None
-            logger.error(obj.error_text, exc_info=True)
+            self._log_error(obj, exc_info=True)
 
         except jinja2.TemplateSyntaxError as ex:
             obj.error_text = "Template Syntax Exception file '%s', line '%d' (%s)" % (ex.filename, ex.lineno, ex)
             obj.template_result = None
-            logger.error(obj.error_text, exc_info=True)
+            self._log_error(obj, exc_info=True)
+
+        except RenderError as ex:
+            obj.error_text = "Render Error (%s: %s)" % (ex.error_name, ex)
+            obj.template_result = None
+            self._log_error(obj)
+
+        except jinja2.UndefinedError as ex:
+            obj.error_text = ("Undefined Variable (%s)" if self._strict else "Unexpected Exception (%s)") % ex
+            obj.template_result = None
+            self._log_error(obj, exc_info=not self._strict)
+
+        except MemoryLimitExceeded as ex:
+            obj.error_text = "Memory Limit Exceeded (%s)" % ex
+            obj.template_result = None
+            self._log_error(obj)
+
+        except RenderLimitExceeded as ex:
+            obj.error_text = "Render Limit Exceeded (%s)" % ex
+            obj.template_result = None
+            self._log_error(obj)
 
         except Exception as ex:
             obj.error_text = "Unexpected Exception (%s)" % ex
             obj.template_result = None
-            logger.error(obj.error_text, exc_info=True)
+            self._log_error(obj, exc_info=True)
+
+        except BaseException as ex:
+            # interrupted render process (e.g. KeyboardInterrupt), the exception is raised after the span is finished
+            if span is not None:
+                span.set_error("%s: %s" % (type(ex).__name__, ex))
+
+            raise
+
+        finally:
+            obj.render_time = time.time() - start_time
+            self._end_render_span(span, obj)
 
         return obj
+
+    def render_fan_out(self, files, parameters, prune_parameters=False, render_limits=None):
+        """
+        render the same parameters with multiple templates from files within the searchpath (e.g. the Cisco IOS and
+        Juniper JunOS templates of a device during a migration). The parameters are prepared once and the results of
+        the interface filters (e.g. `convert_interface_name`) are shared between the templates.
+
+        :param files: dictionary with the name of the template file within the searchpath per vendor (or any other
+                      key), e.g. `{"cisco_ios": "ios/access_switch.txt", "juniper_junos": "junos/access_switch.txt"}`
+        :param parameters: dictionary that contains all parameters
+        :param prune_parameters: only pass the parameters to the template, that are actually used by it
+        :param render_limits: RenderLimits instance for every render process (overrides the default limits)
+        :return: dictionary with the NetworkConfGenResult instance per key of the files dictionary
+        """
+        if not isinstance(files, Mapping):
+            raise AttributeError("files attribute must be a dictionary")
+
+        if not isinstance(parameters, Mapping):
+            raise AttributeError("parameters attribute must be a dictionary")
+
+        if any(type(file) is not str for file in files.values()):
+            raise AttributeError("template file names must be strings")
+
+        if not self._searchpath and not self._bundle:
+            logger.warning("searchpath attribute not set, don't expect to find anything")
+
+        if not prune_parameters:
+            # prepare the parameters once (e.g. copy of a read-only mapping)
+            parameters = self._add_error_codes(parameters)
+
+        filter_cache = dict()
+        results = dict()
+        for key, file in files.items():
+            logger.debug("render template '%s' for '%s'", file, key)
+            results[key] = self._render_file(file, parameters, prune_parameters=prune_parameters,
+                                             render_limits=render_limits, filter_cache=filter_cache)
+
+        return results
+
+    def render_batch(self, jobs, processes=None, parameter_store=None, prune_parameters=False, chunksize=16,
+                     error_report=None):
+        """
+        render multiple templates from files within the searchpath. The jobs are consumed lazily and the results are
+        yielded in the order of the jobs (a generator is returned).
+
+        If multiple processes are used, the configuration generator is created once within every worker process. To
+        avoid the transfer of large parameter sets to the workers, the parameters of a job can be a key within a
+        `ParameterStore` (e.g. the device ID). The store is opened once per worker process and contains the
+        parameters per key and the parameters that are shared between all keys (e.g. global and site data).
+
+        :param jobs: iterable of (file, parameters) tuples, the parameters are a dictionary or a key within the
+                     parameter store
+        :param processes: number of worker processes (render within the current process if not set)
+        :param parameter_store: ParameterStore instance (or path to the store file) to resolve parameter keys
+        :param prune_parameters: only pass the parameters to the template, that are actually used by it
+        :param chunksize: number of jobs, that are sent to a worker process at once
+        :param error_report: ErrorReport instance, that aggregates the render errors of the batch (the examples are
+                             the parameter store keys or the index of the jobs)
+        :return: generator of NetworkConfGenResult instances
+        """
+        return batch.render_batch(self, jobs, processes=processes, parameter_store=parameter_store,
+                                  prune_parameters=prune_parameters, chunksize=chunksize, error_report=error_report)
+
+    def render_scheduled(self, jobs, history, processes=None, parameter_store=None, prune_parameters=False):
+        """
+        render multiple templates from files within the searchpath, the jobs with the longest expected render time
+        (based on the render times of previous runs) are dispatched first. In contrast to `render_batch`, all jobs
+        are loaded before the render process starts.
+
+        :param jobs: iterable of (file, parameters) or (file, parameters, key) tuples, the key identifies the device
+                     within the history (the parameters are a dictionary or a key within the parameter store)
+        :param history: RenderTimeHistory instance, that is updated with the render times of this batch
+        :param processes: number of worker processes (render within the current process if not set)
+        :param parameter_store: ParameterStore instance (or path to the store file) to resolve parameter keys
+        :param prune_parameters: only pass the parameters to the template, that are actually used by it
+        :return: ScheduleReport instance with the results (in the order of the jobs), the utilization of the workers
+                 and the render time percentiles
+        """
+        return schedule.render_scheduled(self, jobs, history, processes=processes, parameter_store=parameter_store,
+                                         prune_parameters=prune_parameters)
@@ -0,0 +1,135 @@
+"""
+Batch rendering of templates using multiple worker processes (see `NetworkConfGen.render_batch`)
+"""
+import multiprocessing
+from collections import deque
+from networkconfgen.parameter_store import ParameterStore
+
+try:
+    from collections.abc import Mapping
+
+except ImportError:  # pragma: no cover (python 2.7)
+    from collections import Mapping
+
+# state of the worker process (the NetworkConfGen instance and the parameter store are created once per process)
+_worker_state = dict()
+
+
+def _init_worker(confgen_class, init_arguments, parameter_store):
+    _worker_state["confgen"] = confgen_class(**init_arguments)
+    _worker_state["parameter_store"] = parameter_store
+
+
+def _render_chunk(jobs, prune_parameters):
+    return [
+        render_job(_worker_state["confgen"], _worker_state["parameter_store"], file, parameters, prune_parameters)
+        for file, parameters in jobs
+    ]
+
+
+def render_job(confgen, parameter_store, file, parameters, prune_parameters=False):
+    """
+    render a single batch job, the parameters are either a dictionary or a key within the parameter store
+    """
+    if not isinstance(parameters, Mapping):
+        try:
+            parameters = parameter_store.get(parameters)
+
+        except KeyError:
+            result = confgen._new_result(file)
+            result.template_result = None
+            result.error_text = "Parameters for key '%s' not found in parameter store" % parameters
+            return result
+
+    return confgen.render_from_file(file, parameters, prune_parameters=prune_parameters)
+
+
+def _iter_chunks(jobs, chunksize, parameter_store):
+    chunk = []
+    for file, parameters in jobs:
+        if not isinstance(parameters, Mapping) and parameter_store is None:
+            raise AttributeError("parameter_store required to render jobs with parameter keys")
+
+        chunk.append((file, parameters))
+        if len(chunk) >= chunksize:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def _record_keys(jobs, keys):
+    """
+    record the key of every job (the parameter store key or the index of the job) for the error report
+    """
+    for index, (file, parameters) in enumerate(jobs):
+        keys.append(index if isinstance(parameters, Mapping) else parameters)
+        yield file, parameters
+
+
+def render_batch(confgen, jobs, processes=None, parameter_store=None, prune_parameters=False, chunksize=16,
+                 error_report=None):
+    """
+    generator, that renders the given jobs and yields the results in the order of the jobs. The jobs are consumed
+    lazily, only a limited number of jobs is processed at the same time.
+    """
+    keys = deque()
+    if error_report is not None:
+        jobs = _record_keys(jobs, keys)
+
+    close_store = isinstance(parameter_store, str)
+    if close_store:
+        parameter_store = ParameterStore(parameter_store)
+
+    try:
+        for result in _render_batch(confgen, jobs, processes, parameter_store, prune_parameters, chunksize):
+            if error_report is not None:
+                error_report.add(result, keys.popleft())
+
+            yield result
+
+    finally:
+        if close_store:
+            parameter_store.close()
+
+
+def _render_batch(confgen, jobs, processes, parameter_store, prune_parameters, chunksize):
+    if not processes:
+        for chunk in _iter_chunks(jobs, chunksize, parameter_store):
+            for file, parameters in chunk:
+                yield render_job(confgen, parameter_store, file, parameters, prune_parameters)
+
+        return
+
+    pool = multiprocessing.Pool(
+        processes=processes,
+        initializer=_init_worker,
+        initargs=(type(confgen), confgen._init_arguments, parameter_store)
+    )
+    max_pending = processes * 2
+    pending = deque()
+    completed = False
+
+    try:
+        for chunk in _iter_chunks(jobs, chunksize, parameter_store):
+            pending.append(pool.apply_async(_render_chunk, (chunk, prune_parameters)))
+
+            while len(pending) >= max_pending:
+                for result in pending.popleft().get():
+                    yield result
+
+        while pending:
+            for result in pending.popleft().get():
+                yield result
+
+        completed = True
+
+    finally:
+        if completed:
+            pool.close()
+
+        else:
+            pool.terminate()
+
+        pool.join()
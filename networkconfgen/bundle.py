@@ -0,0 +1,134 @@
+"""
+Ahead-of-time compiled template bundles
+
+A bundle is a ZIP archive, that contains the precompiled Python bytecode of every template within a searchpath and a
+manifest with the configuration of the Jinja2 environment, that was used to compile the templates. The bundle is
+loaded using the `jinja2.ModuleLoader`, therefore the templates are not parsed or compiled when they are rendered.
+
+Because the bundle contains Python bytecode, it can only be used with the same Python and Jinja2 version.
+"""
+import binascii
+import json
+import logging
+import marshal
+import sys
+import time
+import zipfile
+import jinja2
+
+try:
+    from importlib.util import MAGIC_NUMBER
+
+except ImportError:  # pragma: no cover (python 2.7)
+    import imp
+    MAGIC_NUMBER = imp.get_magic()
+
+logger = logging.getLogger("networkconfgen")
+
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_FILE_NAME = "networkconfgen_manifest.json"
+
+
+def _python_magic():
+    return binascii.hexlify(MAGIC_NUMBER).decode("ascii")
+
+
+def _bytecode(code):
+    """
+    create the content of a .pyc file (without source timestamp, the source is not part of the bundle)
+    """
+    if sys.version_info >= (3, 7):
+        # flags, source timestamp and size
+        header_fields = 3
+
+    elif sys.version_info >= (3, 3):  # pragma: no cover
+        # source timestamp and size
+        header_fields = 2
+
+    else:  # pragma: no cover (python 2.7)
+        header_fields = 1
+
+    return MAGIC_NUMBER + b"\x00\x00\x00\x00" * header_fields + marshal.dumps(code)
+
+
+def create_manifest(environment, configuration, templates):
+    return {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "python_magic": _python_magic(),
+        "jinja2_version": jinja2.__version__,
+        "created": int(time.time()),
+        "configuration": configuration,
+        "filters": sorted(environment.filters.keys()),
+        "extensions": sorted(environment.extensions.keys()),
+        "templates": sorted(templates),
+    }
+
+
+def compile_bundle(environment, target, configuration, filter_func=None, ignore_errors=True):
+    """
+    compile all templates of the environment loader into a bundle
+
+    :param environment: Jinja2 environment (the loader must provide access to the template sources)
+    :param target: path of the bundle (ZIP archive)
+    :param configuration: dictionary with the configuration of the environment (stored in the manifest)
+    :param filter_func: function, that returns True for all template names that should be compiled
+    :param ignore_errors: skip templates with syntax errors (otherwise the exception is raised)
+    :return: manifest of the bundle
+    """
+    templates = []
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as bundle:
+        for name in environment.list_templates(filter_func=filter_func):
+            try:
+                source, filename, _ = environment.loader.get_source(environment, name)
+                code = environment.compile(source, name, filename, raw=True, defer_init=True)
+
+            except jinja2.TemplateSyntaxError as ex:
+                if not ignore_errors:
+                    raise
+
+                logger.warning("skip template '%s' with syntax error (%s)", name, ex)
+                continue
+
+            module_name = jinja2.ModuleLoader.get_template_key(name)
+            bytecode = _bytecode(compile(code, filename or name, "exec"))
+            bundle.writestr(module_name + ".pyc", bytecode)
+            templates.append(name)
+
+        manifest = create_manifest(environment, configuration, templates)
+        bundle.writestr(MANIFEST_FILE_NAME, json.dumps(manifest, indent=4, sort_keys=True))
+
+    return manifest
+
+
+def load_manifest(path):
+    """
+    load the manifest of a bundle
+
+    :param path: path of the bundle (ZIP archive)
+    :return: manifest of the bundle
+    """
+    try:
+        with zipfile.ZipFile(path) as bundle:
+            return json.loads(bundle.read(MANIFEST_FILE_NAME).decode("utf-8"))
+
+    except (zipfile.BadZipfile, KeyError, ValueError) as ex:
+        raise ValueError("'%s' is not a valid template bundle (%s)" % (path, ex))
+
+
+def verify_manifest(manifest, environment, configuration):
+    """
+    verify, that the bundle was compiled with a compatible environment (raises a ValueError if not)
+    """
+    if manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+        raise ValueError("unsupported bundle format version '%s'" % manifest.get("format_version"))
+
+    if manifest.get("python_magic") != _python_magic() or manifest.get("jinja2_version") != jinja2.__version__:
+        raise ValueError("bundle was compiled with another Python or Jinja2 version (Jinja2 %s)" %
+                         manifest.get("jinja2_version"))
+
+    if manifest.get("configuration") != configuration:
+        raise ValueError("bundle was compiled with another environment configuration")
+
+    missing_filters = set(manifest.get("filters", [])) - set(environment.filters.keys())
+    if missing_filters:
+        raise ValueError("bundle requires additional filters: %s" % ", ".join(sorted(missing_filters)))
@@ -0,0 +1,100 @@
+"""
+Command line interface of the networkconfgen library, e.g.
+
+    python -m networkconfgen compile-bundle templates templates.bundle
+    python -m networkconfgen serve --searchpath templates --socket /tmp/networkconfgen.sock
+
+"""
+import argparse
+import sys
+from networkconfgen.base import NetworkConfGen
+from networkconfgen.server import RenderServer
+
+
+def _add_environment_arguments(parser):
+    """
+    arguments, that are passed to the NetworkConfGen class
+    """
+    parser.add_argument("--block-start-string", default="{%")
+    parser.add_argument("--block-end-string", default="%}")
+    parser.add_argument("--line-statement-prefix", default=None)
+    parser.add_argument("--comment-start-string", default="{#")
+    parser.add_argument("--comment-end-string", default="#}")
+    parser.add_argument("--line-comment-prefix", default=None)
+    parser.add_argument("--variable-start-string", default="{{")
+    parser.add_argument("--variable-end-string", default="}}")
+
+
+def _environment_arguments(args):
+    return dict(
+        block_start_string=args.block_start_string,
+        block_end_string=args.block_end_string,
+        line_statement_prefix=args.line_statement_prefix,
+        comment_start_string=args.comment_start_string,
+        comment_end_string=args.comment_end_string,
+        line_comment_prefix=args.line_comment_prefix,
+        variable_start_string=args.variable_start_string,
+        variable_end_string=args.variable_end_string
+    )
+
+
+def compile_bundle_command(args):
+    confgen = NetworkConfGen(searchpath=args.searchpath, **_environment_arguments(args))
+    manifest = confgen.compile_bundle(args.target, ignore_errors=not args.strict)
+    print("%d templates compiled to %s" % (len(manifest["templates"]), args.target))
+
+    return 0
+
+
+def serve_command(args):
+    confgen = NetworkConfGen(searchpath=args.searchpath, production_mode=args.production_mode, bundle=args.bundle,
+                             **_environment_arguments(args))
+    server = RenderServer(confgen, args.socket, processes=args.processes, parameter_store=args.parameter_store)
+    print("render server listening on %s" % args.socket)
+
+    try:
+        server.serve_forever()
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        server.server_close()
+
+    return 0
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(prog="networkconfgen")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    compile_parser = subparsers.add_parser("compile-bundle", help="compile all templates within a searchpath to a "
+                                                                  "bundle of precompiled templates")
+    compile_parser.add_argument("searchpath", help="directory that contains the templates")
+    compile_parser.add_argument("target", help="path of the bundle")
+    compile_parser.add_argument("--strict", action="store_true", help="fail if a template contains syntax errors")
+    _add_environment_arguments(compile_parser)
+    compile_parser.set_defaults(func=compile_bundle_command)
+
+    serve_parser = subparsers.add_parser("serve", help="start a render server on a Unix domain socket")
+    serve_parser.add_argument("--socket", required=True, help="path of the Unix domain socket")
+    serve_parser.add_argument("--searchpath", default=None, help="directory that contains the templates")
+    serve_parser.add_argument("--bundle", default=None, help="path of a precompiled template bundle")
+    serve_parser.add_argument("--production-mode", action="store_true",
+                              help="don't check the template files for changes on every render")
+    serve_parser.add_argument("--processes", type=int, default=None, help="number of worker processes")
+    serve_parser.add_argument("--parameter-store", default=None, help="path of a parameter store")
+    _add_environment_arguments(serve_parser)
+    serve_parser.set_defaults(func=serve_command)
+
+    return parser
+
+
+def main(argv=None):
+    args = create_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
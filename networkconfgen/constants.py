@@ -33,6 +33,11 @@ JUNIPER_INTERFACE_PATTERN = r"^(?P<interface_name>((ge)|(xe)){1})" \
                             r"\-" \
                             r"%s$" % JUNIPER_INTERFACE_PATTERN_ONLY
 
+# regular expression for a single interface or a range of interfaces (e.g. `Gi1/0/1-48` or `ge-0/0/0 - 47`)
+INTERFACE_RANGE_PATTERN = r"^(?P<prefix>.*?)" \
+                          r"(?P<start>\d+)" \
+                          r"(\s*\-\s*(?P<end>\d+))?$"
+
 # operating system identification strings
 OS_CISCO_IOS = "cisco_ios"
 OS_JUNIPER_JUNOS = "juniper_junos"
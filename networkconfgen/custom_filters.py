@@ -3,10 +3,12 @@ Any custom filter that is bound to the Jinja2 Template Engine used in the Networ
 """
 import logging
 import re
-from ipaddress import IPv4Network
+from ipaddress import IPv4Network, IPv4Address, IPv6Address, ip_interface
 from networkconfgen.constants import ERROR_UNKNOWN, ERROR_INVALID_VLAN_RANGE, ERROR_INVALID_VALUE, \
     CISCO_INTERFACE_PATTERN, JUNIPER_INTERFACE_PATTERN, OS_CISCO_IOS, OS_JUNIPER_JUNOS, ERROR_PARAMETER, \
-    ERROR_REGEX, ERROR_NO_MATCH
+    ERROR_REGEX, ERROR_NO_MATCH, INTERFACE_RANGE_PATTERN
+from networkconfgen.render_context import report_error, cached_filter
+from networkconfgen import sanitize as sanitize_rules
 
 logger = logging.getLogger("networkconfgen")
 
@@ -46,7 +48,7 @@ def dotted_decimal(prefix_length):
         return str(ip.netmask)
 
     except Exception:
-        return "%s(%s)" % (ERROR_INVALID_VALUE, prefix_length)
+        return report_error(ERROR_INVALID_VALUE, prefix_length)
 
 
 def wildcard_mask(prefix_length):
@@ -61,7 +63,252 @@ def wildcard_mask(prefix_length):
         return str(ip.hostmask)
 
     except Exception:
-        return "%s(%s)" % (ERROR_INVALID_VALUE, prefix_length)
+        return report_error(ERROR_INVALID_VALUE, prefix_length)
+
+
+# parsed addresses and networks (see _parse_network), the cache is cleared if the maximum size is reached
+_NETWORK_CACHE_SIZE = 4096
+_network_cache = dict()
+
+# maximum number of subnets, that are returned by subnet_split (a single filter call can't be stopped by the render
+# limits)
+MAX_SUBNETS = 65536
+
+_ADDRESS_CLASSES = {4: IPv4Address, 6: IPv6Address}
+
+
+def _parse(value):
+    """
+    parse an address with prefix length (e.g. `10.0.0.1/24`) or a network (IPv4 or IPv6)
+
+    :param value: address or network string
+    :return: tuple with the IP version, the address, the network address, the prefix length and the number of bits
+             (as integers)
+    """
+    interface = ip_interface(str(value))
+    address = int(interface.ip)
+    bits = interface.max_prefixlen
+    prefix_length = interface.network.prefixlen
+
+    return interface.version, address, address & ~((1 << (bits - prefix_length)) - 1), prefix_length, bits
+
+
+def _parse_network(value):
+    """
+    cached version of _parse
+    """
+    result = _network_cache.get(value)
+    if result is None:
+        result = _parse(value)
+
+        if len(_network_cache) >= _NETWORK_CACHE_SIZE:
+            _network_cache.clear()
+
+        _network_cache[value] = result
+
+    return result
+
+
+def _format_address(version, address, prefix_length=None):
+    if prefix_length is None:
+        return str(_ADDRESS_CLASSES[version](address))
+
+    return "%s/%d" % (_ADDRESS_CLASSES[version](address), prefix_length)
+
+
+def nth_host(network, n, with_prefix=False):
+    """
+    returns the n-th address of a network (e.g. `{{ "10.0.0.0/24"|nth_host(1) }}` for the gateway `10.0.0.1`), a
+    negative value counts from the last address of the network (-1 is the broadcast address)
+
+    :param network: network or address with prefix length (e.g. `10.0.0.0/24`)
+    :param n: index of the address
+    :param with_prefix: add the prefix length of the network to the result (e.g. `10.0.0.1/24`)
+    :return: address string
+    """
+    try:
+        version, _, network_address, prefix_length, bits = _parse_network(network)
+        n = int(n)
+        size = 1 << (bits - prefix_length)
+        if not -size <= n < size:
+            raise ValueError("index out of range")
+
+        address = network_address + (n if n >= 0 else size + n)
+        return _format_address(version, address, prefix_length if with_prefix else None)
+
+    except Exception:
+        return report_error(ERROR_INVALID_VALUE, "%s, %s" % (network, n))
+
+
+def peer_address(address, with_prefix=False):
+    """
+    returns the address of the other side of a point-to-point link (/30 and /31 for IPv4, /126 and /127 for IPv6)
+
+    :param address: address with prefix length (e.g. `10.0.0.1/30`)
+    :param with_prefix: add the prefix length to the result (e.g. `10.0.0.2/30`)
+    :return: address string
+    """
+    try:
+        version, address_value, network_address, prefix_length, bits = _parse_network(address)
+        host_bits = bits - prefix_length
+
+        if host_bits == 1:
+            peer = address_value ^ 1
+
+        elif host_bits == 2 and address_value - network_address in (1, 2):
+            # first and second usable address of the network
+            peer = network_address + 3 - (address_value - network_address)
+
+        else:
+            raise ValueError("no point-to-point address")
+
+        return _format_address(version, peer, prefix_length if with_prefix else None)
+
+    except Exception:
+        return report_error(ERROR_INVALID_VALUE, address)
+
+
+def subnet_split(network, new_prefix_length):
+    """
+    split a network into subnets with the given prefix length (e.g. `{{ "10.0.0.0/24"|subnet_split(26) }}`), at most
+    `MAX_SUBNETS` subnets are returned (an error is reported otherwise)
+
+    :param network: network string
+    :param new_prefix_length: prefix length of the subnets
+    :return: list with the subnets
+    """
+    try:
+        version, _, network_address, prefix_length, bits = _parse_network(network)
+        new_prefix_length = int(new_prefix_length)
+        if not prefix_length <= new_prefix_length <= bits:
+            raise ValueError("invalid prefix length")
+
+        count = 1 << (new_prefix_length - prefix_length)
+        if count > MAX_SUBNETS:
+            raise ValueError("too many subnets")
+
+        step = 1 << (bits - new_prefix_length)
+        return [_format_address(version, network_address + i * step, new_prefix_length) for i in range(count)]
+
+    except Exception:
+        return [report_error(ERROR_INVALID_VALUE, "%s, %s" % (network, new_prefix_length))]
+
+
+def supernet(network, new_prefix_length):
+    """
+    returns the network with the given (shorter) prefix length, that contains the network
+
+    :param network: network or address with prefix length
+    :param new_prefix_length: prefix length of the supernet
+    :return: network string
+    """
+    try:
+        version, address, _, prefix_length, bits = _parse_network(network)
+        new_prefix_length = int(new_prefix_length)
+        if not 0 <= new_prefix_length <= prefix_length:
+            raise ValueError("invalid prefix length")
+
+        mask = ~((1 << (bits - new_prefix_length)) - 1)
+        return _format_address(version, address & mask, new_prefix_length)
+
+    except Exception:
+        return report_error(ERROR_INVALID_VALUE, "%s, %s" % (network, new_prefix_length))
+
+
+def in_subnet(address, network):
+    """
+    returns True, if the address (or network) is part of the given network (e.g. `{% if ip|in_subnet("10.0.0.0/8") %}`)
+
+    :param address: address or network string
+    :param network: network string
+    :return: boolean, False if the address or network is invalid (the error is reported to the render process)
+    """
+    try:
+        version, address_value, _, address_prefix_length, bits = _parse_network(address)
+        network_version, _, network_address, prefix_length, _ = _parse_network(network)
+
+    except Exception:
+        # the error marker can't be used as result, it is evaluated as True within conditions
+        report_error(ERROR_INVALID_VALUE, "%s, %s" % (address, network))
+        return False
+
+    if version != network_version or address_prefix_length < prefix_length:
+        return False
+
+    return address_value >> (bits - prefix_length) == network_address >> (bits - prefix_length)
+
+
+def _collapse(networks, bits):
+    """
+    remove shadowed networks and merge adjacent networks
+
+    :param networks: list of (network address, prefix length) tuples of the same IP version
+    :param bits: number of bits of the addresses
+    :return: sorted list of (network address, prefix length) tuples
+    """
+    result = []
+    for network, prefix_length in sorted(networks):
+        if result:
+            # the networks are sorted by address (shorter prefixes first), only the last network may contain it
+            last_network, last_prefix_length = result[-1]
+            if last_prefix_length <= prefix_length and \
+                    network >> (bits - last_prefix_length) == last_network >> (bits - last_prefix_length):
+                continue
+
+        result.append((network, prefix_length))
+
+        # merge the last two networks as long as they are the two halves of the same supernet
+        while len(result) >= 2:
+            (first, first_length), (second, second_length) = result[-2:]
+            size = 1 << (bits - first_length)
+            if first_length != second_length or first_length == 0 or first & size or first + size != second:
+                break
+
+            result[-2:] = [(first, first_length - 1)]
+
+    return result
+
+
+def aggregate_prefixes(prefixes, wildcard=False):
+    """
+    aggregate a list of IPv4 and IPv6 prefixes (e.g. for prefix lists and ACLs). Prefixes, that are part of another
+    prefix within the list, are removed and adjacent prefixes are merged into a shorter prefix, e.g.
+    `{{ ["10.0.0.0/24", "10.0.1.0/24", "10.0.1.128/25"]|aggregate_prefixes }}` will render to `["10.0.0.0/23"]`.
+
+    :param prefixes: list of prefixes (addresses without prefix length are host routes)
+    :param wildcard: return IPv4 prefixes in ACL format with wildcard mask (e.g. `10.0.0.0 0.0.1.255`)
+    :return: sorted list of prefixes (IPv4 first), invalid prefixes are returned as error codes at the beginning of
+             the list
+    """
+    if isinstance(prefixes, str):
+        prefixes = [prefixes]
+
+    errors = []
+    networks = {4: [], 6: []}
+    for prefix in prefixes:
+        try:
+            version, _, network, prefix_length, _ = _parse(prefix)
+            networks[version].append((network, prefix_length))
+
+        except Exception:
+            errors.append(report_error(ERROR_INVALID_VALUE, prefix))
+
+    result = errors
+    for version, bits in ((4, 32), (6, 128)):
+        for network, prefix_length in _collapse(networks[version], bits):
+            if wildcard and version == 4:
+                result.append("%s %s" % (_format_address(4, network),
+                                         _format_address(4, (1 << (bits - prefix_length)) - 1)))
+
+            else:
+                result.append(_format_address(version, network, prefix_length))
+
+    return result
+
+
+# translation table of valid_vlan_name (spaces and dashes are replaced, certain unwanted characters are removed)
+_VLAN_NAME_TRANSLATION = dict((ord(e), None) for e in ";,.#+*=?%$()[]")
+_VLAN_NAME_TRANSLATION.update({ord(" "): "_", ord("-"): "_"})
 
 
 def valid_vlan_name(vlan_name):
@@ -71,15 +318,50 @@ def valid_vlan_name(vlan_name):
     :param vlan_name:
     :return:
     """
-    invalid_chars = list(";,.#+*=?%$()[]")
+    if isinstance(vlan_name, bytes):
+        vlan_name = sanitize_rules.to_text(vlan_name)
+
+    return vlan_name.translate(_VLAN_NAME_TRANSLATION)
+
+
+def sanitize(value, kind, vendor=OS_CISCO_IOS):
+    """
+    sanitize a string using the rules of the vendor (allowed characters, maximum length and case), e.g.
+    `{{ "Data Network (Floor 1)"|sanitize("vlan_name") }}` will render to `Data_Network_Floor_1`
+
+    :param value: string, that should be sanitized
+    :param kind: kind of the string ('vlan_name', 'description' or 'hostname')
+    :param vendor: vendor string ('cisco_ios' or 'juniper_junos')
+    :return: sanitized string
+    """
+    try:
+        rule = sanitize_rules.get_rule(kind, vendor)
+
+    except KeyError:
+        return report_error(ERROR_PARAMETER, "no sanitization rule '%s' for '%s'" % (kind, vendor))
+
+    return rule(value)
+
+
+def sanitize_list(values, kind, vendor=OS_CISCO_IOS):
+    """
+    sanitize all strings of a list (see sanitize)
+
+    :param values: list of strings
+    :param kind: kind of the strings ('vlan_name', 'description' or 'hostname')
+    :param vendor: vendor string ('cisco_ios' or 'juniper_junos')
+    :return: list of sanitized strings
+    """
+    try:
+        rule = sanitize_rules.get_rule(kind, vendor)
 
-    clean_string = vlan_name.replace(" ", "_")
-    clean_string = clean_string.replace("-", "_")
-    clean_string = "".join(e for e in clean_string if e not in invalid_chars)
+    except KeyError:
+        return [report_error(ERROR_PARAMETER, "no sanitization rule '%s' for '%s'" % (kind, vendor))]
 
-    return clean_string
+    return [rule(value) for value in values]
 
 
+@cached_filter
 def convert_interface_name(interface_name, target_vendor=None):
     """
     used to convert an vendor specific interface name to another interface name of a different vendor
@@ -114,7 +396,7 @@ def convert_interface_name(interface_name, target_vendor=None):
         if re.match(CISCO_INTERFACE_PATTERN, interface_name, re.IGNORECASE):
             if OS_CISCO_IOS not in target_vendor:  # don't modify if the target vendor is the same
                 # cisco interface detected
-                logger.debug("Cisco interface string '%s' detected by convert_interface_name" % interface_name)
+                logger.debug("Cisco interface string '%s' detected by convert_interface_name", interface_name)
 
                 if OS_JUNIPER_JUNOS in target_vendor.lower():
                     # juniper port numbering starts with 0
@@ -125,7 +407,7 @@ def convert_interface_name(interface_name, target_vendor=None):
         elif re.match(JUNIPER_INTERFACE_PATTERN, interface_name, re.IGNORECASE):
             if OS_JUNIPER_JUNOS not in target_vendor:  # don't modify if the target vendor is the same
                 # juniper interface detected
-                logger.debug("Juniper interface string '%s' detected by convert_interface_name" % interface_name)
+                logger.debug("Juniper interface string '%s' detected by convert_interface_name", interface_name)
 
                 if OS_CISCO_IOS in target_vendor.lower():
                     intf, chassis, module, port = get_interface_components(interface_name, JUNIPER_INTERFACE_PATTERN)
@@ -143,7 +425,7 @@ def convert_interface_name(interface_name, target_vendor=None):
 
         logger.error(msg)
         logger.debug(msg, exc_info=True)
-        return ERROR_UNKNOWN
+        return report_error(ERROR_UNKNOWN)
 
 
 def expand_vlan_list(vlan_list):
@@ -160,7 +442,7 @@ def expand_vlan_list(vlan_list):
 
     if re_result is None:
         # if the list is invalid, return a list with a single error entry
-        result.append("%s(%s)" % (ERROR_INVALID_VLAN_RANGE, vlan_list))
+        result.append(report_error(ERROR_INVALID_VLAN_RANGE, vlan_list))
 
     else:
         # extract values and check range
@@ -168,7 +450,7 @@ def expand_vlan_list(vlan_list):
         val_a = int(elements[0])
         val_b = int(elements[1])
         if val_a >= val_b:
-            result.append("%s(%s)" % (ERROR_INVALID_VLAN_RANGE, vlan_list))
+            result.append(report_error(ERROR_INVALID_VLAN_RANGE, vlan_list))
 
         else:
             # valid parameter, create vlan list
@@ -177,6 +459,7 @@ def expand_vlan_list(vlan_list):
     return result
 
 
+@cached_filter
 def split_interface(interface_regex, value):
     """
     convert an interface based on the given regular expression to a dictionary with all components, e.g.
@@ -203,16 +486,16 @@ def split_interface(interface_regex, value):
     :return: dictionary with three possible 
     """
     if type(interface_regex) is not str:
-        return {"error": "%s(%s)" % (ERROR_PARAMETER, "invalid type for 'interface_regex'")}
+        return {"error": report_error(ERROR_PARAMETER, "invalid type for 'interface_regex'")}
 
     if type(value) is not str:
-        return {"error": "%s(%s)" % (ERROR_PARAMETER, "invalid type for 'value'")}
+        return {"error": report_error(ERROR_PARAMETER, "invalid type for 'value'")}
 
     try:
         pattern = re.compile(interface_regex, re.IGNORECASE)
 
     except Exception as ex:
-        return {"error": "%s(%s)" % (ERROR_REGEX, str(ex))}
+        return {"error": report_error(ERROR_REGEX, str(ex))}
 
     match = pattern.match(value)
 
@@ -237,7 +520,7 @@ def split_interface(interface_regex, value):
 
     else:
         # no match, return error message
-        result = {"error": "%s(pattern '%s' for '%s')" % (ERROR_NO_MATCH, interface_regex, value)}
+        result = {"error": report_error(ERROR_NO_MATCH, "pattern '%s' for '%s'" % (interface_regex, value))}
 
     return result
 
@@ -248,3 +531,101 @@ def split_interface_cisco_ios(value):
 
 def split_interface_juniper_junos(value):
     return split_interface(".*%s.*" % JUNIPER_INTERFACE_PATTERN, value)
+
+
+_interface_range_pattern = re.compile(INTERFACE_RANGE_PATTERN)
+
+# maximum number of interfaces, that are returned by expand_interface_range (see MAX_SUBNETS)
+MAX_INTERFACES = 65536
+_digits_pattern = re.compile(r"(\d+)")
+
+
+def _natural_sort_key(value):
+    return tuple(int(e) if e.isdigit() else e.lower() for e in _digits_pattern.split(value))
+
+
+def expand_interface_range(interface_range):
+    """
+    converts an interface range to a list of interface names, e.g. `{{ "Gi1/0/1-3, Gi1/0/10"|expand_interface_range }}`
+    will render to `["Gi1/0/1", "Gi1/0/2", "Gi1/0/3", "Gi1/0/10"]` (also for Juniper, e.g. `ge-0/0/0-47`)
+
+    At most `MAX_INTERFACES` interfaces are returned (an error is reported for the ranges that exceed the limit).
+
+    :param interface_range: comma separated list of interfaces or interface ranges (or a list)
+    :return: list of interface names (or a list with an error entry, if a range is invalid)
+    """
+    if isinstance(interface_range, str):
+        interface_range = interface_range.split(",")
+
+    result = []
+    for value in interface_range:
+        value = str(value).strip()
+        match = _interface_range_pattern.match(value)
+        if not match or not match.group("prefix"):
+            result.append(report_error(ERROR_INVALID_VALUE, value))
+            continue
+
+        prefix = match.group("prefix")
+        start = int(match.group("start"))
+        end = int(match.group("end")) if match.group("end") is not None else start
+        if start > end or len(result) + end - start + 1 > MAX_INTERFACES:
+            result.append(report_error(ERROR_INVALID_VALUE, value))
+            continue
+
+        result.extend("%s%d" % (prefix, port) for port in range(start, end + 1))
+
+    return result
+
+
+def compress_interface_range(interfaces, target_vendor=None):
+    """
+    converts a list of interface names to a sorted list of interface ranges (duplicates are removed), e.g.
+    `{{ ["Gi1/0/2", "Gi1/0/1", "Gi1/0/3", "Gi1/0/10"]|compress_interface_range|join(", ") }}` will render to
+    `Gi1/0/1 - 3, Gi1/0/10` (Cisco IOS `interface range` syntax) or with the target vendor `juniper_junos` to
+    `ge-0/0/0 to ge-0/0/47` (`member-range` syntax). The prefixes are compared case-insensitive (e.g. `gi1/0/1` and
+    `Gi1/0/2` are merged), the ranges use the spelling of the first occurrence.
+
+    :param interfaces: list of interface names
+    :param target_vendor: syntax of the ranges ('cisco_ios' or 'juniper_junos'), default is 'cisco_ios'
+    :return: list of interface ranges
+    """
+    if target_vendor is None:
+        target_vendor = OS_CISCO_IOS
+
+    if isinstance(interfaces, str):
+        interfaces = interfaces.split(",")
+
+    errors = []
+    ports = dict()
+    prefixes = dict()
+    for value in interfaces:
+        value = str(value).strip()
+        match = _interface_range_pattern.match(value)
+        if not match or not match.group("prefix") or match.group("end") is not None:
+            errors.append(report_error(ERROR_INVALID_VALUE, value))
+            continue
+
+        prefix = prefixes.setdefault(match.group("prefix").lower(), match.group("prefix"))
+        ports.setdefault(prefix, set()).add(int(match.group("start")))
+
+    result = errors
+    for prefix in sorted(ports.keys(), key=_natural_sort_key):
+        sorted_ports = sorted(ports[prefix])
+        start = previous = sorted_ports[0]
+        for port in sorted_ports[1:] + [None]:
+            if port is not None and port == previous + 1:
+                previous = port
+                continue
+
+            if start == previous:
+                result.append("%s%d" % (prefix, start))
+
+            elif OS_JUNIPER_JUNOS in target_vendor:
+                result.append("%s%d to %s%d" % (prefix, start, prefix, previous))
+
+            else:
+                result.append("%s%d - %d" % (prefix, start, previous))
+
+            start = previous = port
+
+    return result
@@ -0,0 +1,256 @@
+"""
+Compare rendered configurations with a previous version (e.g. the golden configuration of a device)
+
+The configurations are split into hierarchical configuration blocks (IOS-style indentation), a block consists of a
+line without indentation and all following indented lines, e.g.
+
+    interface GigabitEthernet0/1
+     description uplink
+     switchport mode trunk
+
+The blocks are indexed by their first line (hash table lookup), therefore only blocks with the same header are
+compared and the line level comparison is only required for the blocks that are changed. Within a changed block, the
+lines are compared level by level (nested blocks, e.g. an address family within a BGP configuration, are compared
+recursively) using an order-preserving diff, therefore reordered lines (e.g. within an ACL) and duplicate lines are
+detected.
+"""
+import difflib
+import hashlib
+
+
+def config_hash(config):
+    """
+    returns the SHA256 hex digest of a configuration string
+    """
+    return hashlib.sha256(config.encode("utf-8")).hexdigest()
+
+
+def _is_ignored_line(line):
+    stripped = line.strip()
+    return stripped == "" or stripped == "!"
+
+
+def split_config_blocks(config):
+    """
+    split a configuration into hierarchical blocks (empty lines and lines that only contain a `!` are ignored)
+
+    :param config: configuration string
+    :return: list of blocks (every block is a list of lines, the first line is the header of the block)
+    """
+    blocks = []
+    current_block = None
+    for line in config.splitlines():
+        if _is_ignored_line(line):
+            continue
+
+        line = line.rstrip()
+        if current_block is None or not line[0].isspace():
+            current_block = [line]
+            blocks.append(current_block)
+
+        else:
+            current_block.append(line)
+
+    return blocks
+
+
+def _indentation(line):
+    return len(line) - len(line.lstrip())
+
+
+def _build_tree(lines):
+    """
+    returns the hierarchy of the lines based on their indentation (list of (line, children) tuples)
+    """
+    root = []
+    # (indentation, children) of the open parent lines
+    stack = [(-1, root)]
+    for line in lines:
+        indentation = _indentation(line)
+        while indentation <= stack[-1][0]:
+            stack.pop()
+
+        node = (line, [])
+        stack[-1][1].append(node)
+        stack.append((indentation, node[1]))
+
+    return root
+
+
+def _flatten(node):
+    lines = [node[0]]
+    for child in node[1]:
+        lines.extend(_flatten(child))
+
+    return lines
+
+
+def _diff_tree(old_nodes, new_nodes, path, changes):
+    """
+    compare the nodes of the same level in order and the children of matching nodes recursively
+    """
+    matcher = difflib.SequenceMatcher(None, [e[0] for e in old_nodes], [e[0] for e in new_nodes], autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            for old_node, new_node in zip(old_nodes[i1:i2], new_nodes[j1:j2]):
+                if old_node[1] != new_node[1]:
+                    _diff_tree(old_node[1], new_node[1], path + (old_node[0],), changes)
+
+            continue
+
+        for node in old_nodes[i1:i2]:
+            changes.extend(("-", path, line) for line in _flatten(node))
+
+        for node in new_nodes[j1:j2]:
+            changes.extend(("+", path, line) for line in _flatten(node))
+
+
+def _index_blocks(blocks):
+    """
+    index the blocks by their header line (and occurrence, if the same header is used multiple times)
+    """
+    index = dict()
+    occurrences = dict()
+    for block in blocks:
+        occurrence = occurrences.get(block[0], 0)
+        occurrences[block[0]] = occurrence + 1
+        index[(block[0], occurrence)] = block
+
+    return index
+
+
+class ConfigBlockDiff(object):
+    """
+    a configuration block that is different between two configurations
+    """
+    header = None
+    old_lines = None
+    new_lines = None
+
+    def __init__(self, header, old_lines=None, new_lines=None):
+        self.header = header
+        self.old_lines = old_lines
+        self.new_lines = new_lines
+        self._changes = None
+
+    @property
+    def changes(self):
+        """
+        list of the changed lines in the order of the configuration, every change is a tuple with the operation
+        ("+" or "-"), the path (tuple with the headers of the parent blocks) and the line
+        """
+        if self._changes is None:
+            changes = []
+            if self.old_lines is None or self.new_lines is None:
+                operation, lines = ("+", self.new_lines) if self.old_lines is None else ("-", self.old_lines)
+                changes.extend((operation, (), line) for line in lines)
+
+            else:
+                _diff_tree(_build_tree(self.old_lines[1:]), _build_tree(self.new_lines[1:]), (self.header,), changes)
+
+            self._changes = changes
+
+        return self._changes
+
+    @property
+    def added_lines(self):
+        """
+        lines within the block, that are only part of the new configuration (or at another position)
+        """
+        return [line for operation, _, line in self.changes if operation == "+"]
+
+    @property
+    def removed_lines(self):
+        """
+        lines within the block, that are only part of the old configuration (or at another position)
+        """
+        return [line for operation, _, line in self.changes if operation == "-"]
+
+    def to_json(self):
+        return {
+            "header": self.header,
+            "added_lines": self.added_lines,
+            "removed_lines": self.removed_lines
+        }
+
+
+class ConfigDiff(object):
+    """
+    result of the comparison of two configurations
+    """
+    added = None
+    removed = None
+    modified = None
+
+    def __init__(self, added=None, removed=None, modified=None):
+        self.added = added or []
+        self.removed = removed or []
+        self.modified = modified or []
+
+    @property
+    def changed(self):
+        """
+        True, if the configurations are different
+        """
+        return bool(self.added or self.removed or self.modified)
+
+    def to_json(self):
+        return {
+            "changed": self.changed,
+            "added": [e.to_json() for e in self.added],
+            "removed": [e.to_json() for e in self.removed],
+            "modified": [e.to_json() for e in self.modified]
+        }
+
+    def __str__(self):
+        """
+        returns the changed blocks with the added (+) and removed (-) lines
+        """
+        lines = []
+        for block in self.removed:
+            lines.extend("- %s" % line for line in block.old_lines)
+
+        for block in self.added:
+            lines.extend("+ %s" % line for line in block.new_lines)
+
+        for block in self.modified:
+            context = ()
+            for operation, path, line in block.changes:
+                # add the headers of the parent blocks, that are not shown yet
+                common = 0
+                while common < min(len(path), len(context)) and path[common] == context[common]:
+                    common += 1
+
+                lines.extend("  %s" % header for header in path[common:])
+                context = path
+                lines.append("%s %s" % (operation, line))
+
+        return "\n".join(lines)
+
+
+def diff_config(old_config, new_config):
+    """
+    compare two configurations block by block (see split_config_blocks)
+
+    :param old_config: previous configuration string (e.g. the golden configuration)
+    :param new_config: new configuration string
+    :return: ConfigDiff instance
+    """
+    if old_config == new_config:
+        return ConfigDiff()
+
+    old_index = _index_blocks(split_config_blocks(old_config))
+    new_index = _index_blocks(split_config_blocks(new_config))
+
+    added = []
+    modified = []
+    for key, block in new_index.items():
+        if key not in old_index:
+            added.append(ConfigBlockDiff(block[0], new_lines=block))
+
+        elif old_index[key] != block:
+            modified.append(ConfigBlockDiff(block[0], old_lines=old_index[key], new_lines=block))
+
+    removed = [ConfigBlockDiff(block[0], old_lines=block) for key, block in old_index.items() if key not in new_index]
+
+    return ConfigDiff(added=added, removed=removed, modified=modified)
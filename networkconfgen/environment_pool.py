@@ -0,0 +1,141 @@
+"""
+Process-wide pool of Jinja2 environments
+
+Every NetworkConfGen instance creates a new Jinja2 environment with its own cache of compiled templates. If many
+instances with the same configuration (delimiters, searchpath, etc.) are created (e.g. one instance per tenant and
+request), the templates are parsed and compiled again for every instance. With the `shared_environment` argument, the
+instances with identical configurations share a single environment (and therefore the compiled templates) from the
+`DEFAULT_POOL`.
+
+An environment is in use as long as a NetworkConfGen instance references it. Idle environments are kept for later
+instances, the least recently used idle environments are evicted if more than `max_idle` idle environments exist.
+"""
+import functools
+import threading
+import weakref
+from collections import OrderedDict
+
+
+class EnvironmentPool(object):
+    """
+    pool of Jinja2 environments, identified by a hashable key (the configuration of the environment)
+    """
+    max_idle = 16
+
+    def __init__(self, max_idle=16):
+        """
+        :param max_idle: maximum number of idle environments, that are kept within the pool
+        """
+        if max_idle < 0:
+            raise AttributeError("max_idle must not be negative")
+
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        # key => [environment, number of references], ordered by the last use
+        self._environments = OrderedDict()
+        # weak references of the objects, that use an environment (see release_on_delete)
+        self._references = set()
+        # keys of the deleted objects, that are released on the next call
+        self._pending_releases = []
+
+    def __len__(self):
+        with self._lock:
+            self._process_pending_releases()
+            return len(self._environments)
+
+    def __contains__(self, key):
+        with self._lock:
+            self._process_pending_releases()
+            return key in self._environments
+
+    def _touch(self, key):
+        # move the key to the end (most recently used)
+        self._environments[key] = self._environments.pop(key)
+
+    def acquire(self, key, factory):
+        """
+        returns the environment of the given key, the environment is created using the factory function if it isn't
+        part of the pool. Every call must be followed by a call of `release` if the environment is no longer used.
+
+        :param key: hashable configuration of the environment
+        :param factory: function without arguments, that returns a new environment
+        :return: Jinja2 environment
+        """
+        with self._lock:
+            self._process_pending_releases()
+            entry = self._environments.get(key)
+            if entry is None:
+                entry = self._environments[key] = [factory(), 0]
+
+            else:
+                self._touch(key)
+
+            entry[1] += 1
+            return entry[0]
+
+    def release(self, key):
+        """
+        release a reference to the environment of the given key (the environment is idle if no references are left)
+        """
+        with self._lock:
+            self._process_pending_releases()
+            self._release(key)
+
+    def _release(self, key):
+        entry = self._environments.get(key)
+        if entry is None:
+            return
+
+        entry[1] -= 1
+        if entry[1] <= 0:
+            entry[1] = 0
+            self._touch(key)
+            self._evict()
+
+    def release_on_delete(self, obj, key):
+        """
+        release the environment of the given key if the object is deleted
+
+        :param obj: object, that uses the environment (e.g. a NetworkConfGen instance)
+        :param key: key of the environment
+        :return: function to release the environment before the object is deleted
+        """
+        def deleted(reference):
+            # called by the garbage collector, the lock may be held by the current thread, therefore the environment
+            # is released on the next call of the pool
+            if reference in self._references:
+                self._references.discard(reference)
+                self._pending_releases.append(key)
+
+        reference = weakref.ref(obj, deleted)
+        self._references.add(reference)
+        return functools.partial(deleted, reference)
+
+    def _process_pending_releases(self):
+        while self._pending_releases:
+            self._release(self._pending_releases.pop())
+
+    def _evict(self):
+        idle_keys = [key for key, entry in self._environments.items() if entry[1] == 0]
+        for key in idle_keys[:max(len(idle_keys) - self.max_idle, 0)]:
+            del self._environments[key]
+
+    def idle(self):
+        """
+        returns the number of idle environments
+        """
+        with self._lock:
+            self._process_pending_releases()
+            return len([entry for entry in self._environments.values() if entry[1] == 0])
+
+    def clear(self):
+        """
+        remove all idle environments from the pool
+        """
+        with self._lock:
+            self._process_pending_releases()
+            for key in [key for key, entry in self._environments.items() if entry[1] == 0]:
+                del self._environments[key]
+
+
+DEFAULT_POOL = EnvironmentPool()
@@ -0,0 +1,143 @@
+"""
+Error logging for large batches, where many render processes fail with the same error (e.g. a missing variable)
+
+The `RateLimitedErrorLog` logs the errors with the same signature (template and error text) only a few times per
+interval, the number of suppressed errors is added to the next message of the signature. The `ErrorReport` aggregates
+the errors of a batch (number of occurrences and some example devices per signature).
+"""
+import logging
+import threading
+import time
+
+
+class RateLimitedErrorLog(object):
+    """
+    logs errors with the same signature at most `burst` times per `interval` seconds (all errors are logged if the
+    debug level of the logger is enabled)
+    """
+    burst = 5
+    interval = 60.0
+    max_signatures = 10000
+
+    def __init__(self, logger, burst=5, interval=60.0, max_signatures=10000):
+        self.burst = burst
+        self.interval = interval
+        self.max_signatures = max_signatures
+        self._logger = logger
+        self._lock = threading.Lock()
+        # signature => [start of the interval, logged messages, suppressed messages]
+        self._signatures = dict()
+
+    def error(self, signature, message, exc_info=False):
+        """
+        log an error message (must be called within the except clause to add the traceback)
+
+        :param signature: hashable signature of the error (e.g. a tuple with the template name and the error text)
+        :param message: error message
+        :param exc_info: add the traceback of the current exception
+        :return: True, if the message was logged
+        """
+        if not self._logger.isEnabledFor(logging.ERROR):
+            return False
+
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.error(message, exc_info=exc_info)
+            return True
+
+        now = time.time()
+        suppressed = 0
+        with self._lock:
+            state = self._signatures.get(signature)
+            if state is None or now - state[0] >= self.interval:
+                if state is not None:
+                    suppressed = state[2]
+
+                elif len(self._signatures) >= self.max_signatures:
+                    self._signatures.clear()
+
+                state = [now, 0, 0]
+                self._signatures[signature] = state
+
+            if state[1] >= self.burst:
+                state[2] += 1
+                return False
+
+            state[1] += 1
+            if state[1] == self.burst:
+                message = "%s (further errors of this kind are suppressed for %d seconds)" % (message, self.interval)
+
+        if suppressed:
+            self._logger.error("%s (%d similar errors suppressed)", message, suppressed, exc_info=exc_info)
+
+        else:
+            self._logger.error(message, exc_info=exc_info)
+
+        return True
+
+
+class ErrorReport(object):
+    """
+    aggregated render errors of a batch (see `NetworkConfGen.render_batch`)
+    """
+    max_examples = 5
+    total = 0
+    results = 0
+
+    def __init__(self, max_examples=5):
+        """
+        :param max_examples: maximum number of example keys (e.g. device IDs or parameter store keys) per error
+        """
+        self.max_examples = max_examples
+        self.total = 0
+        self.results = 0
+        self._errors = dict()
+
+    def add(self, result, key=None):
+        """
+        add a result to the report (results without render error are only counted)
+
+        :param result: NetworkConfGenResult instance
+        :param key: key of the result (e.g. the device ID), added to the examples of the error
+        """
+        self.results += 1
+        if not result.render_error:
+            return
+
+        self.total += 1
+        signature = (result.template_file_name, result.error_text)
+        entry = self._errors.get(signature)
+        if entry is None:
+            entry = self._errors[signature] = {
+                "template_file_name": result.template_file_name,
+                "error_text": result.error_text,
+                "count": 0,
+                "examples": []
+            }
+
+        entry["count"] += 1
+        if key is not None and len(entry["examples"]) < self.max_examples:
+            entry["examples"].append(key)
+
+    @property
+    def errors(self):
+        """
+        list of the errors (sorted by the number of occurrences)
+        """
+        return sorted(self._errors.values(), key=lambda e: e["count"], reverse=True)
+
+    def to_json(self):
+        return {
+            "results": self.results,
+            "total": self.total,
+            "errors": self.errors
+        }
+
+    def __str__(self):
+        lines = ["%d of %d results with render errors" % (self.total, self.results)]
+        for entry in self.errors:
+            lines.append("%6d  %s: %s" % (entry["count"], entry["template_file_name"] or "<string>",
+                                          entry["error_text"]))
+            if entry["examples"]:
+                lines.append("        e.g. %s" % ", ".join(str(e) for e in entry["examples"]))
+
+        return "\n".join(lines)
@@ -0,0 +1,136 @@
+"""
+Canonical hashing of parameter structures (e.g. to build cache keys for rendered templates)
+"""
+import hashlib
+
+try:
+    from collections.abc import Mapping, Set
+
+except ImportError:  # pragma: no cover (python 2.7)
+    from collections import Mapping, Set
+
+try:
+    # python 2.7, byte strings are handled like unicode strings (e.g. "sw1" == u"sw1" and both are used as text)
+    _TEXT_TYPES = (unicode, str)
+    _INTEGER_TYPES = (int, long)
+
+except NameError:
+    _TEXT_TYPES = (str,)
+    _INTEGER_TYPES = (int,)
+
+# type tags, that are added to the hash stream to distinguish values with the same representation (e.g. 1, "1" and 1.0)
+_TAG_NONE = b"N"
+_TAG_TRUE = b"T"
+_TAG_FALSE = b"F"
+_TAG_INT = b"i"
+_TAG_FLOAT = b"f"
+_TAG_STR = b"s"
+_TAG_BYTES = b"b"
+_TAG_LIST = b"l"
+_TAG_DICT = b"d"
+_TAG_SET = b"e"
+
+
+def _encode_scalar(value):
+    """
+    returns the canonical, self-delimiting byte representation of a scalar value or None if the value is not a scalar
+    """
+    if value is None:
+        return _TAG_NONE
+
+    if value is True:
+        return _TAG_TRUE
+
+    if value is False:
+        return _TAG_FALSE
+
+    if isinstance(value, _TEXT_TYPES):
+        data = value if isinstance(value, bytes) else value.encode("utf-8")
+        return _TAG_STR + str(len(data)).encode("ascii") + b":" + data
+
+    if isinstance(value, _INTEGER_TYPES):
+        data = str(value).encode("ascii")
+        return _TAG_INT + str(len(data)).encode("ascii") + b":" + data
+
+    if isinstance(value, float):
+        data = repr(value).encode("ascii")
+        return _TAG_FLOAT + str(len(data)).encode("ascii") + b":" + data
+
+    if isinstance(value, (bytes, bytearray)):
+        return _TAG_BYTES + str(len(value)).encode("ascii") + b":" + bytes(value)
+
+    return None
+
+
+def _feed(update, value, algorithm):
+    """
+    feed the canonical representation of the given value to the update function of a hash object
+    """
+    encoded = _encode_scalar(value)
+    if encoded is not None:
+        update(encoded)
+
+    elif isinstance(value, Mapping):
+        # sort the entries by the canonical representation of the key (order independent, also for mixed key types)
+        entries = []
+        for key in value.keys():
+            encoded_key = _encode_scalar(key)
+            if encoded_key is None:
+                raise TypeError("unsupported key type for parameter digest: %s" % type(key).__name__)
+            entries.append((encoded_key, key))
+
+        entries.sort(key=lambda e: e[0])
+        update(_TAG_DICT + str(len(entries)).encode("ascii") + b":")
+        for encoded_key, key in entries:
+            update(encoded_key)
+            _feed(update, value[key], algorithm)
+
+    elif isinstance(value, (list, tuple)):
+        update(_TAG_LIST + str(len(value)).encode("ascii") + b":")
+        for element in value:
+            _feed(update, element, algorithm)
+
+    elif isinstance(value, Set):
+        # sets have no order, therefore the digest of each element is computed and sorted
+        element_digests = sorted(_digest(e, algorithm) for e in value)
+        update(_TAG_SET + str(len(element_digests)).encode("ascii") + b":")
+        for element_digest in element_digests:
+            update(element_digest)
+
+    else:
+        raise TypeError("unsupported type for parameter digest: %s" % type(value).__name__)
+
+
+def _digest(value, algorithm):
+    hash_object = hashlib.new(algorithm)
+    _feed(hash_object.update, value, algorithm)
+    return hash_object.digest()
+
+
+def parameter_digest(parameters, variables=None, algorithm="sha256"):
+    """
+    computes a canonical digest of a (nested) parameter structure in a single pass without creating an intermediate
+    string representation. The result doesn't depend on the order of the dictionary keys, e.g.
+
+        parameter_digest({"a": 1, "b": [1, 2]}) == parameter_digest({"b": [1, 2], "a": 1})
+
+    Supported values are dictionaries (and other mappings), lists, tuples, sets, strings, bytes, integers, floats,
+    booleans and None. Any other type raises a TypeError.
+
+    :param parameters: dictionary that contains all parameters
+    :param variables: optional list of top-level variable names, that should be part of the digest (e.g. the
+                      variables, that are referenced within a template), all other keys are ignored
+    :param algorithm: name of the hash algorithm (must be supported by hashlib)
+    :return: hex digest of the parameters
+    """
+    if not isinstance(parameters, Mapping):
+        raise AttributeError("parameters must be a dictionary")
+
+    if variables is not None:
+        variables = set(variables)
+        parameters = dict((key, value) for key, value in parameters.items() if key in variables)
+
+    hash_object = hashlib.new(algorithm)
+    _feed(hash_object.update, parameters, algorithm)
+
+    return hash_object.hexdigest()
@@ -0,0 +1,132 @@
+"""
+Layered parameters (e.g. global -> region -> site -> device), that are merged lazily on lookup
+
+Instead of deep merging the dictionaries of all layers for every device, a `LayeredParameters` instance resolves a
+lookup through the layers (the last layer takes precedence). Nested dictionaries, that exist in multiple layers, are
+merged in the same way (the result is again a `LayeredParameters` instance). All other values (including lists) of a
+higher layer replace the values of the lower layers. The layers are never copied or modified.
+
+The resolved values are cached per instance, therefore a shared instance for the common layers should be used for
+all devices, e.g.
+
+    site_parameters = LayeredParameters(global_parameters, region_parameters, site_parameters)
+
+    for device in devices:
+        parameters = add_layer(site_parameters, device)
+        confgen.render_from_file("access_switch.txt", parameters)
+
+The instances are read-only mappings, that can be passed directly as parameters to the `NetworkConfGen` class. Only
+the Mapping interface is implemented (like a dictionary), all other methods are provided as module functions because
+Jinja2 prefers attributes over items (e.g. `{{ site.name }}`).
+"""
+
+try:
+    from collections.abc import Mapping
+
+except ImportError:  # pragma: no cover (python 2.7)
+    from collections import Mapping
+
+_MISSING = object()
+
+
+def _create_view(layer, parent=None):
+    if not isinstance(layer, Mapping):
+        raise AttributeError("parameter layers must be dictionaries")
+
+    view = LayeredParameters.__new__(LayeredParameters)
+    view._layer = layer
+    view._parent = parent
+    view._cache = dict()
+    view._keys = None
+
+    return view
+
+
+class LayeredParameters(Mapping):
+    """
+    read-only view of multiple parameter layers (lowest precedence first), that are merged lazily on lookup
+    """
+    _layer = None
+    _parent = None
+    _cache = None
+    _keys = None
+
+    def __init__(self, *layers):
+        if not layers:
+            layers = (dict(),)
+
+        parent = None
+        for layer in layers[:-1]:
+            parent = _create_view(layer, parent)
+
+        view = _create_view(layers[-1], parent)
+        self.__dict__.update(view.__dict__)
+
+    def __getitem__(self, key):
+        value = self._cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        value = self._layer.get(key, _MISSING)
+        if value is _MISSING:
+            if self._parent is None:
+                raise KeyError(key)
+
+            # not part of this layer, the value is cached by the parent (shared between all child instances)
+            value = self._parent[key]
+
+        elif isinstance(value, Mapping) and self._parent is not None:
+            parent_value = self._parent.get(key, _MISSING)
+            if isinstance(parent_value, Mapping):
+                if not isinstance(parent_value, LayeredParameters):
+                    parent_value = _create_view(parent_value)
+
+                value = _create_view(value, parent_value)
+
+        self._cache[key] = value
+
+        return value
+
+    def __contains__(self, key):
+        return key in self._layer or (self._parent is not None and key in self._parent)
+
+    def __iter__(self):
+        if self._keys is None:
+            keys = list(self._parent) if self._parent is not None else []
+            keys.extend(key for key in self._layer if self._parent is None or key not in self._parent)
+            self._keys = keys
+
+        return iter(self._keys)
+
+    def __len__(self):
+        if self._keys is None:
+            iter(self)
+
+        return len(self._keys)
+
+    def __repr__(self):
+        return "LayeredParameters(%r)" % to_dict(self)
+
+
+def add_layer(parameters, layer):
+    """
+    returns a new LayeredParameters instance with an additional layer (with the highest precedence), the resolved
+    values of the given parameters are shared
+
+    :param parameters: LayeredParameters instance (or dictionary)
+    :param layer: dictionary with the parameters of the new layer
+    :return: LayeredParameters instance
+    """
+    if not isinstance(parameters, LayeredParameters):
+        parameters = _create_view(parameters)
+
+    return _create_view(layer, parameters)
+
+
+def to_dict(parameters):
+    """
+    returns a deep merged dictionary of the LayeredParameters instance (e.g. for serialization)
+    """
+    return dict(
+        (key, to_dict(value) if isinstance(value, LayeredParameters) else value) for key, value in parameters.items()
+    )
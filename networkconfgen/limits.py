@@ -0,0 +1,319 @@
+"""
+Resource limits for a single render process (wall-clock time, size of the output, number of loop iterations and
+allocated memory)
+
+The limits are checked cooperatively while the template is rendered: the elapsed time, the size of the output and the
+allocated memory are verified for every chunk of the output and on every loop iteration. A single, long-running filter
+call can't be interrupted.
+
+The memory is measured using `tracemalloc` (only the memory, that is allocated by Python, is traced, not available on
+python 2.7). Tracing slows down the render process and the measurement is process-wide, therefore the memory allocated
+by other threads (e.g. within the render server) is included while multiple render processes are active.
+"""
+import threading
+import time
+from jinja2.ext import Extension
+from jinja2.lexer import Token, TOKEN_BLOCK_BEGIN, TOKEN_BLOCK_END, TOKEN_LINESTATEMENT_BEGIN, \
+    TOKEN_LINESTATEMENT_END, TOKEN_LPAREN, TOKEN_RPAREN, TOKEN_LBRACKET, TOKEN_RBRACKET, TOKEN_LBRACE, \
+    TOKEN_RBRACE, TOKEN_NAME, TOKEN_PIPE, TOKEN_DOT
+from networkconfgen import render_context
+
+try:
+    import tracemalloc
+
+except ImportError:  # pragma: no cover (python 2.7)
+    tracemalloc = None
+
+LIMIT_LOOP_FILTER = "_limit_loop"
+
+# active MemoryTracker instances of the process
+_trackers_lock = threading.Lock()
+_active_trackers = set()
+_stop_tracing = False
+
+
+class RenderLimitExceeded(Exception):
+    """
+    raised if a render process exceeds one of its limits
+    """
+    pass
+
+
+class MemoryLimitExceeded(RenderLimitExceeded):
+    """
+    raised if a render process exceeds its memory limit
+    """
+    pass
+
+
+class MemoryTracker(object):
+    """
+    measures the memory, that is allocated during a render process (using tracemalloc). Multiple trackers may be active
+    at the same time (e.g. within the threads of the render server): tracing is started by the first and stopped by the
+    last active tracker. The peak allocation of tracemalloc is process-wide, therefore it is only used if no other
+    render process was measured at the same time, otherwise the peak is the maximum of the values measured at the
+    check points (see `current`).
+    """
+    start_memory = 0
+    peak_memory = 0
+
+    def __init__(self):
+        if tracemalloc is None:  # pragma: no cover (python 2.7)
+            raise AttributeError("memory accounting requires the tracemalloc module (python 3.4 or later)")
+
+        self._exclusive = True
+
+    def start(self):
+        global _stop_tracing
+
+        with _trackers_lock:
+            if not _active_trackers:
+                if not tracemalloc.is_tracing():
+                    # tracing is only active during the render processes
+                    tracemalloc.start()
+                    _stop_tracing = True
+
+                if hasattr(tracemalloc, "reset_peak"):
+                    tracemalloc.reset_peak()
+
+            else:
+                # the process-wide peak can't be assigned to one of the concurrent render processes, the peak until
+                # now belongs to a tracker, that was active exclusively
+                for tracker in _active_trackers:
+                    tracker._update_peak()
+                    tracker._exclusive = False
+
+                self._exclusive = False
+
+            _active_trackers.add(self)
+            self.start_memory = tracemalloc.get_traced_memory()[0]
+            self.peak_memory = 0
+
+    def current(self):
+        """
+        returns the memory, that is currently allocated since the start of the render process (in bytes)
+        """
+        # memory, that was allocated before the start and is released by another thread, is not part of the result
+        memory = max(tracemalloc.get_traced_memory()[0] - self.start_memory, 0)
+        self.peak_memory = max(self.peak_memory, memory)
+        return memory
+
+    def _update_peak(self):
+        self.current()
+        if self._exclusive and hasattr(tracemalloc, "reset_peak"):
+            self.peak_memory = max(self.peak_memory, tracemalloc.get_traced_memory()[1] - self.start_memory)
+
+    def stop(self):
+        """
+        stop the measurement and return the peak memory allocation of the render process (in bytes)
+        """
+        global _stop_tracing
+
+        with _trackers_lock:
+            self._update_peak()
+            _active_trackers.discard(self)
+            if not _active_trackers and _stop_tracing:
+                tracemalloc.stop()
+                _stop_tracing = False
+
+        return self.peak_memory
+
+
+class RenderLimits(object):
+    """
+    limits of a single render process (None disables the limit)
+    """
+    timeout = None
+    max_output_bytes = None
+    max_loop_iterations = None
+    max_memory_bytes = None
+
+    def __init__(self, timeout=None, max_output_bytes=None, max_loop_iterations=None, max_memory_bytes=None):
+        """
+        :param timeout: maximum wall-clock time of the render process in seconds
+        :param max_output_bytes: maximum size of the rendered result in bytes (UTF-8 encoded)
+        :param max_loop_iterations: maximum number of loop iterations (sum of all loops within the template)
+        :param max_memory_bytes: maximum memory, that is allocated during the render process in bytes
+        """
+        for name, value in (("timeout", timeout), ("max_output_bytes", max_output_bytes),
+                            ("max_loop_iterations", max_loop_iterations), ("max_memory_bytes", max_memory_bytes)):
+            if value is not None and value <= 0:
+                raise AttributeError("%s must be a positive number" % name)
+
+        if max_memory_bytes is not None and tracemalloc is None:  # pragma: no cover (python 2.7)
+            raise AttributeError("max_memory_bytes requires the tracemalloc module (python 3.4 or later)")
+
+        self.timeout = timeout
+        self.max_output_bytes = max_output_bytes
+        self.max_loop_iterations = max_loop_iterations
+        self.max_memory_bytes = max_memory_bytes
+
+    def deadline(self):
+        """
+        returns the deadline of a render process, that starts now (None if no timeout is set)
+        """
+        if self.timeout is None:
+            return None
+
+        return time.time() + self.timeout
+
+
+def check_deadline(context):
+    if context.deadline is not None and time.time() > context.deadline:
+        raise RenderLimitExceeded("timeout of %s seconds exceeded" % context.render_limits.timeout)
+
+
+def check_limits(context):
+    """
+    verify the deadline and the memory limit of the render context
+    """
+    check_deadline(context)
+
+    max_memory_bytes = context.render_limits.max_memory_bytes
+    if max_memory_bytes is not None and context.memory_tracker is not None and \
+            context.memory_tracker.current() > max_memory_bytes:
+        raise MemoryLimitExceeded("maximum memory allocation of %d bytes exceeded" % max_memory_bytes)
+
+
+def _limited_loop(iterable, context):
+    max_loop_iterations = context.render_limits.max_loop_iterations
+    for element in iterable:
+        context.loop_iterations += 1
+        if max_loop_iterations is not None and context.loop_iterations > max_loop_iterations:
+            raise RenderLimitExceeded("maximum of %d loop iterations exceeded" % max_loop_iterations)
+
+        check_limits(context)
+        yield element
+
+
+def limit_loop(iterable):
+    """
+    filter, that is added to the iterable of every for loop (see LoopLimitExtension), returns the iterable unmodified
+    if no render limits are active
+    """
+    context = render_context.current()
+    if context is None or context.render_limits is None:
+        return iterable
+
+    return _limited_loop(iterable, context)
+
+
+class LoopLimitExtension(Extension):
+    """
+    Jinja2 extension, that adds the `_limit_loop` filter to the iterable of every for loop and to the argument of the
+    recursive calls within recursive loops, e.g.
+
+        {% for e in values if e %}  =>  {% for e in (values)|_limit_loop if e %}
+        {{ loop(e.children) }}      =>  {{ loop((e.children)|_limit_loop) }}
+
+    """
+    def __init__(self, environment):
+        super(LoopLimitExtension, self).__init__(environment)
+        environment.filters[LIMIT_LOOP_FILTER] = limit_loop
+
+    def filter_stream(self, stream):
+        tokens = [None, None]
+        in_target = False
+        in_iterable = False
+        in_for_tag = False
+        recursive = False
+        depth = 0
+        # recursive flags of the open for loops and the bracket depths of the open `loop(...)` calls
+        for_loops = []
+        loop_calls = []
+        bracket_depth = 0
+
+        for token in stream:
+            if in_target or in_iterable:
+                if token.type in (TOKEN_LPAREN, TOKEN_LBRACKET, TOKEN_LBRACE):
+                    depth += 1
+
+                elif token.type in (TOKEN_RPAREN, TOKEN_RBRACKET, TOKEN_RBRACE):
+                    depth -= 1
+
+            if in_target and depth == 0 and token.type == TOKEN_NAME and token.value == "in":
+                # end of the loop target, the iterable starts after the 'in' keyword
+                in_target = False
+                in_iterable = True
+                yield token
+                yield Token(token.lineno, TOKEN_LPAREN, "(")
+
+            elif in_iterable and depth == 0 and (token.type in (TOKEN_BLOCK_END, TOKEN_LINESTATEMENT_END) or
+                                                 (token.type == TOKEN_NAME and token.value in ("if", "recursive"))):
+                # end of the iterable
+                in_iterable = False
+                yield Token(token.lineno, TOKEN_RPAREN, ")")
+                yield Token(token.lineno, TOKEN_PIPE, "|")
+                yield Token(token.lineno, TOKEN_NAME, LIMIT_LOOP_FILTER)
+                yield token
+
+            elif token.type == TOKEN_LPAREN and any(for_loops) and tokens[1] is not None and \
+                    tokens[1].type == TOKEN_NAME and tokens[1].value == "loop" and \
+                    (tokens[0] is None or tokens[0].type != TOKEN_DOT):
+                # recursive call of a recursive loop, the argument is limited like the iterable of the loop
+                loop_calls.append(bracket_depth + 1)
+                yield token
+                yield Token(token.lineno, TOKEN_LPAREN, "(")
+
+            elif token.type == TOKEN_RPAREN and loop_calls and loop_calls[-1] == bracket_depth:
+                loop_calls.pop()
+                yield Token(token.lineno, TOKEN_RPAREN, ")")
+                yield Token(token.lineno, TOKEN_PIPE, "|")
+                yield Token(token.lineno, TOKEN_NAME, LIMIT_LOOP_FILTER)
+                yield token
+
+            else:
+                if token.type == TOKEN_NAME and token.value == "for" and tokens[1] is not None and \
+                        tokens[1].type in (TOKEN_BLOCK_BEGIN, TOKEN_LINESTATEMENT_BEGIN):
+                    in_target = True
+                    in_for_tag = True
+                    recursive = False
+                    depth = 0
+
+                elif token.type == TOKEN_NAME and token.value == "endfor" and for_loops and tokens[1] is not None and \
+                        tokens[1].type in (TOKEN_BLOCK_BEGIN, TOKEN_LINESTATEMENT_BEGIN):
+                    for_loops.pop()
+
+                yield token
+
+            if token.type in (TOKEN_LPAREN, TOKEN_LBRACKET, TOKEN_LBRACE):
+                bracket_depth += 1
+
+            elif token.type in (TOKEN_RPAREN, TOKEN_RBRACKET, TOKEN_RBRACE):
+                bracket_depth -= 1
+
+            if in_for_tag:
+                if token.type == TOKEN_NAME and token.value == "recursive":
+                    recursive = True
+
+                elif token.type in (TOKEN_BLOCK_END, TOKEN_LINESTATEMENT_END):
+                    in_for_tag = False
+                    for_loops.append(recursive)
+
+            tokens = [tokens[1], token]
+
+
+def render_with_limits(template, parameters, context):
+    """
+    render the template and verify the limits of the given render context (raises a RenderLimitExceeded exception if
+    a limit is exceeded), the render context must be active (see render_context.activate)
+
+    :param template: Jinja2 template
+    :param parameters: dictionary that contains all parameters
+    :param context: RenderContext instance with the render limits
+    :return: rendered result
+    """
+    max_output_bytes = context.render_limits.max_output_bytes
+    output_bytes = 0
+    chunks = []
+
+    for chunk in template.generate(parameters):
+        if max_output_bytes is not None:
+            output_bytes += len(chunk.encode("utf-8"))
+            if output_bytes > max_output_bytes:
+                raise RenderLimitExceeded("maximum output size of %d bytes exceeded" % max_output_bytes)
+
+        check_limits(context)
+        chunks.append(chunk)
+
+    return "".join(chunks)
@@ -0,0 +1,232 @@
+"""
+Content-addressable store for rendered configurations
+
+Many devices (e.g. access switches) are rendered to identical configurations. The store saves every configuration
+once, identified by its SHA256 hash (see `NetworkConfGenResult.template_result_hash`), and a small manifest per device
+that points to the content:
+
+    <path>/objects/<first two characters of the hash>/<hash>
+    <path>/manifests/<quoted device ID>.json
+
+In chunked mode, the configuration is split into its top-level blocks (e.g. an interface section), every block is
+stored once and the manifest contains the list of block hashes. Large sections, that are identical on many devices
+but within different configurations, are therefore only stored once.
+
+To check if the configuration of a device is changed, only the hash within the manifest is compared.
+"""
+import json
+import os
+import tempfile
+from networkconfgen.diff import config_hash
+
+try:
+    from urllib.parse import quote, unquote
+
+except ImportError:  # pragma: no cover (python 2.7)
+    from urllib import quote, unquote
+
+MANIFEST_EXTENSION = ".json"
+
+
+def _read_umask():
+    """
+    returns the umask of the process, the umask is read once when the module is imported, because `os.umask` changes
+    the umask of the entire process (files, that are created by other threads in the meantime, would be affected)
+    """
+    try:
+        # linux 4.7 or later, the umask isn't changed
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+
+    except (IOError, OSError, ValueError):
+        pass
+
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# default permissions of the written files
+FILE_MODE = 0o666 & ~_read_umask()
+
+
+def write_atomic(path, data):
+    """
+    write the data (bytes) to a temporary file within the same directory and rename it to the given path, therefore
+    the file is either missing or complete (also if the process is killed while writing)
+    """
+    directory = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+
+        # temporary files are only readable by the owner, use the default permissions instead
+        os.chmod(temp_path, FILE_MODE)
+        os.rename(temp_path, path)
+
+    except Exception:
+        os.unlink(temp_path)
+        raise
+
+
+def split_chunks(config):
+    """
+    split a configuration into its top-level blocks, a block starts with a line without indentation and contains all
+    following indented lines. In contrast to `diff.split_config_blocks`, all lines (including empty lines and line
+    endings) are part of the chunks, therefore the configuration is the concatenation of the chunks.
+
+    :param config: configuration string
+    :return: list of strings
+    """
+    chunks = []
+    current_chunk = []
+    for line in config.splitlines(True):
+        if current_chunk and line[:1] not in (" ", "\t", "\r", "\n"):
+            chunks.append("".join(current_chunk))
+            current_chunk = []
+
+        current_chunk.append(line)
+
+    if current_chunk:
+        chunks.append("".join(current_chunk))
+
+    return chunks
+
+
+class OutputStore(object):
+    """
+    content-addressable store for rendered configurations with a manifest per device
+    """
+    path = None
+    chunked = False
+
+    def __init__(self, path, chunked=False):
+        """
+        :param path: directory of the store (created if it doesn't exist)
+        :param chunked: deduplicate the top-level blocks of the configurations instead of the entire configurations
+        """
+        self.path = path
+        self.chunked = chunked
+        self._objects_path = os.path.join(path, "objects")
+        self._manifests_path = os.path.join(path, "manifests")
+
+        for directory in (self._objects_path, self._manifests_path):
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+
+    def _object_path(self, content_hash):
+        return os.path.join(self._objects_path, content_hash[:2], content_hash)
+
+    def _manifest_path(self, device_id):
+        return os.path.join(self._manifests_path, quote(str(device_id), safe="") + MANIFEST_EXTENSION)
+
+    def _put_object(self, content):
+        content_hash = config_hash(content)
+        path = self._object_path(content_hash)
+        if not os.path.exists(path):
+            directory = os.path.dirname(path)
+            if not os.path.isdir(directory):
+                try:
+                    os.makedirs(directory)
+
+                except OSError:
+                    # created by another process
+                    pass
+
+            write_atomic(path, content.encode("utf-8"))
+
+        return content_hash
+
+    def _get_object(self, content_hash):
+        with open(self._object_path(content_hash), "rb") as f:
+            return f.read().decode("utf-8")
+
+    def put(self, device_id, result):
+        """
+        store the result of a device (results with render errors are recorded within the manifest without content)
+
+        :param device_id: ID of the device
+        :param result: NetworkConfGenResult instance
+        :return: hash of the configuration (None if the result has a render error)
+        """
+        manifest = {
+            "device_id": str(device_id),
+            "template_file_name": result.template_file_name,
+            "error_text": result.error_text,
+            "hash": None
+        }
+
+        if not result.render_error:
+            manifest["hash"] = result.template_result_hash
+            if self.chunked:
+                manifest["chunks"] = [self._put_object(chunk) for chunk in split_chunks(result.template_result)]
+
+            else:
+                self._put_object(result.template_result)
+
+        write_atomic(self._manifest_path(device_id), json.dumps(manifest, sort_keys=True).encode("utf-8"))
+
+        return manifest["hash"]
+
+    def manifest(self, device_id):
+        """
+        returns the manifest of a device (None if the device is not part of the store)
+        """
+        try:
+            with open(self._manifest_path(device_id)) as f:
+                return json.load(f)
+
+        except (IOError, OSError):
+            return None
+
+    def get_hash(self, device_id):
+        """
+        returns the hash of the stored configuration of a device (None if not stored or the render process failed)
+        """
+        manifest = self.manifest(device_id)
+        return manifest["hash"] if manifest is not None else None
+
+    def get(self, device_id):
+        """
+        returns the stored configuration of a device (None if not stored or the render process failed)
+        """
+        manifest = self.manifest(device_id)
+        if manifest is None or manifest["hash"] is None:
+            return None
+
+        if "chunks" in manifest:
+            return "".join(self._get_object(chunk_hash) for chunk_hash in manifest["chunks"])
+
+        return self._get_object(manifest["hash"])
+
+    def changed(self, device_id, result):
+        """
+        returns True, if the given result (or hash) is different from the stored configuration of the device
+        """
+        content_hash = result if isinstance(result, str) or result is None else result.template_result_hash
+        return content_hash is None or self.get_hash(device_id) != content_hash
+
+    def devices(self):
+        """
+        returns the IDs of all devices within the store
+        """
+        return sorted(
+            unquote(name[:-len(MANIFEST_EXTENSION)]) for name in os.listdir(self._manifests_path)
+            if name.endswith(MANIFEST_EXTENSION)
+        )
+
+    def devices_by_hash(self):
+        """
+        returns a dictionary with the list of device IDs per configuration hash (e.g. to push identical
+        configurations once)
+        """
+        result = dict()
+        for device_id in self.devices():
+            content_hash = self.get_hash(device_id)
+            if content_hash is not None:
+                result.setdefault(content_hash, []).append(device_id)
+
+        return result
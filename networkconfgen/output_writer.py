@@ -0,0 +1,223 @@
+"""
+Write the results of large render runs to an output directory or a single archive
+
+The results are written by a background thread, therefore the render process isn't blocked by the disk I/O. Every
+file within an output directory is written atomically (temporary file and rename). An archive (tar or zip) is written
+to a temporary file, that is renamed when the writer is closed, therefore an incomplete archive is never visible
+under the target path.
+
+    with OutputWriter("configs.tar.gz", archive="tar", compression="gz") as writer:
+        for device_id, result in results:
+            writer.write("%s.txt" % device_id, result)
+"""
+import io
+import logging
+import os
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+from networkconfgen.output_store import write_atomic, FILE_MODE
+
+try:
+    import queue
+
+except ImportError:  # pragma: no cover (python 2.7)
+    import Queue as queue
+
+logger = logging.getLogger("networkconfgen")
+
+ARCHIVE_TAR = "tar"
+ARCHIVE_ZIP = "zip"
+
+# supported compression methods per archive type
+COMPRESSION_METHODS = {
+    ARCHIVE_TAR: (None, "gz", "bz2", "xz"),
+    ARCHIVE_ZIP: (None, "deflate"),
+}
+
+_CLOSE = object()
+
+
+def _valid_name(name):
+    if type(name) is not str or not name or os.path.isabs(name):
+        return False
+
+    return ".." not in name.replace("\\", "/").split("/")
+
+
+class OutputWriter(object):
+    """
+    writes the results of a render run within a background thread to an output directory or archive
+    """
+    target = None
+    archive = None
+    compression = None
+    written = 0
+    skipped = 0
+
+    def __init__(self, target, archive=None, compression=None, batch_size=64, queue_size=1024, write_errors=False):
+        """
+        :param target: path of the output directory (created if it doesn't exist) or the archive file
+        :param archive: archive type ('tar' or 'zip'), the results are written to a directory if not set
+        :param compression: compression method of the archive ('gz', 'bz2' or 'xz' for tar, 'deflate' for zip)
+        :param batch_size: maximum number of results, that are written at once by the background thread
+        :param queue_size: maximum number of pending results (the `write` method blocks if the queue is full)
+        :param write_errors: write the error text of results with render errors (skipped if not set)
+        """
+        if archive not in COMPRESSION_METHODS and archive is not None:
+            raise AttributeError("unsupported archive type '%s'" % archive)
+
+        if compression not in COMPRESSION_METHODS.get(archive, (None,)):
+            raise AttributeError("unsupported compression method '%s'" % compression)
+
+        self.target = target
+        self.archive = archive
+        self.compression = compression
+        self._batch_size = batch_size
+        self._write_errors = write_errors
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error = None
+        self._closed = False
+        self._temp_path = None
+        self._archive_file = None
+
+        if archive is None:
+            if not os.path.isdir(target):
+                os.makedirs(target)
+
+        else:
+            fd, self._temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(target)), prefix=".tmp-")
+            os.close(fd)
+            self._archive_file = self._open_archive(self._temp_path)
+
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _open_archive(self, path):
+        if self.archive == ARCHIVE_TAR:
+            return tarfile.open(path, "w:%s" % (self.compression or ""))
+
+        method = zipfile.ZIP_DEFLATED if self.compression else zipfile.ZIP_STORED
+        return zipfile.ZipFile(path, "w", method)
+
+    def _write_file(self, name, data):
+        if self.archive == ARCHIVE_TAR:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = time.time()
+            info.mode = 0o644
+            self._archive_file.addfile(info, io.BytesIO(data))
+
+        elif self.archive == ARCHIVE_ZIP:
+            self._archive_file.writestr(name, data)
+
+        else:
+            path = os.path.join(self.target, name)
+            directory = os.path.dirname(path)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+
+            write_atomic(path, data)
+
+    def _write_batch(self, batch):
+        for name, data in batch:
+            self._write_file(name, data)
+
+    def _run(self):
+        closed = False
+        while not closed:
+            batch = [self._queue.get()]
+            while len(batch) < self._batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+
+                except queue.Empty:
+                    break
+
+            if _CLOSE in batch:
+                batch.remove(_CLOSE)
+                closed = True
+
+            if self._error is not None:
+                # discard the remaining results after an error
+                continue
+
+            try:
+                self._write_batch(batch)
+
+            except Exception as ex:
+                logger.error("unable to write results to '%s'", self.target, exc_info=True)
+                self._error = ex
+
+    def _check_error(self):
+        if self._error is not None:
+            raise IOError("unable to write results to '%s' (%s)" % (self.target, self._error))
+
+    def write(self, name, result):
+        """
+        add a result to the write queue
+
+        :param name: relative path of the file within the output directory or archive (e.g. "site1/sw1.txt")
+        :param result: NetworkConfGenResult instance
+        """
+        if self._closed:
+            raise AttributeError("output writer is closed")
+
+        if not _valid_name(name):
+            raise AttributeError("invalid file name '%s'" % name)
+
+        self._check_error()
+
+        if result.render_error:
+            if not self._write_errors:
+                self.skipped += 1
+                return
+
+            content = result.error_text
+
+        else:
+            content = result.template_result
+
+        self._queue.put((name, content.encode("utf-8")))
+        self.written += 1
+
+    def write_all(self, results):
+        """
+        add all results of an iterable of (name, NetworkConfGenResult) tuples to the write queue
+        """
+        for name, result in results:
+            self.write(name, result)
+
+    def close(self, abort=False):
+        """
+        write the pending results and close the writer (the archive is moved to the target path)
+
+        :param abort: discard the archive (results within an output directory are not removed)
+        """
+        if self._closed:
+            return
+
+        self._closed = True
+        self._queue.put(_CLOSE)
+        self._thread.join()
+
+        if self._archive_file is not None:
+            self._archive_file.close()
+            if abort or self._error is not None:
+                os.unlink(self._temp_path)
+
+            else:
+                os.chmod(self._temp_path, FILE_MODE)
+                os.rename(self._temp_path, self.target)
+
+        if not abort:
+            self._check_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close(abort=exc_type is not None)
@@ -0,0 +1,117 @@
+"""
+Load parameters from JSON and YAML files
+
+The following file formats are supported (identified by the file extension):
+
+  * JSON (`.json`), a single document
+  * newline delimited JSON (`.ndjson`, `.jsonl`), one document (e.g. per device) per line
+  * YAML (`.yaml`, `.yml`), one or multiple documents (separated by `---`), requires the `pyyaml` library
+
+YAML files are loaded with the safe loader of the `pyyaml` library (the C implementation is used if available).
+"""
+import json
+import os
+
+try:
+    import yaml
+
+except ImportError:  # pragma: no cover
+    yaml = None
+
+FORMAT_JSON = "json"
+FORMAT_NDJSON = "ndjson"
+FORMAT_YAML = "yaml"
+
+FILE_EXTENSIONS = {
+    ".json": FORMAT_JSON,
+    ".ndjson": FORMAT_NDJSON,
+    ".jsonl": FORMAT_NDJSON,
+    ".yaml": FORMAT_YAML,
+    ".yml": FORMAT_YAML,
+}
+
+
+def _yaml_loader():
+    if yaml is None:
+        raise ImportError("pyyaml library required to load YAML parameters")
+
+    # prefer the C implementation of the safe loader (requires libyaml)
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def _file_format(path, file_format):
+    if file_format is not None:
+        if file_format not in FILE_EXTENSIONS.values():
+            raise AttributeError("unsupported file format '%s'" % file_format)
+
+        return file_format
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FILE_EXTENSIONS:
+        raise AttributeError("unable to identify the file format of '%s'" % path)
+
+    return FILE_EXTENSIONS[extension]
+
+
+def load_parameters(path, file_format=None):
+    """
+    load the parameters from a JSON or YAML file (must contain a single document)
+
+    :param path: path to the parameter file
+    :param file_format: file format ('json', 'ndjson' or 'yaml'), identified by the file extension if not set
+    :return: the content of the file
+    """
+    file_format = _file_format(path, file_format)
+
+    if file_format == FORMAT_NDJSON:
+        raise AttributeError("newline delimited JSON contains multiple documents, use iter_parameters instead")
+
+    with open(path) as f:
+        if file_format == FORMAT_JSON:
+            return json.load(f)
+
+        return yaml.load(f, Loader=_yaml_loader())
+
+
+def iter_parameters(path, file_format=None):
+    """
+    generator, that yields the documents within a parameter file one by one (e.g. one document per device), therefore
+    the entire file is never loaded into memory. Newline delimited JSON and multi-document YAML files are streamed,
+    a JSON document is loaded at once and the elements of the list (or the values of the dictionary) are yielded.
+
+    :param path: path to the parameter file
+    :param file_format: file format ('json', 'ndjson' or 'yaml'), identified by the file extension if not set
+    :return: generator of parameter documents
+    """
+    file_format = _file_format(path, file_format)
+
+    with open(path) as f:
+        if file_format == FORMAT_NDJSON:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+        elif file_format == FORMAT_YAML:
+            for document in yaml.load_all(f, Loader=_yaml_loader()):
+                if document is not None:
+                    yield document
+
+        else:
+            content = json.load(f)
+            for document in (content.values() if isinstance(content, dict) else content):
+                yield document
+
+
+def iter_render_jobs(path, file, file_format=None):
+    """
+    generator, that yields render jobs for `NetworkConfGen.render_batch` from a parameter file (see iter_parameters)
+
+    :param path: path to the parameter file
+    :param file: name of the template file within the searchpath or a function, that returns the name of the template
+                 file for the given parameters (e.g. based on the device type)
+    :param file_format: file format ('json', 'ndjson' or 'yaml'), identified by the file extension if not set
+    :return: generator of (file, parameters) tuples
+    """
+    for parameters in iter_parameters(path, file_format=file_format):
+        yield (file(parameters) if callable(file) else file), parameters
@@ -0,0 +1,155 @@
+"""
+Read-only parameter store, that is shared between multiple render processes
+
+The store is a single file, that contains the pickled parameters of every key (e.g. per device) and an optional shared
+parameter set (e.g. global and site data). It is memory-mapped by every process that opens it, therefore the
+parameters are not copied to every worker process and only the requested entries are deserialized.
+"""
+import mmap
+import os
+import pickle
+import struct
+
+STORE_MAGIC = b"NCGPS002"
+# magic, offset of the index, offset and length of the shared parameters (offset 0 if not set)
+_HEADER = struct.Struct(">8sQQQ")
+
+
+class ParameterStore(object):
+    """
+    memory-mapped, read-only parameter store (use `ParameterStore.create` to write a new store)
+    """
+    path = None
+    _file = None
+    _mmap = None
+    _index = None
+    _shared_entry = None
+    _shared = None
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size < _HEADER.size:
+                raise ValueError("'%s' is not a valid parameter store (file too short)" % path)
+
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, index_offset, shared_offset, shared_length = _HEADER.unpack_from(self._mmap, 0)
+            if magic != STORE_MAGIC:
+                raise ValueError("'%s' is not a valid parameter store" % path)
+
+            if not _HEADER.size <= index_offset < size or shared_offset + shared_length > index_offset:
+                raise ValueError("'%s' is not a valid parameter store (file truncated)" % path)
+
+            try:
+                self._index = pickle.loads(self._mmap[index_offset:])
+
+            except Exception:
+                raise ValueError("'%s' is not a valid parameter store (invalid index)" % path)
+
+        except Exception:
+            self.close()
+            raise
+
+        if shared_offset:
+            self._shared_entry = (shared_offset, shared_length)
+
+    @classmethod
+    def create(cls, path, parameters, shared=None):
+        """
+        write a new parameter store to the given path (entries are written one by one, therefore the parameters can
+        also be a generator)
+
+        :param path: path of the store file
+        :param parameters: dictionary or iterable of (key, parameters) tuples
+        :param shared: optional dictionary with parameters, that are shared between all keys (e.g. global data)
+        :return: ParameterStore instance
+        """
+        if isinstance(parameters, dict):
+            parameters = parameters.items()
+
+        index = dict()
+        shared_offset = shared_length = 0
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(STORE_MAGIC, 0, 0, 0))
+
+            if shared is not None:
+                # the shared parameters are not part of the index (any key can be used for the parameters)
+                data = pickle.dumps(shared, protocol=pickle.HIGHEST_PROTOCOL)
+                shared_offset, shared_length = f.tell(), len(data)
+                f.write(data)
+
+            for key, value in parameters:
+                data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+                index[key] = (f.tell(), len(data))
+                f.write(data)
+
+            index_offset = f.tell()
+            f.write(pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL))
+            f.seek(0)
+            f.write(_HEADER.pack(STORE_MAGIC, index_offset, shared_offset, shared_length))
+
+        return cls(path)
+
+    def _load(self, entry):
+        offset, length = entry
+        return pickle.loads(self._mmap[offset:offset + length])
+
+    @property
+    def shared(self):
+        """
+        parameters, that are shared between all keys (loaded once per process)
+        """
+        if self._shared is None:
+            self._shared = self._load(self._shared_entry) if self._shared_entry is not None else dict()
+
+        return self._shared
+
+    def get(self, key):
+        """
+        returns a new dictionary with the shared parameters and the parameters of the given key (the key parameters
+        take precedence)
+
+        :param key: key of the parameters (e.g. the device ID)
+        :return: dictionary with the parameters
+        """
+        entry = self._index.get(key)
+        if entry is None:
+            raise KeyError(key)
+
+        result = dict(self.shared)
+        result.update(self._load(entry))
+
+        return result
+
+    def keys(self):
+        return list(self._index.keys())
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __getitem__(self, key):
+        return self.get(key)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __reduce__(self):
+        # only the path is transferred to other processes, the store is opened again by the receiving process
+        return type(self), (os.path.abspath(self.path),)
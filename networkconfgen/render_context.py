@@ -0,0 +1,175 @@
+"""
+State of the render process, that is currently active within the thread (e.g. used by the custom filters and the
+render limits)
+"""
+import functools
+import threading
+from contextlib import contextmanager
+from networkconfgen.constants import ERROR_CODES
+
+_local = threading.local()
+
+# name of the error codes (e.g. "invalid_value" for "$$INVALID_VALUE$$")
+_ERROR_CODE_NAMES = dict((value, key) for key, value in ERROR_CODES["_ERROR_"].items())
+
+
+class RenderError(Exception):
+    """
+    error within a custom filter or the template logic, that aborts the render process in strict mode
+    """
+    error_code = None
+    detail = None
+
+    def __init__(self, error_code, detail=None):
+        self.error_code = error_code
+        self.detail = detail
+        super(RenderError, self).__init__(error_marker(error_code, detail))
+
+    @property
+    def error_name(self):
+        """
+        name of the error code (e.g. "invalid_value"), see constants.ERROR_CODES
+        """
+        return _ERROR_CODE_NAMES.get(self.error_code, "unknown")
+
+    def to_json(self):
+        return {
+            "error_code": self.error_code,
+            "error_name": self.error_name,
+            "detail": self.detail
+        }
+
+
+class RenderContext(object):
+    """
+    state of a single render process
+    """
+    render_limits = None
+    strict = False
+    deadline = None
+    loop_iterations = 0
+    errors = None
+    filter_cache = None
+    memory_tracker = None
+
+    def __init__(self, render_limits=None, strict=False, filter_cache=None):
+        self.render_limits = render_limits
+        self.strict = strict
+        self.loop_iterations = 0
+        self.errors = []
+        self.filter_cache = filter_cache
+
+        if render_limits is not None:
+            self.deadline = render_limits.deadline()
+
+
+def current():
+    """
+    returns the RenderContext of the current thread (None if no render process is active)
+    """
+    return getattr(_local, "context", None)
+
+
+@contextmanager
+def activate(context):
+    """
+    activate the given RenderContext within the current thread
+    """
+    previous_context = current()
+    _local.context = context
+    try:
+        yield context
+
+    finally:
+        _local.context = previous_context
+
+
+def error_marker(error_code, detail=None):
+    """
+    returns the string, that is added to the output to signal an error (e.g. `$$INVALID_VALUE$$(54)`)
+    """
+    if detail is None:
+        return error_code
+
+    return "%s(%s)" % (error_code, detail)
+
+
+def report_error(error_code, detail=None):
+    """
+    report an error of a custom filter to the active render process. The error is recorded and, in strict mode, a
+    RenderError is raised to abort the render process immediately. Otherwise the error marker is returned, that
+    should be added to the output.
+
+    :param error_code: one of the error codes from constants.ERROR_CODES
+    :param detail: optional detail message
+    :return: error marker string
+    """
+    context = current()
+    if context is not None:
+        error = RenderError(error_code, detail)
+        context.errors.append(error)
+        if context.strict:
+            raise error
+
+    return error_marker(error_code, detail)
+
+
+def cached_filter(func):
+    """
+    decorator for custom filters without side effects, the results are cached within the filter cache of the active
+    render context (e.g. shared between the templates of a fan-out render process). Results of calls, that report an
+    error, are not cached.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        context = current()
+        if context is None or context.filter_cache is None:
+            return func(*args, **kwargs)
+
+        key = (func.__name__, args, tuple(sorted(kwargs.items())))
+        try:
+            result = context.filter_cache[key]
+
+        except KeyError:
+            error_count = len(context.errors)
+            result = func(*args, **kwargs)
+            if len(context.errors) == error_count:
+                context.filter_cache[key] = result
+
+        except TypeError:
+            # unhashable arguments
+            return func(*args, **kwargs)
+
+        # the template may modify the result (e.g. using the `do` statement)
+        return dict(result) if isinstance(result, dict) else result
+
+    return wrapper
+
+
+class StrictErrorCode(object):
+    """
+    error code variable (`_ERROR_.*`) in strict mode, the render process is aborted if it's added to the output
+    """
+    def __init__(self, error_code):
+        self.error_code = error_code
+
+    def __str__(self):
+        return report_error(self.error_code)
+
+    def __eq__(self, other):
+        if isinstance(other, StrictErrorCode):
+            return self.error_code == other.error_code
+
+        return self.error_code == other
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.error_code)
+
+
+# error code variables, that are added to the parameters in strict mode
+STRICT_ERROR_CODES = {
+    "_ERROR_": dict((key, StrictErrorCode(value)) for key, value in ERROR_CODES["_ERROR_"].items())
+}
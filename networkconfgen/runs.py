@@ -0,0 +1,182 @@
+"""
+Sharded and resumable render runs for an entire fleet of devices
+
+The devices are partitioned deterministically into shards (based on the SHA256 digest of the device ID), therefore
+multiple machines can render the same fleet and each machine takes another shard, e.g. shard 2 of 4:
+
+    run = RenderRun(confgen, "journal_2.ndjson", shard=2, shard_count=4)
+    for device_id, result in run.run(jobs):
+        write_config(device_id, result.template_result)
+
+Every completed device is recorded within a checkpoint journal (newline delimited JSON) together with the hash of the
+rendered configuration. If a run is started again with the same journal (e.g. after a crash), all devices that are
+already completed are skipped. Devices with render errors are recorded but rendered again on the next run.
+"""
+import hashlib
+import json
+import logging
+import os
+from collections import deque
+
+logger = logging.getLogger("networkconfgen")
+
+
+def shard_of(device_id, shard_count):
+    """
+    returns the shard of a device (stable across processes, machines and Python versions)
+
+    :param device_id: ID of the device (converted to a string)
+    :param shard_count: number of shards
+    :return: shard index (0 to shard_count - 1)
+    """
+    digest = hashlib.sha256(str(device_id).encode("utf-8")).hexdigest()
+    return int(digest[:16], 16) % shard_count
+
+
+class RenderJournal(object):
+    """
+    append-only checkpoint journal of a render run (newline delimited JSON, one entry per rendered device)
+    """
+    path = None
+    completed = None
+    failed = None
+
+    def __init__(self, path):
+        self.path = path
+        self.completed = dict()
+        self.failed = dict()
+
+        if os.path.exists(path):
+            self._load()
+
+        self._file = open(path, "a")
+        if self._file.tell() > 0 and not self._ends_with_newline():
+            # last entry was truncated (e.g. crash while writing)
+            self._file.write("\n")
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _load(self):
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+
+                except ValueError:
+                    logger.warning("skip invalid entry in render journal '%s'", self.path)
+                    continue
+
+                if entry.get("error"):
+                    self.failed[entry["device_id"]] = entry["error"]
+
+                else:
+                    self.completed[entry["device_id"]] = entry["hash"]
+                    self.failed.pop(entry["device_id"], None)
+
+    def record(self, device_id, result):
+        """
+        add the result of a device to the journal (the entry is flushed immediately)
+
+        :param device_id: ID of the device (must be JSON serializable)
+        :param result: NetworkConfGenResult instance
+        """
+        entry = {"device_id": device_id, "file": result.template_file_name}
+        if result.render_error:
+            entry["error"] = result.error_text
+            self.failed[device_id] = result.error_text
+
+        else:
+            entry["hash"] = result.template_result_hash
+            self.completed[device_id] = entry["hash"]
+            self.failed.pop(device_id, None)
+
+        self._file.write(json.dumps(entry, sort_keys=True) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class RenderRun(object):
+    """
+    render run for a single shard of a fleet, that can be resumed using the checkpoint journal
+    """
+    shard = 0
+    shard_count = 1
+    skipped = 0
+    rendered = 0
+
+    def __init__(self, confgen, journal_path, shard=0, shard_count=1, processes=None, parameter_store=None,
+                 prune_parameters=False, chunksize=16):
+        """
+        :param confgen: NetworkConfGen instance
+        :param journal_path: path to the checkpoint journal (created if it doesn't exist)
+        :param shard: index of the shard, that is rendered by this run (0 to shard_count - 1)
+        :param shard_count: number of shards
+        :param processes: number of worker processes (see `NetworkConfGen.render_batch`)
+        :param parameter_store: ParameterStore instance (or path to the store file) to resolve parameter keys
+        :param prune_parameters: only pass the parameters to the template, that are actually used by it
+        :param chunksize: number of jobs, that are sent to a worker process at once
+        """
+        if shard_count < 1 or not 0 <= shard < shard_count:
+            raise AttributeError("invalid shard %s of %s" % (shard, shard_count))
+
+        self.shard = shard
+        self.shard_count = shard_count
+        self.journal_path = journal_path
+        self._confgen = confgen
+        self._processes = processes
+        self._parameter_store = parameter_store
+        self._prune_parameters = prune_parameters
+        self._chunksize = chunksize
+
+    def _iter_jobs(self, jobs, journal, device_ids):
+        for device_id, file, parameters in jobs:
+            if shard_of(device_id, self.shard_count) != self.shard:
+                continue
+
+            if device_id in journal.completed:
+                self.skipped += 1
+                continue
+
+            device_ids.append(device_id)
+            yield file, parameters
+
+    def run(self, jobs):
+        """
+        generator, that renders all jobs of the shard, that are not completed yet, and yields the results in the
+        order of the jobs. A device is recorded in the journal after the result was processed by the caller (when
+        the next result is requested), therefore the device is rendered again if the caller fails.
+
+        :param jobs: iterable of (device_id, file, parameters) tuples (see `NetworkConfGen.render_batch`)
+        :return: generator of (device_id, NetworkConfGenResult) tuples
+        """
+        self.skipped = 0
+        self.rendered = 0
+        device_ids = deque()
+
+        with RenderJournal(self.journal_path) as journal:
+            results = self._confgen.render_batch(self._iter_jobs(jobs, journal, device_ids),
+                                                 processes=self._processes,
+                                                 parameter_store=self._parameter_store,
+                                                 prune_parameters=self._prune_parameters,
+                                                 chunksize=self._chunksize)
+
+            for result in results:
+                device_id = device_ids.popleft()
+                yield device_id, result
+
+                journal.record(device_id, result)
+                self.rendered += 1
+
+            logger.info("render run completed for shard %d of %d (%d devices rendered, %d skipped)", self.shard,
+                        self.shard_count, self.rendered, self.skipped)
@@ -0,0 +1,129 @@
+"""
+String sanitization rules for names and descriptions within the configurations (e.g. VLAN names or hostnames)
+
+A rule is applied using a single `str.translate` call with a precomputed translation table, the table is extended
+lazily for characters that are not part of the initial table (e.g. non-ASCII characters).
+"""
+import string
+from networkconfgen.constants import OS_CISCO_IOS, OS_JUNIPER_JUNOS
+
+CASE_LOWER = "lower"
+CASE_UPPER = "upper"
+
+RULE_VLAN_NAME = "vlan_name"
+RULE_DESCRIPTION = "description"
+RULE_HOSTNAME = "hostname"
+
+try:
+    # python 2.7, the translation tables require unicode strings
+    text_type = unicode
+    _chr = unichr
+
+except NameError:
+    text_type = str
+    _chr = chr
+
+
+def to_text(value):
+    """
+    returns the value as text (unicode on python 2.7), byte strings are decoded using UTF-8
+    """
+    if isinstance(value, text_type):
+        return value
+
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+
+    return text_type(value)
+
+
+class _TranslationTable(dict):
+    """
+    translation table for `str.translate`, that maps all characters, that are not allowed, to the replacement
+    """
+    def __init__(self, allowed_characters, replacements, replacement):
+        super(_TranslationTable, self).__init__()
+        self._allowed_characters = frozenset(to_text(allowed_characters))
+        self._replacement = to_text(replacement) if replacement is not None else None
+
+        # precompute the table for all ASCII characters
+        for code in range(128):
+            self.__missing__(code)
+
+        for character, value in replacements.items():
+            self[ord(to_text(character))] = to_text(value) if value is not None else None
+
+    def __missing__(self, code):
+        value = code if _chr(code) in self._allowed_characters else self._replacement
+        self[code] = value
+        return value
+
+
+class SanitizeRule(object):
+    """
+    sanitization rule for a single kind of string (e.g. VLAN names of a vendor)
+    """
+    max_length = None
+    case = None
+
+    def __init__(self, allowed_characters, replacements=None, replacement=None, max_length=None, case=None):
+        """
+        :param allowed_characters: string with all allowed characters
+        :param replacements: dictionary with characters, that are replaced by another string (e.g. {" ": "_"})
+        :param replacement: replacement for all other characters, that are not allowed (removed if not set)
+        :param max_length: maximum length of the result (truncated)
+        :param case: convert the result to lower ('lower') or upper ('upper') case
+        """
+        if case not in (None, CASE_LOWER, CASE_UPPER):
+            raise AttributeError("invalid case '%s'" % case)
+
+        self.max_length = max_length
+        self.case = case
+        self._table = _TranslationTable(allowed_characters, replacements or dict(), replacement)
+
+    def __call__(self, value):
+        result = to_text(value).translate(self._table)
+        if self.case == CASE_LOWER:
+            result = result.lower()
+
+        elif self.case == CASE_UPPER:
+            result = result.upper()
+
+        if self.max_length is not None:
+            result = result[:self.max_length]
+
+        return result
+
+
+_NAME_CHARACTERS = string.ascii_letters + string.digits + "_-"
+_PRINTABLE_CHARACTERS = "".join(e for e in string.printable if e not in "\t\n\r\x0b\x0c")
+
+# sanitization rules per vendor
+RULES = {
+    OS_CISCO_IOS: {
+        RULE_VLAN_NAME: SanitizeRule(_NAME_CHARACTERS + ".", replacements={" ": "_"}, max_length=32),
+        # the question mark triggers the context help on the CLI
+        RULE_DESCRIPTION: SanitizeRule(_PRINTABLE_CHARACTERS.replace("?", ""), max_length=240),
+        RULE_HOSTNAME: SanitizeRule(string.ascii_letters + string.digits + "-", replacements={" ": "-", "_": "-"},
+                                    max_length=63),
+    },
+    OS_JUNIPER_JUNOS: {
+        RULE_VLAN_NAME: SanitizeRule(_NAME_CHARACTERS + ".", replacements={" ": "_"}, max_length=255),
+        # descriptions are quoted within the configuration
+        RULE_DESCRIPTION: SanitizeRule(_PRINTABLE_CHARACTERS.replace('"', ""), replacements={'"': "'"},
+                                       max_length=900),
+        RULE_HOSTNAME: SanitizeRule(string.ascii_letters + string.digits + "-", replacements={" ": "-", "_": "-"},
+                                    max_length=255, case=CASE_LOWER),
+    },
+}
+
+
+def get_rule(kind, vendor=OS_CISCO_IOS):
+    """
+    returns the sanitization rule for the given kind of string and vendor (raises a KeyError if not defined)
+
+    :param kind: kind of the string ('vlan_name', 'description' or 'hostname')
+    :param vendor: vendor string ('cisco_ios' or 'juniper_junos')
+    :return: SanitizeRule instance
+    """
+    return RULES[vendor][kind]
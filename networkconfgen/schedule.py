@@ -0,0 +1,265 @@
+"""
+Cost-aware scheduling of batch renders
+
+If the jobs of a batch are dispatched in their original order, a few large configurations (e.g. core routers) at the
+end of the batch keep a single worker busy while all other workers are idle. The `RenderTimeHistory` records the
+render time of previous runs (per template and device) and `render_scheduled` dispatches the jobs with the longest
+expected render time first. The workers take the next job from a shared queue as soon as they are idle, therefore
+the remaining short jobs are distributed evenly at the end of the batch.
+
+    history = RenderTimeHistory("render_times.json")
+    report = render_scheduled(confgen, jobs, history, processes=8)
+    history.save()
+
+    print(report.utilization, report.tail_time)
+"""
+import json
+import logging
+import multiprocessing
+import os
+import time
+from networkconfgen import batch
+from networkconfgen.parameter_store import ParameterStore
+
+try:
+    from collections.abc import Mapping
+
+except ImportError:  # pragma: no cover (python 2.7)
+    from collections import Mapping
+
+logger = logging.getLogger("networkconfgen")
+
+
+class RenderTimeHistory(object):
+    """
+    historical render times per template and device (exponentially weighted moving average in seconds)
+    """
+    path = None
+    smoothing = 0.5
+    default_time = 0.0
+
+    def __init__(self, path=None, smoothing=0.5, default_time=0.0):
+        """
+        :param path: path to the JSON file with the render times (loaded if it exists, see `save`)
+        :param smoothing: weight of the latest render time within the moving average (0 to 1)
+        :param default_time: expected render time of jobs with an unknown template
+        """
+        if not 0 < smoothing <= 1:
+            raise AttributeError("smoothing must be between 0 and 1")
+
+        self.path = path
+        self.smoothing = smoothing
+        self.default_time = default_time
+        self._devices = dict()
+        self._templates = dict()
+
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+
+            self._devices = dict(((e["file"], e["key"]), e["time"]) for e in data.get("devices", []))
+            self._templates = data.get("templates", dict())
+
+    def _update(self, times, key, render_time):
+        previous = times.get(key)
+        if previous is None:
+            times[key] = render_time
+
+        else:
+            times[key] = self.smoothing * render_time + (1 - self.smoothing) * previous
+
+    def record(self, file, key, render_time):
+        """
+        record the render time of a job
+
+        :param file: name of the template file
+        :param key: key of the device (e.g. the key within the parameter store), None if unknown
+        :param render_time: render time in seconds
+        """
+        if render_time is None:
+            return
+
+        self._update(self._templates, file, render_time)
+        if key is not None:
+            self._update(self._devices, (file, key), render_time)
+
+    def expected(self, file, key=None):
+        """
+        returns the expected render time of a job (the time of the device, the average time of the template or the
+        default time)
+        """
+        if key is not None and (file, key) in self._devices:
+            return self._devices[(file, key)]
+
+        return self._templates.get(file, self.default_time)
+
+    def save(self, path=None):
+        """
+        write the render times to a JSON file (the path of the history if not set)
+        """
+        path = path or self.path
+        if path is None:
+            raise AttributeError("path required to save the render time history")
+
+        data = {
+            "templates": self._templates,
+            "devices": [dict(file=file, key=key, time=value) for (file, key), value in self._devices.items()]
+        }
+        with open(path, "w") as f:
+            json.dump(data, f)
+
+
+class ScheduleReport(object):
+    """
+    results and statistics of a scheduled batch render
+    """
+    results = None
+    processes = 1
+    makespan = 0.0
+    busy_time = 0.0
+    worker_finish_times = None
+
+    def __init__(self, results, processes, makespan, busy_time, worker_finish_times):
+        self.results = results
+        self.processes = processes
+        self.makespan = makespan
+        self.busy_time = busy_time
+        self.worker_finish_times = worker_finish_times
+
+    @property
+    def utilization(self):
+        """
+        ratio of the time the workers spent rendering to the available worker time (0 to 1)
+        """
+        if not self.makespan:
+            return 0.0
+
+        return min(self.busy_time / (self.makespan * self.processes), 1.0)
+
+    @property
+    def tail_time(self):
+        """
+        time between the first idle worker and the end of the batch in seconds
+        """
+        if not self.worker_finish_times:
+            return 0.0
+
+        return self.makespan - min(self.worker_finish_times)
+
+    def percentile(self, percent):
+        """
+        returns the render time of a job at the given percentile (e.g. 99) in seconds
+        """
+        render_times = sorted(result.render_time or 0.0 for result in self.results)
+        if not render_times:
+            return 0.0
+
+        index = int(round(percent / 100.0 * (len(render_times) - 1)))
+        return render_times[index]
+
+    def to_json(self):
+        return {
+            "jobs": len(self.results),
+            "processes": self.processes,
+            "makespan": self.makespan,
+            "busy_time": self.busy_time,
+            "utilization": self.utilization,
+            "tail_time": self.tail_time,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99)
+        }
+
+
+def _job_key(job):
+    """
+    returns the device key of a job, either the parameter store key or the optional third element of the job tuple
+    """
+    if not isinstance(job[1], Mapping):
+        return job[1]
+
+    return job[2] if len(job) > 2 else None
+
+
+def _render_scheduled_job(index, file, parameters, prune_parameters):
+    result = batch.render_job(batch._worker_state["confgen"], batch._worker_state["parameter_store"], file,
+                              parameters, prune_parameters)
+    return index, result, os.getpid(), time.time()
+
+
+def render_scheduled(confgen, jobs, history, processes=None, parameter_store=None, prune_parameters=False):
+    """
+    render the jobs with the longest expected render time first and record the render times within the history
+
+    :param confgen: NetworkConfGen instance
+    :param jobs: iterable of (file, parameters) or (file, parameters, key) tuples, the parameters are a dictionary or
+                 a key within the parameter store. The key identifies the device within the history (the key within
+                 the parameter store is used if not set).
+    :param history: RenderTimeHistory instance
+    :param processes: number of worker processes (render within the current process if not set)
+    :param parameter_store: ParameterStore instance (or path to the store file) to resolve parameter keys
+    :param prune_parameters: only pass the parameters to the template, that are actually used by it
+    :return: ScheduleReport instance, the results are in the order of the jobs
+    """
+    jobs = list(jobs)
+    for job in jobs:
+        if not isinstance(job[1], Mapping) and parameter_store is None:
+            raise AttributeError("parameter_store required to render jobs with parameter keys")
+
+    order = sorted(range(len(jobs)), key=lambda i: history.expected(jobs[i][0], _job_key(jobs[i])), reverse=True)
+
+    close_store = isinstance(parameter_store, str)
+    if close_store:
+        parameter_store = ParameterStore(parameter_store)
+
+    results = [None] * len(jobs)
+    worker_finish_times = dict()
+    start_time = time.time()
+
+    try:
+        if not processes:
+            for index in order:
+                file, parameters = jobs[index][:2]
+                results[index] = batch.render_job(confgen, parameter_store, file, parameters, prune_parameters)
+                worker_finish_times[None] = time.time() - start_time
+
+        else:
+            pool = multiprocessing.Pool(
+                processes=processes,
+                initializer=batch._init_worker,
+                initargs=(type(confgen), confgen._init_arguments, parameter_store)
+            )
+            try:
+                # every job is sent separately, an idle worker takes the next job from the shared task queue
+                pending = [
+                    pool.apply_async(_render_scheduled_job, (index, jobs[index][0], jobs[index][1], prune_parameters))
+                    for index in order
+                ]
+                for async_result in pending:
+                    index, result, pid, finish_time = async_result.get()
+                    results[index] = result
+                    worker_finish_times[pid] = max(worker_finish_times.get(pid, 0.0), finish_time - start_time)
+
+                pool.close()
+
+            finally:
+                pool.terminate()
+                pool.join()
+
+    finally:
+        if close_store:
+            parameter_store.close()
+
+    makespan = time.time() - start_time
+
+    busy_time = 0.0
+    for job, result in zip(jobs, results):
+        if result is not None:
+            history.record(job[0], _job_key(job), result.render_time)
+            busy_time += result.render_time or 0.0
+
+    report = ScheduleReport(results, processes or 1, makespan, busy_time, list(worker_finish_times.values()))
+    if logger.isEnabledFor(logging.DEBUG):
+        # the report is only serialized if the debug level is enabled
+        logger.debug("scheduled batch completed (%s)", json.dumps(report.to_json(), sort_keys=True))
+
+    return report
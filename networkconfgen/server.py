@@ -0,0 +1,326 @@
+"""
+Long-running render server, that keeps a NetworkConfGen instance (with all loaded templates and caches) in memory and
+accepts render requests over a Unix domain socket
+
+The protocol uses newline delimited JSON. Every request is a JSON object on a single line, e.g.
+
+    {"id": 1, "file": "access_switch.txt", "parameters": {"hostname": "sw1"}}
+    {"id": 2, "template": "hostname {{ hostname }}", "parameters": {"hostname": "sw1"}}
+    {"id": 3, "file": "access_switch.txt", "parameter_key": "sw1"}
+
+The server sends one response per request (in the order of the requests), that contains the JSON representation of
+the NetworkConfGenResult or an error message if the request is invalid:
+
+    {"id": 1, "result": {"template_result": "...", "error_text": null, ...}}
+    {"id": 4, "error": "..."}
+
+Multiple requests can be sent without waiting for the responses (pipelining). At most `max_pending_requests` requests
+of a connection are processed at the same time, the server stops reading further requests until the client receives
+the responses (backpressure).
+"""
+import errno
+import functools
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import stat
+import threading
+from networkconfgen import batch
+from networkconfgen.base import NetworkConfGenResult
+from networkconfgen.parameter_store import ParameterStore
+
+try:
+    import socketserver
+    import queue
+
+except ImportError:  # pragma: no cover (python 2.7)
+    import SocketServer as socketserver
+    import Queue as queue
+
+logger = logging.getLogger("networkconfgen")
+
+
+def render_request(confgen, parameter_store, request):
+    """
+    render a single request and return the response dictionary
+    """
+    request_id = request.get("id") if isinstance(request, dict) else None
+    try:
+        if not isinstance(request, dict):
+            raise AttributeError("request must be a JSON object")
+
+        if "parameter_key" in request:
+            if parameter_store is None:
+                raise AttributeError("parameter store required to render requests with parameter keys")
+
+            parameters = request["parameter_key"]
+
+        else:
+            parameters = request.get("parameters", dict())
+
+        if "template" in request:
+            if not isinstance(parameters, dict):
+                parameters = parameter_store.get(parameters)
+
+            result = confgen.render_from_string(request["template"], parameters)
+
+        elif "file" in request:
+            result = batch.render_job(confgen, parameter_store, request["file"], parameters,
+                                      prune_parameters=request.get("prune_parameters", False))
+
+        else:
+            raise AttributeError("request requires a 'file' or 'template' attribute")
+
+    except (AttributeError, KeyError) as ex:
+        return {"id": request_id, "error": "Invalid Request (%s)" % ex}
+
+    return {"id": request_id, "result": result.to_json()}
+
+
+def _remove_stale_socket(socket_path):
+    """
+    remove the socket of a server, that was not shut down properly (raises an IOError if the path is not a socket or
+    another server is listening on it)
+    """
+    try:
+        mode = os.stat(socket_path).st_mode
+
+    except OSError as ex:
+        if ex.errno == errno.ENOENT:
+            return
+
+        raise
+
+    if not stat.S_ISSOCK(mode):
+        raise IOError("'%s' exists and is not a socket" % socket_path)
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+
+    except socket.error as ex:
+        if ex.errno != errno.ECONNREFUSED:
+            raise IOError("unable to verify the socket '%s' (%s)" % (socket_path, ex))
+
+        logger.info("remove stale socket '%s'", socket_path)
+        os.unlink(socket_path)
+        return
+
+    finally:
+        probe.close()
+
+    raise IOError("another server is listening on '%s'" % socket_path)
+
+
+def _render_request_in_worker(request):
+    return render_request(batch._worker_state["confgen"], batch._worker_state["parameter_store"], request)
+
+
+def _invalid_request_response(message):
+    return {"id": None, "error": "Invalid Request (%s)" % message}
+
+
+class _RenderRequestHandler(socketserver.StreamRequestHandler):
+    """
+    reads the requests of a connection and writes the responses in a separate thread (in the order of the requests),
+    the reader blocks if `max_pending_requests` responses of the connection are pending
+    """
+    def handle(self):
+        pending_responses = queue.Queue(maxsize=self.server.max_pending_requests)
+        writer = threading.Thread(target=self._write_responses, args=(pending_responses,))
+        writer.daemon = True
+        writer.start()
+
+        try:
+            for line in self.rfile:
+                line = line.strip()
+                if line:
+                    pending_responses.put(self.server.submit(line))
+
+        finally:
+            pending_responses.put(None)
+            writer.join()
+
+    def _write_responses(self, pending_responses):
+        connected = True
+        while True:
+            get_response = pending_responses.get()
+            if get_response is None:
+                break
+
+            if not connected:
+                # client disconnected, discard the remaining responses
+                continue
+
+            try:
+                response = get_response()
+
+            except Exception as ex:
+                logger.error("unable to process render request", exc_info=True)
+                response = {"id": None, "error": "Unexpected Exception (%s)" % ex}
+
+            try:
+                self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+                self.wfile.flush()
+
+            except socket.error:
+                connected = False
+
+
+class RenderServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    render server, that listens on a Unix domain socket (use `serve_forever` to start the server)
+    """
+    daemon_threads = True
+    socket_path = None
+    max_pending_requests = 64
+    _socket_inode = None
+
+    def __init__(self, confgen, socket_path, processes=None, parameter_store=None, max_pending_requests=64):
+        """
+        :param confgen: NetworkConfGen instance, that is used to render the templates
+        :param socket_path: path of the Unix domain socket
+        :param processes: number of worker processes (render within the server process if not set)
+        :param parameter_store: ParameterStore instance (or path to the store file) to resolve parameter keys
+        :param max_pending_requests: maximum number of pending requests per connection
+        """
+        if max_pending_requests < 1:
+            raise AttributeError("max_pending_requests must be at least 1")
+
+        # only a stale socket is removed, raises an IOError if the path is used otherwise
+        _remove_stale_socket(socket_path)
+
+        if isinstance(parameter_store, str):
+            parameter_store = ParameterStore(parameter_store)
+
+        self.socket_path = socket_path
+        self.max_pending_requests = max_pending_requests
+        self._confgen = confgen
+        self._parameter_store = parameter_store
+        self._pool = None
+
+        socketserver.UnixStreamServer.__init__(self, socket_path, _RenderRequestHandler)
+        self._socket_inode = os.stat(socket_path).st_ino
+
+        if processes:
+            self._pool = multiprocessing.Pool(
+                processes=processes,
+                initializer=batch._init_worker,
+                initargs=(type(confgen), confgen._init_arguments, parameter_store)
+            )
+
+    def submit(self, line):
+        """
+        submit a request (JSON string), returns a function that returns the response
+        """
+        try:
+            request = json.loads(line.decode("utf-8"))
+
+        except ValueError as ex:
+            return functools.partial(_invalid_request_response, str(ex))
+
+        if self._pool is not None:
+            return self._pool.apply_async(_render_request_in_worker, (request,)).get
+
+        return functools.partial(render_request, self._confgen, self._parameter_store, request)
+
+    def server_close(self):
+        socketserver.UnixStreamServer.server_close(self)
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+        try:
+            # the socket may be replaced by another server in the meantime
+            if self._socket_inode is not None and os.stat(self.socket_path).st_ino == self._socket_inode:
+                os.unlink(self.socket_path)
+
+        except OSError:
+            pass
+
+        self._socket_inode = None
+
+
+class RenderClient(object):
+    """
+    client of the render server
+    """
+    socket_path = None
+
+    def __init__(self, socket_path, timeout=None):
+        self.socket_path = socket_path
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(socket_path)
+        self._rfile = self._socket.makefile("rb")
+
+    def _send(self, request):
+        self._socket.sendall(json.dumps(request).encode("utf-8") + b"\n")
+
+    def _receive(self):
+        line = self._rfile.readline()
+        if not line:
+            raise RuntimeError("connection closed by the render server")
+
+        response = json.loads(line.decode("utf-8"))
+        if "error" in response:
+            raise RuntimeError(response["error"])
+
+        return NetworkConfGenResult.from_json(response["result"])
+
+    def render(self, request):
+        """
+        send a single request (dictionary, see the protocol description of the module) and wait for the result
+
+        :return: NetworkConfGenResult instance
+        """
+        self._send(request)
+        return self._receive()
+
+    def render_from_file(self, file, parameters=None, parameter_key=None, prune_parameters=False):
+        request = {"file": file, "prune_parameters": prune_parameters}
+        if parameter_key is not None:
+            request["parameter_key"] = parameter_key
+
+        else:
+            request["parameters"] = parameters
+
+        return self.render(request)
+
+    def render_from_string(self, template_content, parameters):
+        return self.render({"template": template_content, "parameters": parameters})
+
+    def render_many(self, requests, pipeline_depth=32):
+        """
+        generator, that sends multiple requests without waiting for the individual responses (at most
+        `pipeline_depth` requests are pending) and yields the results in the order of the requests
+
+        :param requests: iterable of request dictionaries
+        :param pipeline_depth: maximum number of pending requests
+        :return: generator of NetworkConfGenResult instances
+        """
+        pending = 0
+        for request in requests:
+            self._send(request)
+            pending += 1
+
+            if pending >= pipeline_depth:
+                pending -= 1
+                yield self._receive()
+
+        while pending:
+            pending -= 1
+            yield self._receive()
+
+    def close(self):
+        self._rfile.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,355 @@
+"""
+Tracing of the render processes (spans for loading, compiling and rendering the templates)
+
+The spans are exported in the OpenTelemetry (OTLP/JSON) format, therefore they can be correlated with the spans of
+other systems (e.g. a provisioning pipeline). Every render process creates a `networkconfgen.render` span with the
+name of the template and the digest of the parameters, the following child spans are created:
+
+  * `networkconfgen.template.load`: load a template from the searchpath (includes the compilation if the template is
+    not cached)
+  * `networkconfgen.template.compile`: compile a template from a string
+  * `networkconfgen.template.render`: render the template
+  * `networkconfgen.result.clean`: `cleaned_template_result` of the result
+  * `networkconfgen.result.scan_errors`: search the known error codes within the result (`content_error`)
+
+An exporter is any object with an `export(spans)` method, that receives a list of finished `Span` instances (and an
+optional `shutdown()` method). The `JsonLinesExporter` writes the spans to a local file, one OTLP/JSON
+`ExportTraceServiceRequest` per line (the format of the file exporter and receiver of the OpenTelemetry collector).
+
+    tracer = Tracer(JsonLinesExporter("spans.jsonl"))
+    confgen = NetworkConfGen(searchpath="templates", tracer=tracer)
+
+    # continue the trace of the provisioning pipeline (W3C traceparent header)
+    with tracer.attach("00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"):
+        result = confgen.render_from_file(file="my_template_file.txt", parameters=parameters)
+"""
+import binascii
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("networkconfgen")
+
+SPAN_RENDER = "networkconfgen.render"
+SPAN_TEMPLATE_LOAD = "networkconfgen.template.load"
+SPAN_TEMPLATE_COMPILE = "networkconfgen.template.compile"
+SPAN_TEMPLATE_RENDER = "networkconfgen.template.render"
+SPAN_RESULT_CLEAN = "networkconfgen.result.clean"
+SPAN_RESULT_SCAN_ERRORS = "networkconfgen.result.scan_errors"
+
+ATTRIBUTE_TEMPLATE = "networkconfgen.template"
+ATTRIBUTE_PARAMETER_HASH = "networkconfgen.parameter_hash"
+ATTRIBUTE_ERROR_TEXT = "networkconfgen.error_text"
+
+# status codes of the OTLP/JSON format
+STATUS_CODE_UNSET = 0
+STATUS_CODE_ERROR = 2
+
+# internal span kind of the OTLP/JSON format
+_SPAN_KIND_INTERNAL = 1
+
+_TRACEPARENT_PATTERN = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+def _random_id(size):
+    return binascii.hexlify(os.urandom(size)).decode("ascii")
+
+
+def _time_ns():
+    return int(time.time() * 1e9)
+
+
+def _attribute_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+
+    if isinstance(value, int):
+        # 64 bit integers are encoded as strings within OTLP/JSON
+        return {"intValue": str(value)}
+
+    if isinstance(value, float):
+        return {"doubleValue": value}
+
+    return {"stringValue": str(value)}
+
+
+def _encode_attributes(attributes):
+    return [{"key": key, "value": _attribute_value(value)} for key, value in sorted(attributes.items())]
+
+
+def parse_traceparent(traceparent):
+    """
+    returns the trace ID and the span ID of a W3C traceparent header (e.g.
+    "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01")
+    """
+    match = _TRACEPARENT_PATTERN.match(str(traceparent).strip().lower())
+    if match is None:
+        raise AttributeError("invalid traceparent '%s'" % traceparent)
+
+    return match.group(1), match.group(2)
+
+
+class Span(object):
+    """
+    a single operation within a trace, use `Tracer.start_span` to create a span
+    """
+    name = None
+    trace_id = None
+    span_id = None
+    parent_span_id = None
+    start_time = None
+    end_time = None
+    attributes = None
+    status_code = STATUS_CODE_UNSET
+    status_message = None
+
+    def __init__(self, tracer, name, trace_id, parent_span_id=None, attributes=None):
+        self._tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _random_id(8)
+        self.parent_span_id = parent_span_id
+        self.attributes = dict(attributes or dict())
+        self.start_time = _time_ns()
+
+    @property
+    def context(self):
+        """
+        (trace ID, span ID) tuple, that is used as parent of other spans
+        """
+        return self.trace_id, self.span_id
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_error(self, message):
+        self.status_code = STATUS_CODE_ERROR
+        self.status_message = message
+
+    def end(self):
+        """
+        finish the span (ignored if the span is already finished)
+        """
+        if self.end_time is not None:
+            return
+
+        self.end_time = _time_ns()
+        self._tracer._finish(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            self.set_error("%s: %s" % (exc_type.__name__, exc_val))
+
+        self.end()
+
+    def to_json(self):
+        """
+        OTLP/JSON representation of the span
+        """
+        data = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id or "",
+            "name": self.name,
+            "kind": _SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(self.start_time),
+            "endTimeUnixNano": str(self.end_time),
+            "attributes": _encode_attributes(self.attributes),
+            "status": {"code": self.status_code}
+        }
+        if self.status_message is not None:
+            data["status"]["message"] = self.status_message
+
+        return data
+
+
+class _NoSpan(object):
+    """
+    span context manager, that is used if tracing is disabled
+    """
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+NO_SPAN = _NoSpan()
+
+
+class Tracer(object):
+    """
+    creates the spans and passes the finished spans of a trace to the exporter. The spans of a render process are
+    exported at once, when the outermost span of the thread is finished.
+    """
+    exporter = None
+
+    def __init__(self, exporter):
+        """
+        :param exporter: object with an `export(spans)` method (e.g. a JsonLinesExporter)
+        """
+        self.exporter = exporter
+        self._local = threading.local()
+
+    def __getstate__(self):
+        # the tracer is passed to the worker processes of render_batch
+        return {"exporter": self.exporter}
+
+    def __setstate__(self, state):
+        self.exporter = state["exporter"]
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+            self._local.finished = []
+
+        return stack
+
+    def current_span(self):
+        """
+        returns the active span of the current thread (None if no span is active)
+        """
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    def start_span(self, name, attributes=None, parent=None):
+        """
+        start a new span, that is the active span of the current thread until it is finished
+
+        :param name: name of the span
+        :param attributes: dictionary with the attributes of the span
+        :param parent: (trace ID, span ID) tuple of the parent span (the active span, the attached remote parent or
+                       a new trace if not set)
+        :return: Span instance
+        """
+        stack = self._stack()
+        if parent is None:
+            if stack:
+                parent = stack[-1].context
+
+            else:
+                parent = getattr(self._local, "remote_parent", None)
+
+        if parent is None:
+            span = Span(self, name, _random_id(16), attributes=attributes)
+
+        else:
+            span = Span(self, name, parent[0], parent_span_id=parent[1], attributes=attributes)
+
+        stack.append(span)
+        return span
+
+    def _finish(self, span):
+        stack = self._stack()
+        if span in stack:
+            stack.remove(span)
+
+        self._local.finished.append(span)
+        if not stack:
+            finished = self._local.finished
+            self._local.finished = []
+            try:
+                self.exporter.export(finished)
+
+            except Exception:
+                # tracing must not affect the render process
+                logger.warning("unable to export %d spans", len(finished), exc_info=True)
+
+    @contextmanager
+    def attach(self, traceparent):
+        """
+        use the given remote span (W3C traceparent header) as parent of all traces, that are started within the
+        current thread
+        """
+        remote_parent = parse_traceparent(traceparent)
+        previous = getattr(self._local, "remote_parent", None)
+        self._local.remote_parent = remote_parent
+        try:
+            yield
+
+        finally:
+            self._local.remote_parent = previous
+
+    def shutdown(self):
+        """
+        shutdown the exporter (e.g. close the file of the JsonLinesExporter)
+        """
+        shutdown = getattr(self.exporter, "shutdown", None)
+        if shutdown is not None:
+            shutdown()
+
+
+class JsonLinesExporter(object):
+    """
+    writes the spans to a local file, one OTLP/JSON `ExportTraceServiceRequest` per line. The file is opened in append
+    mode and every line is written at once, therefore the exporter can be shared by multiple processes.
+    """
+    path = None
+    service_name = "networkconfgen"
+
+    def __init__(self, path, service_name="networkconfgen"):
+        """
+        :param path: path of the output file (created if it doesn't exist)
+        :param service_name: value of the `service.name` resource attribute
+        """
+        self.path = path
+        self.service_name = service_name
+        self._file = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {"path": self.path, "service_name": self.service_name}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state["service_name"])
+
+    def export(self, spans):
+        request = {
+            "resourceSpans": [{
+                "resource": {"attributes": _encode_attributes({"service.name": self.service_name})},
+                "scopeSpans": [{
+                    "scope": {"name": "networkconfgen"},
+                    "spans": [span.to_json() for span in spans]
+                }]
+            }]
+        }
+        line = (json.dumps(request, sort_keys=True) + "\n").encode("utf-8")
+
+        with self._lock:
+            if self._file is None:
+                # unbuffered, every line is a single write call
+                self._file = open(self.path, "ab", buffering=0)
+
+            self._file.write(line)
+
+    def shutdown(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_spans(path):
+    """
+    returns the OTLP/JSON representation of all spans within a file of the JsonLinesExporter
+    """
+    spans = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+
+            for resource_spans in json.loads(line)["resourceSpans"]:
+                for scope_spans in resource_spans["scopeSpans"]:
+                    spans.extend(scope_spans["spans"])
+
+    return spans
@@ -0,0 +1,37 @@
+"""
+Background thread, that invalidates changed templates of a NetworkConfGen instance (see
+`NetworkConfGen.start_template_watcher`)
+"""
+import logging
+import threading
+
+logger = logging.getLogger("networkconfgen")
+
+
+class TemplateWatcher(threading.Thread):
+    """
+    polls the loaded templates of a NetworkConfGen instance in a fixed interval and reloads the changed templates
+    """
+    interval = None
+
+    def __init__(self, confgen, interval=5.0):
+        threading.Thread.__init__(self, name="networkconfgen-template-watcher")
+        self.daemon = True
+        self.interval = interval
+        self._confgen = confgen
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                reloaded_templates = self._confgen.reload_outdated()
+                if reloaded_templates:
+                    logger.info("templates changed, reload %s", ", ".join(reloaded_templates))
+
+            except Exception:
+                logger.error("unable to check the templates for changes", exc_info=True)
+
+    def stop(self):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
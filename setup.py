@@ -37,9 +37,15 @@ setup(
     ],
     install_requires=dependencies,
     extras_require={
-        'test': ['pytest>=3.0.6', 'tox>=2.7.0']
+        'test': ['pytest>=3.0.6', 'tox>=2.7.0', 'pyyaml>=3.12'],
+        'yaml': ['pyyaml>=3.12']
     },
     packages=[
         "networkconfgen"
-    ]
+    ],
+    entry_points={
+        'console_scripts': [
+            'networkconfgen=networkconfgen.cli:main'
+        ]
+    }
 )
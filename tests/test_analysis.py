@@ -0,0 +1,104 @@
+import os
+import jinja2
+import pytest
+from networkconfgen import NetworkConfGen
+from networkconfgen.analysis import find_variable_paths, project_parameters
+
+
+def test_find_variable_paths():
+    env = jinja2.Environment()
+    test_data = {
+        "{{ hostname }}": {"hostname": {()}},
+        "{{ site.name }} {{ site['location'] }}": {"site": {("name",), ("location",)}},
+        "{{ site.contact.name }}": {"site": {("contact", "name")}},
+        "{{ site.name }} {{ site }}": {"site": {()}},
+        "{{ a.b[c].d }}": {"a": {("b",)}, "c": {()}},
+        "{% for k, v in a.b.items() %}{{ k }}{% endfor %}": {"a": {("b",)}},
+        "{% for e in values %}{{ e.name }}{% endfor %}": {"values": {()}},
+        "{% set x = 1 %}{{ x.y }}": {},
+        "{{ a.b }}{% set a = 1 %}": {"a": {()}},
+        "{{ _ERROR_.template }}": {"_ERROR_": {("template",)}},
+    }
+
+    for template, expected_result in test_data.items():
+        assert find_variable_paths(env.parse(template)) == expected_result, template
+
+
+def test_project_parameters():
+    param = {
+        "hostname": "sw1",
+        "site": {"name": "site1", "location": "somewhere", "contact": {"name": "me", "phone": "123"}},
+        "vlans": [1, 2, 3],
+        "unused": "value"
+    }
+    variable_paths = {
+        "hostname": {()},
+        "site": {("name",), ("contact", "name")},
+        "vlans": {(0,)},
+        "missing": {()}
+    }
+    expected_result = {
+        "hostname": "sw1",
+        "site": {"name": "site1", "contact": {"name": "me"}},
+        "vlans": [1, 2, 3]
+    }
+
+    assert project_parameters(param, variable_paths) == expected_result
+
+
+class TestReferencedVariables:
+    def test_referenced_variables_from_file(self):
+        confgen = NetworkConfGen(searchpath=os.path.join("tests", "data"))
+
+        result = confgen.referenced_variables(file="referenced_variables.txt")
+
+        assert result == {"hostname", "interfaces", "site"}
+
+    def test_referenced_variables_from_string(self):
+        confgen = NetworkConfGen()
+
+        assert confgen.referenced_variables(template_content="{{ a }} {{ b.c }}") == {"a", "b"}
+        assert confgen.referenced_variables(template_content="{% include name %}") is None
+
+    def test_project_parameters(self):
+        confgen = NetworkConfGen(searchpath=os.path.join("tests", "data"))
+        param = {
+            "hostname": "sw1",
+            "interfaces": [{"name": "gi0/1"}],
+            "site": {"location": "somewhere", "contact": {"name": "me", "phone": "123"}, "unused": "value"},
+            "unused": "value"
+        }
+        expected_result = {
+            "hostname": "sw1",
+            "interfaces": [{"name": "gi0/1"}],
+            "site": {"location": "somewhere", "contact": {"name": "me"}}
+        }
+
+        assert confgen.project_parameters(param, file="referenced_variables.txt") == expected_result
+
+        # dynamic includes can't be analyzed, therefore the parameters are not modified
+        assert confgen.project_parameters(param, template_content="{% include name %}") is param
+
+        with pytest.raises(AttributeError):
+            confgen.project_parameters("FooBar", file="referenced_variables.txt")
+
+    def test_render_from_file_with_prune_parameters(self):
+        confgen = NetworkConfGen(searchpath=os.path.join("tests", "data"))
+        param = {
+            "hostname": "sw1",
+            "interfaces": [{"name": "gi0/1"}],
+            "site": {"location": "somewhere", "contact": {"name": "me"}},
+            "unused": "value"
+        }
+
+        result = confgen.render_from_file(file="referenced_variables.txt", parameters=param, prune_parameters=True)
+        expected_result = confgen.render_from_file(file="referenced_variables.txt", parameters=dict(param))
+
+        assert result.render_error is False
+        assert result.template_result == expected_result.template_result
+        assert "unused" in param
+
+        result = confgen.render_from_file(file="not_existing.txt", parameters=param, prune_parameters=True)
+
+        assert result.render_error is True
+        assert result.error_text == "Template not_existing.txt not found"
@@ -1,6 +1,7 @@
 import json
 import re
 import os
+import time
 import jinja2
 import pytest
 import networkconfgen
@@ -43,6 +44,10 @@ class TestNetworkConfGen:
         if expected_cleaned_result is None:
             expected_cleaned_result = expected_json_result["template_result"]
 
+        # the render time is different on every render
+        assert type(result.render_time) is float
+        expected_json_result = dict(expected_json_result, render_time=result.render_time, peak_memory=None)
+
         assert type(result) == NetworkConfGenResult
         assert result.template_result == expected_json_result["template_result"]
         assert result.error_text == expected_json_result["error_text"]
@@ -124,6 +129,19 @@ class TestNetworkConfGen:
 
         self.verify_networkconfgenresult(result=result, expected_json_result=expected_json_result)
 
+    def test_result_json_round_trip(self):
+        confgen = NetworkConfGen(memory_accounting=True)
+        result = confgen.render_from_string(template_content="hostname {{ hostname }}", parameters={"hostname": "sw1"})
+
+        data = json.loads(json.dumps(result.to_json()))
+        assert data["render_time"] == result.render_time
+        assert data["peak_memory"] == result.peak_memory
+
+        restored = NetworkConfGenResult.from_json(data)
+        assert restored.template_result == "hostname sw1"
+        assert restored.render_time == result.render_time
+        assert restored.peak_memory == result.peak_memory
+
     def test_invalid_parameters_for_render_from_string(self):
         confgen = NetworkConfGen()
 
@@ -808,3 +826,292 @@ hostname {{ hostname }}
         result = confgen.render_from_string(template_content=template, parameters=param)
 
         self.verify_networkconfgenresult(result=result, expected_json_result=expected_json_result)
+
+
+class TestProductionMode:
+    """
+    Test cases for the production mode of the NetworkConfGen class (templates are not checked for changes on render)
+    """
+    @staticmethod
+    def write_template(path, content, mtime):
+        path.write(content)
+        os.utime(str(path), (mtime, mtime))
+
+    def test_production_mode_reload(self, tmpdir):
+        template_file = tmpdir.join("template.txt")
+        self.write_template(template_file, "hostname {{ hostname }}", 1000000)
+        param = {"hostname": "MyName"}
+
+        confgen = NetworkConfGen(searchpath=str(tmpdir), production_mode=True)
+        assert confgen.render_from_file(file="template.txt", parameters=param).template_result == "hostname MyName"
+
+        # changes are not applied until the template is reloaded
+        self.write_template(template_file, "hostname {{ hostname }}-changed", 2000000)
+        assert confgen.render_from_file(file="template.txt", parameters=param).template_result == "hostname MyName"
+
+        confgen.reload(["other.txt"])
+        assert confgen.render_from_file(file="template.txt", parameters=param).template_result == "hostname MyName"
+
+        confgen.reload(["template.txt"])
+        result = confgen.render_from_file(file="template.txt", parameters=param)
+        assert result.template_result == "hostname MyName-changed"
+
+        self.write_template(template_file, "hostname {{ hostname }}-reloaded", 3000000)
+        confgen.reload()
+        result = confgen.render_from_file(file="template.txt", parameters=param)
+        assert result.template_result == "hostname MyName-reloaded"
+
+        # the default mode checks the template for changes
+        confgen = NetworkConfGen(searchpath=str(tmpdir))
+        assert confgen.render_from_file(file="template.txt", parameters=param).template_result == \
+            "hostname MyName-reloaded"
+
+        self.write_template(template_file, "hostname {{ hostname }}", 4000000)
+        assert confgen.render_from_file(file="template.txt", parameters=param).template_result == "hostname MyName"
+
+    def test_production_mode_reload_outdated(self, tmpdir):
+        template_file = tmpdir.join("template.txt")
+        other_template_file = tmpdir.join("other.txt")
+        self.write_template(template_file, "hostname {{ hostname }}", 1000000)
+        self.write_template(other_template_file, "other", 1000000)
+        param = {"hostname": "MyName"}
+
+        confgen = NetworkConfGen(searchpath=str(tmpdir), production_mode=True)
+        confgen.render_from_file(file="template.txt", parameters=param)
+        confgen.render_from_file(file="other.txt", parameters=param)
+        assert confgen.reload_outdated() == []
+
+        self.write_template(template_file, "hostname {{ hostname }}-changed", 2000000)
+        assert confgen.reload_outdated() == ["template.txt"]
+        result = confgen.render_from_file(file="template.txt", parameters=param)
+        assert result.template_result == "hostname MyName-changed"
+
+    def test_production_mode_template_watcher(self, tmpdir):
+        template_file = tmpdir.join("template.txt")
+        self.write_template(template_file, "hostname {{ hostname }}", 1000000)
+        param = {"hostname": "MyName"}
+
+        confgen = NetworkConfGen(searchpath=str(tmpdir), production_mode=True)
+        confgen.render_from_file(file="template.txt", parameters=param)
+        confgen.start_template_watcher(interval=0.01)
+
+        with pytest.raises(RuntimeError):
+            confgen.start_template_watcher()
+
+        try:
+            self.write_template(template_file, "hostname {{ hostname }}-changed", 2000000)
+            for _ in range(500):
+                result = confgen.render_from_file(file="template.txt", parameters=param)
+                if result.template_result == "hostname MyName-changed":
+                    break
+
+                time.sleep(0.01)
+
+            assert result.template_result == "hostname MyName-changed"
+
+        finally:
+            confgen.stop_template_watcher()
+
+
+class TestStrictMode:
+    """
+    Test cases for the strict mode of the NetworkConfGen class (abort on the first error)
+    """
+    def test_strict_mode_filter_errors(self):
+        confgen = NetworkConfGen(strict=True)
+        test_templates = {
+            "netmask {{ mask|dotted_decimal }}": "Render Error (invalid_value: $$INVALID_VALUE$$(54))",
+            "wildcard {{ mask|wildcard_mask }}": "Render Error (invalid_value: $$INVALID_VALUE$$(54))",
+            "{{ '123-21'|expand_vlan_list|join(',') }}":
+                "Render Error (invalid_vlan_range: $$INVALID_VLAN_RANGE$$(123-21))",
+            "{{ ('fa0/1'|split_interface_juniper_junos).port }}":
+                "Render Error (no_match: $$NO_MATCH_ERROR$$(pattern '.*^(?P<interface_name>((ge)|(xe)){1})\\-"
+                "((?P<chassis>\\d+)/(?P<module>\\d+)/(?P<port>\\d+))$.*' for 'fa0/1'))",
+            "{{ mask|split_interface('.*') }}":
+                "Render Error (parameter: $$PARAMETER_ERROR$$(invalid type for 'interface_regex'))",
+            "!\n{{ _ERROR_.template }}\n!": "Render Error (template: $$TEMPLATE_ERROR$$)",
+            "hostname {{ hostname }}": "Undefined Variable ('hostname' is undefined)",
+        }
+
+        for template, expected_error_text in test_templates.items():
+            result = confgen.render_from_string(template_content=template, parameters={"mask": 54})
+
+            assert result.render_error is True
+            assert result.content_error is False
+            assert result.template_result is None
+            assert result.error_text == expected_error_text
+
+    def test_strict_mode_valid_templates(self):
+        confgen = NetworkConfGen(strict=True)
+        template = "netmask {{ mask|dotted_decimal }}\n" \
+                   "{% if hostname is defined %}hostname {{ hostname }}{% endif %}\n" \
+                   "{% if _ERROR_.template == '$$TEMPLATE_ERROR$$' %}equal{% endif %}"
+
+        result = confgen.render_from_string(template_content=template, parameters={"mask": 24})
+
+        assert result.render_error is False
+        assert result.content_error is False
+        assert result.strict is True
+        assert result.template_result == "netmask 255.255.255.0\nequal"
+
+    def test_strict_mode_with_file(self):
+        confgen = NetworkConfGen(searchpath=os.path.join("tests", "data"), strict=True)
+
+        result = confgen.render_from_file(file="valid_syntax_with_error_codes.txt", parameters={"hostname": "sw1"})
+
+        assert result.render_error is True
+        assert result.error_text == "Render Error (unknown: $$UNKOWN_ERROR_IN_CUSTOM_FUNCTION$$)"
+
+    def test_non_strict_mode_undefined_variable(self):
+        confgen = NetworkConfGen()
+
+        result = confgen.render_from_string(template_content="{{ a.b.c }}", parameters={})
+
+        assert result.error_text == "Unexpected Exception ('a' is undefined)"
+
+
+class TestFanOut:
+    """
+    Test cases for the fan-out rendering of the NetworkConfGen class (same parameters, multiple templates)
+    """
+    @pytest.fixture
+    def confgen(self, tmpdir):
+        tmpdir.join("ios.txt").write("interface {{ uplink }}\n"
+                                     " description peer {{ uplink|convert_interface_name('juniper_junos') }}")
+        tmpdir.join("junos.txt").write("interfaces {{ uplink|convert_interface_name('juniper_junos') }} "
+                                       "port {{ (uplink|split_interface_cisco_ios).port }}")
+        tmpdir.join("error.txt").write("{{ uplink|convert_interface_name('juniper_junos') }} {{ _ERROR_.template }}")
+
+        return NetworkConfGen(searchpath=str(tmpdir))
+
+    def test_render_fan_out(self, confgen, monkeypatch):
+        calls = []
+        get_interface_components = networkconfgen.custom_filters.get_interface_components
+
+        def counted_get_interface_components(*args):
+            calls.append(args)
+            return get_interface_components(*args)
+
+        monkeypatch.setattr(networkconfgen.custom_filters, "get_interface_components",
+                            counted_get_interface_components)
+        param = {"uplink": "Gi0/0/1"}
+
+        results = confgen.render_fan_out({"cisco_ios": "ios.txt", "juniper_junos": "junos.txt"}, param)
+
+        assert sorted(results.keys()) == ["cisco_ios", "juniper_junos"]
+        assert results["cisco_ios"].template_result == "interface Gi0/0/1\n description peer ge-0/0/0"
+        assert results["cisco_ios"].template_file_name == "ios.txt"
+        assert results["juniper_junos"].template_result == "interfaces ge-0/0/0 port 1"
+        assert results["juniper_junos"].render_error is False
+
+        # the interface name is only converted once
+        assert len(calls) == 1
+
+        # same results as individual render processes
+        for key, file in (("cisco_ios", "ios.txt"), ("juniper_junos", "junos.txt")):
+            assert confgen.render_from_file(file, param).template_result == results[key].template_result
+
+        assert len(calls) == 3
+
+    def test_render_fan_out_with_errors(self, confgen):
+        results = confgen.render_fan_out({"a": "error.txt", "b": "missing.txt", "c": "ios.txt"},
+                                         {"uplink": "Gi0/0/1"}, prune_parameters=True)
+
+        assert results["a"].template_result == "ge-0/0/0 $$TEMPLATE_ERROR$$"
+        assert results["a"].content_error is True
+        assert results["b"].error_text == "Template missing.txt not found"
+        assert results["c"].render_error is False
+
+    def test_invalid_render_fan_out(self, confgen):
+        with pytest.raises(AttributeError):
+            confgen.render_fan_out(["ios.txt"], {})
+
+        with pytest.raises(AttributeError):
+            confgen.render_fan_out({"cisco_ios": "ios.txt"}, None)
+
+        with pytest.raises(AttributeError):
+            confgen.render_fan_out({"cisco_ios": None}, {})
+
+
+class TestMacroLibraries:
+    """
+    Test cases for the shared macro libraries of the NetworkConfGen class
+    """
+    def test_macro_library(self, tmpdir):
+        library_file = tmpdir.join("macros.j2")
+        library_file.write("{% macro interface(name) %}interface {{ name }}{% endmacro %}")
+        os.utime(str(library_file), (1000000, 1000000))
+        tmpdir.join("template.txt").write("{{ m.interface(uplink) }}")
+
+        confgen = NetworkConfGen(searchpath=str(tmpdir), macro_libraries={"m": "macros.j2"})
+        module = confgen._template_engine.globals["m"]
+
+        result = confgen.render_from_file(file="template.txt", parameters={"uplink": "gi0/1"})
+        assert result.template_result == "interface gi0/1"
+
+        result = confgen.render_from_string(template_content="{{ m.interface('gi0/2') }}", parameters={})
+        assert result.template_result == "interface gi0/2"
+
+        # the library is evaluated once
+        assert confgen._template_engine.globals["m"] is module
+
+        # changes of the library are applied on the next render
+        library_file.write("{% macro interface(name) %}interface {{ name|upper }}{% endmacro %}")
+        os.utime(str(library_file), (2000000, 2000000))
+
+        result = confgen.render_from_file(file="template.txt", parameters={"uplink": "gi0/1"})
+        assert result.template_result == "interface GI0/1"
+        assert confgen._init_arguments["macro_libraries"] == {"m": "macros.j2"}
+
+    def test_macro_library_added_after_template_is_cached(self, tmpdir):
+        tmpdir.join("macros.j2").write("{% macro interface(name) %}interface {{ name }}{% endmacro %}")
+        tmpdir.join("other_macros.j2").write("{% macro interface(name) %}set interfaces {{ name }}{% endmacro %}")
+        tmpdir.join("template.txt").write("{% if m is defined %}{{ m.interface(uplink) }}{% endif %}")
+
+        confgen = NetworkConfGen(searchpath=str(tmpdir))
+        result = confgen.render_from_file(file="template.txt", parameters={"uplink": "gi0/1"})
+        assert result.template_result == ""
+
+        # Jinja2 versions before 3.0 copy the globals of the environment when the template is loaded
+        template = confgen._template_engine.get_template("template.txt")
+        template.globals = dict(template.globals)
+
+        confgen.add_macro_library("m", "macros.j2")
+        assert confgen._template_engine.get_template("template.txt") is template
+        result = confgen.render_from_file(file="template.txt", parameters={"uplink": "gi0/1"})
+        assert result.template_result == "interface gi0/1"
+
+        confgen.add_macro_library("m", "other_macros.j2")
+        result = confgen.render_from_file(file="template.txt", parameters={"uplink": "ge-0/0/0"})
+        assert result.template_result == "set interfaces ge-0/0/0"
+
+        # parameters take precedence over the macro libraries
+        result = confgen.render_from_string(template_content="{{ m }}", parameters={"m": "value"})
+        assert result.template_result == "value"
+
+    def test_invalid_macro_library(self, tmpdir):
+        confgen = NetworkConfGen(searchpath=str(tmpdir))
+
+        with pytest.raises(AttributeError):
+            confgen.add_macro_library("m", None)
+
+        with pytest.raises(jinja2.TemplateNotFound):
+            confgen.add_macro_library("m", "missing.j2")
+
+        result = confgen.render_from_string(template_content="{{ m is defined }}", parameters={})
+        assert result.template_result == "False"
+
+
+def test_ip_addressing_filters():
+    confgen = NetworkConfGen()
+    template = "ip address {{ network|nth_host(1) }} {{ network|supernet(24)|nth_host(-1) }}\n" \
+               "peer {{ p2p|peer_address }}\n" \
+               "{% for subnet in network|subnet_split(26) %}{{ subnet }} {% endfor %}\n" \
+               "{% if network|nth_host(1)|in_subnet('10.0.0.0/8') %}internal{% endif %}"
+
+    result = confgen.render_from_string(template, {"network": "10.1.2.0/24", "p2p": "10.255.0.0/31"})
+
+    assert result.render_error is False
+    assert result.template_result == "ip address 10.1.2.1 10.1.2.255\n" \
+                                     "peer 10.255.0.1\n" \
+                                     "10.1.2.0/26 10.1.2.64/26 10.1.2.128/26 10.1.2.192/26 internal"
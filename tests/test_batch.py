@@ -0,0 +1,44 @@
+import os
+import pytest
+from networkconfgen import NetworkConfGen, NetworkConfGenResult
+from networkconfgen.parameter_store import ParameterStore
+
+
+def test_render_batch():
+    confgen = NetworkConfGen(searchpath=os.path.join("tests", "data"))
+    jobs = [("valid_syntax.txt", {"hostname": "sw%d" % i}) for i in range(20)]
+    jobs.append(("invalid_syntax.txt", {"hostname": "sw20"}))
+
+    for processes in (None, 2):
+        results = list(confgen.render_batch(iter(jobs), processes=processes, chunksize=3))
+
+        assert len(results) == 21
+        for i, result in enumerate(results[:20]):
+            assert type(result) is NetworkConfGenResult
+            assert result.template_result == "!\nhostname sw%d\n!" % i
+            assert result.template_file_name == "valid_syntax.txt"
+
+        assert results[20].render_error is True
+
+
+def test_render_batch_with_parameter_store(tmpdir):
+    confgen = NetworkConfGen(searchpath=os.path.join("tests", "data"))
+    path = str(tmpdir.join("parameters.store"))
+    ParameterStore.create(path, {"sw1": {"hostname": "sw1"}, "sw2": {}}, shared={"hostname": "default"}).close()
+    jobs = [
+        ("valid_syntax.txt", "sw1"),
+        ("valid_syntax.txt", "sw2"),
+        ("valid_syntax.txt", "sw3"),
+        ("valid_syntax.txt", {"hostname": "sw4"})
+    ]
+
+    for processes in (None, 2):
+        results = list(confgen.render_batch(jobs, processes=processes, parameter_store=path))
+
+        assert [e.template_result for e in results] == ["!\nhostname sw1\n!", "!\nhostname default\n!", None,
+                                                        "!\nhostname sw4\n!"]
+        assert results[2].render_error is True
+        assert results[2].error_text == "Parameters for key 'sw3' not found in parameter store"
+
+    with pytest.raises(AttributeError):
+        list(confgen.render_batch(jobs))
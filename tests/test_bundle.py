@@ -0,0 +1,73 @@
+import os
+import jinja2
+import pytest
+from networkconfgen import NetworkConfGen
+from networkconfgen.bundle import load_manifest
+from networkconfgen.cli import main
+
+
+def test_compile_and_render_bundle(tmpdir):
+    target = str(tmpdir.join("templates.bundle"))
+    confgen = NetworkConfGen(searchpath=os.path.join("tests", "data"))
+    param = {
+        "hostname": "sw1",
+        "interfaces": [{"name": "gi0/1"}],
+        "site": {"location": "somewhere", "contact": {"name": "me"}},
+    }
+
+    manifest = confgen.compile_bundle(target)
+
+    # templates with syntax errors are skipped
+    assert "invalid_syntax.txt" not in manifest["templates"]
+    assert "referenced_variables.txt" in manifest["templates"]
+    assert load_manifest(target) == manifest
+
+    bundle_confgen = NetworkConfGen(bundle=target)
+    for file in ("valid_syntax.txt", "referenced_variables.txt"):
+        result = bundle_confgen.render_from_file(file=file, parameters=dict(param))
+        expected_result = confgen.render_from_file(file=file, parameters=dict(param))
+
+        assert result.render_error is False
+        assert result.template_result == expected_result.template_result
+
+    result = bundle_confgen.render_from_file(file="invalid_syntax.txt", parameters=dict(param))
+    assert result.render_error is True
+    assert result.error_text == "Template invalid_syntax.txt not found"
+
+    # template sources are not available within the bundle, therefore the parameters are not pruned
+    result = bundle_confgen.render_from_file(file="valid_syntax.txt", parameters=dict(param), prune_parameters=True)
+    assert result.template_result == "!\nhostname sw1\n!"
+
+    with pytest.raises(AttributeError):
+        bundle_confgen.compile_bundle(str(tmpdir.join("other.bundle")))
+
+    with pytest.raises(jinja2.TemplateSyntaxError):
+        confgen.compile_bundle(str(tmpdir.join("other.bundle")), ignore_errors=False)
+
+
+def test_bundle_with_different_configuration(tmpdir):
+    target = str(tmpdir.join("templates.bundle"))
+    NetworkConfGen(searchpath=os.path.join("tests", "data")).compile_bundle(target)
+
+    with pytest.raises(ValueError):
+        NetworkConfGen(bundle=target, variable_start_string="[[", variable_end_string="]]")
+
+    invalid_bundle = tmpdir.join("invalid.bundle")
+    invalid_bundle.write("no zip file")
+
+    with pytest.raises(ValueError):
+        NetworkConfGen(bundle=str(invalid_bundle))
+
+
+def test_compile_bundle_command(tmpdir, capsys):
+    target = str(tmpdir.join("templates.bundle"))
+
+    assert main(["compile-bundle", os.path.join("tests", "data"), target, "--variable-start-string", "[[",
+                 "--variable-end-string", "]]"]) == 0
+    assert "templates compiled to" in capsys.readouterr().out
+
+    confgen = NetworkConfGen(bundle=target, variable_start_string="[[", variable_end_string="]]")
+    result = confgen.render_from_file(file="valid_syntax.txt", parameters={"hostname": "sw1"})
+
+    # the template uses the default delimiters, therefore no variable is replaced
+    assert result.template_result == "!\nhostname {{ hostname }}\n!"
@@ -1,5 +1,8 @@
+import pytest
+from networkconfgen import NetworkConfGen
 from networkconfgen import constants as nc_constants
 from networkconfgen import custom_filters
+from networkconfgen import render_context
 
 
 def test_get_interface_components_string():
@@ -94,6 +97,8 @@ def test_get_valid_vlan_name():
     for key in test_strings.keys():
         assert test_strings[key] == custom_filters.valid_vlan_name(key)
 
+    assert custom_filters.valid_vlan_name(b"foo-bar") == "foo_bar"
+
 
 def test_convert_interface_name():
     # test cisco to juniper conversion (pass through if nothing useful is identified)
@@ -308,3 +313,203 @@ def test_split_interface_juniper_junos():
 
         assert result == TEST_VALUES[intf_value]["result"], "Error with value '%s'" % intf_value
 
+
+def test_cached_filter():
+    calls = []
+
+    @render_context.cached_filter
+    def custom_filter(value, suffix=""):
+        calls.append(value)
+        if value == "error":
+            return render_context.report_error(nc_constants.ERROR_INVALID_VALUE, value)
+
+        return {"value": value, "suffix": suffix}
+
+    # no active render context
+    assert custom_filter("a") == {"value": "a", "suffix": ""}
+    assert custom_filter("a") == {"value": "a", "suffix": ""}
+    assert len(calls) == 2
+
+    with render_context.activate(render_context.RenderContext(filter_cache=dict())):
+        result = custom_filter("a", suffix="b")
+        result["value"] = "modified"
+        assert custom_filter("a", suffix="b") == {"value": "a", "suffix": "b"}
+        assert len(calls) == 3
+
+        # unhashable arguments and results with errors are not cached
+        assert custom_filter("a", suffix=["b"]) == {"value": "a", "suffix": ["b"]}
+        assert custom_filter("a", suffix=["b"]) == {"value": "a", "suffix": ["b"]}
+        assert custom_filter("error") == "$$INVALID_VALUE$$(error)"
+        assert custom_filter("error") == "$$INVALID_VALUE$$(error)"
+        assert len(calls) == 7
+
+
+def test_nth_host():
+    test_values = [
+        (("10.0.0.0/24", 1), "10.0.0.1"),
+        (("10.0.0.77/24", 1), "10.0.0.1"),
+        (("10.0.0.0/24", -2), "10.0.0.254"),
+        (("10.0.0.0/24", "10"), "10.0.0.10"),
+        (("2001:db8::/64", 1), "2001:db8::1"),
+        (("2001:db8::/64", -1), "2001:db8::ffff:ffff:ffff:ffff"),
+        (("10.0.0.0/24", 256), "$$INVALID_VALUE$$(10.0.0.0/24, 256)"),
+        (("10.0.0.0/24", -257), "$$INVALID_VALUE$$(10.0.0.0/24, -257)"),
+        (("10.0.0.300/24", 1), "$$INVALID_VALUE$$(10.0.0.300/24, 1)"),
+    ]
+
+    for args, expected_result in test_values:
+        assert custom_filters.nth_host(*args) == expected_result
+
+    assert custom_filters.nth_host("10.0.0.0/24", 1, with_prefix=True) == "10.0.0.1/24"
+
+
+def test_peer_address():
+    test_values = {
+        "10.0.0.1/30": "10.0.0.2",
+        "10.0.0.2/30": "10.0.0.1",
+        "10.0.0.0/31": "10.0.0.1",
+        "10.0.0.1/31": "10.0.0.0",
+        "2001:db8::1/126": "2001:db8::2",
+        "2001:db8::/127": "2001:db8::1",
+        "10.0.0.3/30": "$$INVALID_VALUE$$(10.0.0.3/30)",
+        "10.0.0.1/24": "$$INVALID_VALUE$$(10.0.0.1/24)",
+        "10.0.0.1": "$$INVALID_VALUE$$(10.0.0.1)",
+        "invalid": "$$INVALID_VALUE$$(invalid)",
+    }
+
+    for value, expected_result in test_values.items():
+        assert custom_filters.peer_address(value) == expected_result
+
+    assert custom_filters.peer_address("10.0.0.1/31", with_prefix=True) == "10.0.0.0/31"
+
+
+def test_subnet_split_and_supernet():
+    assert custom_filters.subnet_split("10.0.0.0/24", 26) == ["10.0.0.0/26", "10.0.0.64/26", "10.0.0.128/26",
+                                                              "10.0.0.192/26"]
+    assert custom_filters.subnet_split("10.0.0.0/24", 24) == ["10.0.0.0/24"]
+    assert custom_filters.subnet_split("2001:db8::/63", 64) == ["2001:db8::/64", "2001:db8:0:1::/64"]
+    assert custom_filters.subnet_split("10.0.0.0/24", 23) == ["$$INVALID_VALUE$$(10.0.0.0/24, 23)"]
+
+    assert custom_filters.supernet("10.1.2.0/24", 16) == "10.1.0.0/16"
+    assert custom_filters.supernet("10.1.2.3/32", 0) == "0.0.0.0/0"
+    assert custom_filters.supernet("2001:db8:1::/48", 32) == "2001:db8::/32"
+    assert custom_filters.supernet("10.1.2.0/24", 25) == "$$INVALID_VALUE$$(10.1.2.0/24, 25)"
+
+
+def test_in_subnet():
+    assert custom_filters.in_subnet("10.0.0.5", "10.0.0.0/24") is True
+    assert custom_filters.in_subnet("10.0.1.5", "10.0.0.0/24") is False
+    assert custom_filters.in_subnet("10.0.0.0/25", "10.0.0.0/24") is True
+    assert custom_filters.in_subnet("10.0.0.0/23", "10.0.0.0/24") is False
+    assert custom_filters.in_subnet("10.0.0.5", "0.0.0.0/0") is True
+    assert custom_filters.in_subnet("2001:db8::1", "2001:db8::/32") is True
+    assert custom_filters.in_subnet("2001:db8::1", "10.0.0.0/8") is False
+
+    # invalid values are never part of the network, the error is reported to the render process
+    with render_context.activate(render_context.RenderContext()) as context:
+        assert custom_filters.in_subnet("invalid", "10.0.0.0/8") is False
+        assert custom_filters.in_subnet("10.0.0.5", "10.0.0.0/33") is False
+        assert [e.detail for e in context.errors] == ["invalid, 10.0.0.0/8", "10.0.0.5, 10.0.0.0/33"]
+
+    with render_context.activate(render_context.RenderContext(strict=True)):
+        with pytest.raises(render_context.RenderError):
+            custom_filters.in_subnet("invalid", "10.0.0.0/8")
+
+
+def test_in_subnet_within_condition():
+    confgen = NetworkConfGen()
+    template = "{% if ip|in_subnet('10.0.0.0/8') %}internal{% else %}external{% endif %}"
+
+    result = confgen.render_from_string(template_content=template, parameters={"ip": "10.1.2.3"})
+    assert result.template_result == "internal"
+
+    result = confgen.render_from_string(template_content=template, parameters={"ip": "10.1.2.300"})
+    assert result.template_result == "external"
+
+    confgen = NetworkConfGen(strict=True)
+    result = confgen.render_from_string(template_content=template, parameters={"ip": "10.1.2.300"})
+    assert result.render_error is True
+    assert result.template_result is None
+
+
+def test_subnet_split_limit():
+    assert len(custom_filters.subnet_split("10.0.0.0/8", 24)) == custom_filters.MAX_SUBNETS
+    assert custom_filters.subnet_split("10.0.0.0/8", 25) == ["$$INVALID_VALUE$$(10.0.0.0/8, 25)"]
+    assert custom_filters.subnet_split("::/0", 128) == ["$$INVALID_VALUE$$(::/0, 128)"]
+
+
+def test_aggregate_prefixes():
+    test_values = [
+        (["10.0.0.0/24", "10.0.1.0/24", "10.0.1.128/25"], ["10.0.0.0/23"]),
+        (["10.0.1.0/24", "10.0.0.0/24", "10.0.2.0/24"], ["10.0.0.0/23", "10.0.2.0/24"]),
+        (["10.0.1.0/24", "10.0.2.0/24"], ["10.0.1.0/24", "10.0.2.0/24"]),
+        (["10.0.0.0/8", "10.1.2.3", "192.168.0.1/24"], ["10.0.0.0/8", "192.168.0.0/24"]),
+        (["10.0.0.0/25", "10.0.0.128/26", "10.0.0.192/26"], ["10.0.0.0/24"]),
+        (["0.0.0.0/1", "128.0.0.0/1"], ["0.0.0.0/0"]),
+        (["10.0.0.1", "10.0.0.1/32"], ["10.0.0.1/32"]),
+        (["2001:db8::/33", "2001:db8:8000::/33", "10.0.0.0/24"], ["10.0.0.0/24", "2001:db8::/32"]),
+        (["10.0.0.0/24", "invalid"], ["$$INVALID_VALUE$$(invalid)", "10.0.0.0/24"]),
+        ("10.0.0.0/24", ["10.0.0.0/24"]),
+        ([], []),
+    ]
+
+    for prefixes, expected_result in test_values:
+        assert custom_filters.aggregate_prefixes(prefixes) == expected_result
+
+    assert custom_filters.aggregate_prefixes(["10.0.0.0/24", "10.0.1.0/24", "10.0.2.1", "2001:db8::/32"],
+                                             wildcard=True) == ["10.0.0.0 0.0.1.255", "10.0.2.1 0.0.0.0",
+                                                                "2001:db8::/32"]
+
+
+def test_aggregate_prefixes_large_list():
+    # every second /24 network within 10.0.0.0/8 and all /24 networks of 172.16.0.0/12
+    prefixes = ["10.%d.%d.0/24" % (i // 256, i % 256) for i in range(0, 65536, 2)]
+    prefixes.extend("172.%d.%d.0/24" % (16 + i // 256, i % 256) for i in range(4096))
+
+    result = custom_filters.aggregate_prefixes(prefixes)
+
+    assert len(result) == 32769
+    assert result[-1] == "172.16.0.0/12"
+    assert result[:2] == ["10.0.0.0/24", "10.0.2.0/24"]
+
+
+def test_expand_interface_range():
+    test_values = [
+        ("Gi1/0/1-3", ["Gi1/0/1", "Gi1/0/2", "Gi1/0/3"]),
+        ("Gi1/0/1 - 2, Gi1/0/10", ["Gi1/0/1", "Gi1/0/2", "Gi1/0/10"]),
+        ("GigabitEthernet0/1", ["GigabitEthernet0/1"]),
+        ("ge-0/0/0-2", ["ge-0/0/0", "ge-0/0/1", "ge-0/0/2"]),
+        (["ge-0/0/5", "xe-1/0/0-1"], ["ge-0/0/5", "xe-1/0/0", "xe-1/0/1"]),
+        ("Gi1/0/48-1", ["$$INVALID_VALUE$$(Gi1/0/48-1)"]),
+        ("Gi1/0/1-2, 12", ["Gi1/0/1", "Gi1/0/2", "$$INVALID_VALUE$$(12)"]),
+    ]
+
+    for value, expected_result in test_values:
+        assert custom_filters.expand_interface_range(value) == expected_result
+
+    assert len(custom_filters.expand_interface_range("Gi1/0/1-48")) == 48
+    assert custom_filters.expand_interface_range("Gi1/0/1-48")[-1] == "Gi1/0/48"
+
+    # the number of interfaces is limited
+    assert custom_filters.expand_interface_range("Gi1/0/1-99999999") == ["$$INVALID_VALUE$$(Gi1/0/1-99999999)"]
+    result = custom_filters.expand_interface_range(["Gi1/0/1-60000", "Gi2/0/1-10000", "Gi3/0/1"])
+    assert len(result) == 60002
+    assert result[60000:] == ["$$INVALID_VALUE$$(Gi2/0/1-10000)", "Gi3/0/1"]
+
+
+def test_compress_interface_range():
+    interfaces = ["Gi1/0/10", "Gi1/0/2", "Gi1/0/1", "Gi1/0/3", "Gi1/0/3", "Gi2/0/1", "Gi1/0/12", "Gi1/0/11"]
+
+    assert custom_filters.compress_interface_range(interfaces) == ["Gi1/0/1 - 3", "Gi1/0/10 - 12", "Gi2/0/1"]
+    assert custom_filters.compress_interface_range(["ge-0/0/0", "ge-0/0/1", "ge-0/0/10"], "juniper_junos") == \
+        ["ge-0/0/0 to ge-0/0/1", "ge-0/0/10"]
+    assert custom_filters.compress_interface_range(["Gi1/0/1-2", "Gi1/0/5"]) == ["$$INVALID_VALUE$$(Gi1/0/1-2)",
+                                                                                 "Gi1/0/5"]
+    assert custom_filters.compress_interface_range([]) == []
+
+    # the prefixes are compared case-insensitive
+    assert custom_filters.compress_interface_range(["gi1/0/1", "Gi1/0/2", "GI1/0/3"]) == ["gi1/0/1 - 3"]
+
+    # round trip
+    interfaces = custom_filters.expand_interface_range("Gi1/0/1-24, Gi1/0/26-48, Te1/1/1-4")
+    assert custom_filters.compress_interface_range(interfaces) == ["Gi1/0/1 - 24", "Gi1/0/26 - 48", "Te1/1/1 - 4"]
@@ -0,0 +1,160 @@
+import pytest
+from networkconfgen import NetworkConfGen
+from networkconfgen.diff import split_config_blocks, diff_config, config_hash
+
+OLD_CONFIG = """\
+!
+hostname sw1
+!
+interface GigabitEthernet0/1
+ description uplink
+ switchport mode trunk
+!
+interface GigabitEthernet0/2
+ description access
+ switchport access vlan 10
+!
+router bgp 65000
+ neighbor 10.1.1.1 remote-as 65001
+ address-family ipv4
+  network 10.0.0.0 mask 255.0.0.0
+!
+"""
+
+NEW_CONFIG = """\
+!
+hostname sw1
+!
+interface GigabitEthernet0/1
+ description uplink
+ switchport mode trunk
+!
+interface GigabitEthernet0/2
+ description access
+ switchport access vlan 20
+!
+interface GigabitEthernet0/3
+ shutdown
+!
+"""
+
+
+def test_split_config_blocks():
+    blocks = split_config_blocks(OLD_CONFIG)
+
+    assert [e[0] for e in blocks] == ["hostname sw1", "interface GigabitEthernet0/1", "interface GigabitEthernet0/2",
+                                      "router bgp 65000"]
+    assert blocks[3] == ["router bgp 65000", " neighbor 10.1.1.1 remote-as 65001", " address-family ipv4",
+                         "  network 10.0.0.0 mask 255.0.0.0"]
+
+
+def test_diff_config():
+    result = diff_config(OLD_CONFIG, NEW_CONFIG)
+
+    assert result.changed is True
+    assert [e.header for e in result.added] == ["interface GigabitEthernet0/3"]
+    assert [e.header for e in result.removed] == ["router bgp 65000"]
+    assert [e.header for e in result.modified] == ["interface GigabitEthernet0/2"]
+    assert result.modified[0].added_lines == [" switchport access vlan 20"]
+    assert result.modified[0].removed_lines == [" switchport access vlan 10"]
+    assert str(result).split("\n")[-3:] == ["  interface GigabitEthernet0/2",
+                                            "-  switchport access vlan 10",
+                                            "+  switchport access vlan 20"]
+
+    # comments and empty lines are ignored
+    result = diff_config(OLD_CONFIG, OLD_CONFIG.replace("!\n", "\n"))
+    assert result.changed is False
+    assert result.to_json() == {"changed": False, "added": [], "removed": [], "modified": []}
+
+
+def test_diff_config_with_duplicate_headers():
+    old_config = "exit\n line a\nexit\n line b"
+    new_config = "exit\n line a\nexit\n line c"
+
+    result = diff_config(old_config, new_config)
+
+    assert len(result.modified) == 1
+    assert result.modified[0].added_lines == [" line c"]
+
+
+def test_diff_config_with_reordered_lines():
+    old_config = "ip access-list extended ACL\n permit ip host 10.0.0.1 any\n deny ip any any"
+    new_config = "ip access-list extended ACL\n deny ip any any\n permit ip host 10.0.0.1 any"
+
+    result = diff_config(old_config, new_config)
+
+    assert [e.header for e in result.modified] == ["ip access-list extended ACL"]
+    block = result.modified[0]
+    assert len(block.added_lines) == 1 and len(block.removed_lines) == 1
+    assert block.added_lines == block.removed_lines
+
+
+def test_diff_config_with_duplicate_lines():
+    old_config = "route-map RM permit 10\n set community 65000:1\n"
+    new_config = "route-map RM permit 10\n set community 65000:1\n set community 65000:1\n"
+
+    result = diff_config(old_config, new_config)
+
+    assert result.modified[0].added_lines == [" set community 65000:1"]
+    assert result.modified[0].removed_lines == []
+
+    result = diff_config(new_config, old_config)
+    assert result.modified[0].added_lines == []
+    assert result.modified[0].removed_lines == [" set community 65000:1"]
+
+
+def test_diff_config_with_nested_blocks():
+    old_config = "router bgp 65000\n" \
+                 " address-family ipv4\n" \
+                 "  network 10.0.0.0\n" \
+                 " address-family ipv6\n" \
+                 "  network 2001:db8::/32\n"
+    new_config = "router bgp 65000\n" \
+                 " address-family ipv4\n" \
+                 "  network 10.0.0.0\n" \
+                 " address-family ipv6\n" \
+                 "  network 2001:db8::/48\n" \
+                 " address-family vpnv4\n"
+
+    result = diff_config(old_config, new_config)
+
+    assert result.modified[0].changes == [
+        ("-", ("router bgp 65000", " address-family ipv6"), "  network 2001:db8::/32"),
+        ("+", ("router bgp 65000", " address-family ipv6"), "  network 2001:db8::/48"),
+        ("+", ("router bgp 65000",), " address-family vpnv4"),
+    ]
+    assert str(result).split("\n") == ["  router bgp 65000",
+                                       "   address-family ipv6",
+                                       "-   network 2001:db8::/32",
+                                       "+   network 2001:db8::/48",
+                                       "+  address-family vpnv4"]
+
+    # identical lines within other sub-blocks are not matched
+    old_config = "router ospf 1\n area 0\n  passive\n area 1\n"
+    new_config = "router ospf 1\n area 0\n area 1\n  passive\n"
+
+    result = diff_config(old_config, new_config)
+
+    assert result.modified[0].changes == [
+        ("-", ("router ospf 1", " area 0"), "  passive"),
+        ("+", ("router ospf 1", " area 1"), "  passive"),
+    ]
+
+
+def test_result_diff():
+    confgen = NetworkConfGen()
+    result = confgen.render_from_string(template_content="{{ config }}", parameters={"config": NEW_CONFIG})
+
+    assert result.template_result_hash == config_hash(NEW_CONFIG)
+    assert result.diff(OLD_CONFIG).changed is True
+    assert result.diff(result).changed is False
+
+    # the configurations are not compared if the hash matches
+    assert result.diff(None, previous_hash=config_hash(NEW_CONFIG)).changed is False
+
+    with pytest.raises(AttributeError):
+        result.diff(None, previous_hash=config_hash(OLD_CONFIG))
+
+    result = confgen.render_from_string(template_content="{% if %}", parameters={})
+    assert result.template_result_hash is None
+    assert result.diff(OLD_CONFIG) is None
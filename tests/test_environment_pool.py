@@ -0,0 +1,138 @@
+import gc
+import os
+import pytest
+from networkconfgen import NetworkConfGen
+from networkconfgen.environment_pool import EnvironmentPool, DEFAULT_POOL
+
+
+@pytest.fixture
+def default_pool():
+    DEFAULT_POOL.clear()
+    yield DEFAULT_POOL
+    gc.collect()
+    DEFAULT_POOL.clear()
+
+
+def test_environment_pool():
+    pool = EnvironmentPool(max_idle=1)
+    created = []
+
+    def factory():
+        created.append(object())
+        return created[-1]
+
+    env_a1 = pool.acquire("a", factory)
+    env_a2 = pool.acquire("a", factory)
+    env_b = pool.acquire("b", factory)
+    assert env_a1 is env_a2
+    assert env_a1 is not env_b
+    assert len(created) == 2
+    assert pool.idle() == 0
+
+    pool.release("a")
+    assert "a" in pool and pool.idle() == 0
+
+    pool.release("a")
+    pool.release("b")
+    assert pool.idle() == 1
+
+    # the least recently used idle environment is evicted
+    assert "a" not in pool
+    assert "b" in pool
+    assert pool.acquire("b", factory) is env_b
+    assert len(created) == 2
+
+    pool.clear()
+    assert len(pool) == 1
+
+    with pytest.raises(AttributeError):
+        EnvironmentPool(max_idle=-1)
+
+
+def test_shared_environment(default_pool):
+    searchpath = os.path.join("tests", "data")
+    confgen_1 = NetworkConfGen(searchpath=searchpath, shared_environment=True)
+    confgen_2 = NetworkConfGen(searchpath=searchpath, shared_environment=True)
+    confgen_3 = NetworkConfGen(searchpath=searchpath, shared_environment=True, variable_start_string="<<",
+                               variable_end_string=">>")
+    confgen_4 = NetworkConfGen(searchpath=searchpath)
+
+    assert confgen_1._template_engine is confgen_2._template_engine
+    assert confgen_1._template_engine is not confgen_3._template_engine
+    assert confgen_1._template_engine is not confgen_4._template_engine
+    assert len(default_pool) == 2
+
+    # the compiled templates are shared
+    result = confgen_1.render_from_file(file="valid_syntax.txt", parameters={"hostname": "sw1"})
+    assert result.template_result == "!\nhostname sw1\n!"
+    template = confgen_1._template_engine.get_template("valid_syntax.txt")
+    assert confgen_2._template_engine.get_template("valid_syntax.txt") is template
+
+    result = confgen_3.render_from_string(template_content="<< value >>", parameters={"value": 1})
+    assert result.template_result == "1"
+
+    # the environment is idle if all instances are deleted
+    del confgen_1
+    gc.collect()
+    assert default_pool.idle() == 0
+
+    del confgen_2, confgen_3
+    gc.collect()
+    assert default_pool.idle() == 2
+
+    confgen_5 = NetworkConfGen(searchpath=searchpath, shared_environment=True)
+    assert confgen_5._template_engine.get_template("valid_syntax.txt") is template
+
+
+def test_shared_environment_with_render_options(default_pool):
+    # options of the render process don't affect the environment
+    confgen_1 = NetworkConfGen(shared_environment=True, memory_accounting=True)
+    confgen_2 = NetworkConfGen(shared_environment=True)
+    confgen_3 = NetworkConfGen(shared_environment=True, strict=True)
+
+    assert confgen_1._template_engine is confgen_2._template_engine
+    assert confgen_1._template_engine is not confgen_3._template_engine
+
+
+def test_shared_environment_with_macro_libraries(default_pool, tmpdir):
+    tmpdir.join("macros.j2").write("{% macro interface(name) %}interface {{ name }}{% endmacro %}")
+    tmpdir.join("other_macros.j2").write("{% macro interface(name) %}set interfaces {{ name }}{% endmacro %}")
+    tmpdir.join("template.txt").write("{{ m.interface(name) }}")
+
+    confgen_1 = NetworkConfGen(searchpath=str(tmpdir), shared_environment=True, macro_libraries={"m": "macros.j2"})
+    confgen_2 = NetworkConfGen(searchpath=str(tmpdir), shared_environment=True, macro_libraries={"m": "macros.j2"})
+    confgen_3 = NetworkConfGen(searchpath=str(tmpdir), shared_environment=True)
+    assert confgen_1._template_engine is confgen_2._template_engine
+    assert confgen_1._template_engine is not confgen_3._template_engine
+
+    # a different macro library uses another environment
+    confgen_3.add_macro_library("m", "other_macros.j2")
+    assert confgen_3._template_engine is not confgen_1._template_engine
+
+    result = confgen_1.render_from_file(file="template.txt", parameters={"name": "gi0/1"})
+    assert result.template_result == "interface gi0/1"
+    result = confgen_3.render_from_file(file="template.txt", parameters={"name": "ge-0/0/0"})
+    assert result.template_result == "set interfaces ge-0/0/0"
+
+
+def test_release_on_delete():
+    class Owner(object):
+        pass
+
+    pool = EnvironmentPool(max_idle=0)
+    owner_1 = Owner()
+    owner_2 = Owner()
+    pool.acquire("a", object)
+    pool.acquire("a", object)
+    pool.release_on_delete(owner_1, "a")
+    release = pool.release_on_delete(owner_2, "a")
+
+    # released only once (explicitly or if the object is deleted)
+    release()
+    del owner_2
+    gc.collect()
+    assert "a" in pool
+
+    del owner_1
+    gc.collect()
+    assert "a" not in pool
@@ -0,0 +1,91 @@
+import logging
+import os
+from networkconfgen import NetworkConfGen
+from networkconfgen.error_log import RateLimitedErrorLog, ErrorReport
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def create_logger(name, level):
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    logger.propagate = False
+    handler = RecordingHandler()
+    logger.handlers = [handler]
+    return logger, handler
+
+
+def test_rate_limited_error_log(monkeypatch):
+    logger, handler = create_logger("networkconfgen.test_error_log", logging.INFO)
+    error_log = RateLimitedErrorLog(logger, burst=2, interval=60)
+    now = [1000.0]
+    monkeypatch.setattr("networkconfgen.error_log.time.time", lambda: now[0])
+
+    results = [error_log.error(("a.txt", "error"), "error") for _ in range(5)]
+    results.append(error_log.error(("b.txt", "error"), "error"))
+
+    assert results == [True, True, False, False, False, True]
+    assert [e.getMessage() for e in handler.records] == [
+        "error", "error (further errors of this kind are suppressed for 60 seconds)", "error"
+    ]
+
+    # next interval
+    now[0] += 60
+    assert error_log.error(("a.txt", "error"), "error") is True
+    assert handler.records[-1].getMessage() == "error (3 similar errors suppressed)"
+
+    # all errors are logged on debug level
+    logger.setLevel(logging.DEBUG)
+    assert all(error_log.error(("a.txt", "error"), "error") for _ in range(5))
+
+    logger.setLevel(logging.CRITICAL)
+    assert error_log.error(("c.txt", "error"), "error") is False
+
+
+def test_render_errors_are_rate_limited(monkeypatch):
+    logger, handler = create_logger("networkconfgen", logging.INFO)
+    try:
+        confgen = NetworkConfGen(searchpath=os.path.join("tests", "data"), strict=True)
+        for _ in range(20):
+            result = confgen.render_from_file("valid_syntax.txt", parameters={})
+            assert result.error_text == "Undefined Variable ('hostname' is undefined)"
+
+        assert len(handler.records) == 5
+
+    finally:
+        logger.handlers = []
+        logger.propagate = True
+        logger.setLevel(logging.NOTSET)
+
+
+def test_error_report():
+    confgen = NetworkConfGen(searchpath=os.path.join("tests", "data"), strict=True)
+    jobs = [("valid_syntax.txt", {"hostname": "sw1"}), ("valid_syntax.txt", {}), ("invalid_syntax.txt", {}),
+            ("valid_syntax.txt", {})]
+    error_report = ErrorReport(max_examples=1)
+
+    results = list(confgen.render_batch(jobs, error_report=error_report))
+
+    assert len(results) == 4
+    assert error_report.results == 4
+    assert error_report.total == 3
+    assert error_report.errors[0] == {
+        "template_file_name": "valid_syntax.txt",
+        "error_text": "Undefined Variable ('hostname' is undefined)",
+        "count": 2,
+        "examples": [1]
+    }
+    assert error_report.errors[1]["template_file_name"] == "invalid_syntax.txt"
+    assert error_report.to_json()["total"] == 3
+    assert str(error_report).splitlines()[:3] == [
+        "3 of 4 results with render errors",
+        "     2  valid_syntax.txt: Undefined Variable ('hostname' is undefined)",
+        "        e.g. 1"
+    ]
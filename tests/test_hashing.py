@@ -0,0 +1,71 @@
+import json
+from collections import OrderedDict
+import pytest
+from networkconfgen import parameter_digest
+
+
+def test_parameter_digest_is_order_independent():
+    param_a = OrderedDict([("hostname", "sw1"), ("vlans", [1, 2, 3]), ("interfaces", {"gi0/1": {"vlan": 10}})])
+    param_b = OrderedDict([("interfaces", {"gi0/1": {"vlan": 10}}), ("vlans", [1, 2, 3]), ("hostname", "sw1")])
+
+    assert parameter_digest(param_a) == parameter_digest(param_b)
+    assert parameter_digest({"a": {1, 2, 3}}) == parameter_digest({"a": {3, 2, 1}})
+
+
+def test_parameter_digest_distinguishes_values():
+    # same textual representation but different types or structures must result in different digests
+    test_data = [
+        {"value": 1},
+        {"value": "1"},
+        {"value": 1.0},
+        {"value": True},
+        {"value": None},
+        {"value": [1]},
+        {"value": [[1]]},
+        {"value": {"1": 1}},
+        {"value": ["a", "b"]},
+        {"value": ["ab"]},
+        {"value": ["b", "a"]},
+        # byte strings are text on python 2.7
+        {"value": bytearray(b"1")},
+    ]
+
+    digests = set(parameter_digest(e) for e in test_data)
+    assert len(digests) == len(test_data)
+
+    # lists and tuples have the same digest
+    assert parameter_digest({"value": [1, 2]}) == parameter_digest({"value": (1, 2)})
+
+
+def test_parameter_digest_with_variables():
+    param = {"hostname": "sw1", "vlans": [1, 2, 3], "unused": {"large": "data"}}
+
+    assert parameter_digest(param, variables=["hostname", "vlans"]) == \
+        parameter_digest({"hostname": "sw1", "vlans": [1, 2, 3]})
+    assert parameter_digest(param, variables=["hostname"]) != parameter_digest(param, variables=["vlans"])
+    assert parameter_digest(param, variables=[]) == parameter_digest({})
+
+
+def test_parameter_digest_is_stable():
+    # identical digests on all python versions (e.g. unicode strings and long integers of python 2.7)
+    param = json.loads('{"hostname": "sw1", "vlans": [10, 20], "big": 12345678901234567890, "name": "caf\\u00e9"}')
+
+    assert parameter_digest(param) == "d25d5602af492a66a6dbfabfa24be170707c03aee46ee7d2f8e2323e583f5eab"
+
+
+def test_parameter_digest_algorithm():
+    param = {"hostname": "sw1"}
+
+    assert len(parameter_digest(param)) == 64
+    assert len(parameter_digest(param, algorithm="sha1")) == 40
+
+
+def test_invalid_parameters_for_parameter_digest():
+    with pytest.raises(AttributeError):
+        parameter_digest("FooBar")
+
+    with pytest.raises(TypeError):
+        parameter_digest({"value": object()})
+
+    with pytest.raises(TypeError):
+        parameter_digest({("tuple", "key"): 1})
@@ -0,0 +1,91 @@
+import pickle
+import pytest
+from networkconfgen import NetworkConfGen
+from networkconfgen.hashing import parameter_digest
+from networkconfgen.layers import LayeredParameters, add_layer, to_dict
+
+GLOBAL_PARAMETERS = {
+    "ntp_servers": ["10.0.0.1", "10.0.0.2"],
+    "snmp": {"community": "public", "location": "unknown", "contact": {"name": "noc", "mail": "noc@example.com"}},
+    "domain": "example.com"
+}
+SITE_PARAMETERS = {
+    "ntp_servers": ["10.1.0.1"],
+    "snmp": {"location": "site1", "contact": {"name": "site-noc"}},
+}
+DEVICE_PARAMETERS = {
+    "hostname": "sw1",
+    "snmp": {"community": "private"}
+}
+
+
+def test_layered_parameters():
+    site = LayeredParameters(GLOBAL_PARAMETERS, SITE_PARAMETERS)
+    device = add_layer(site, DEVICE_PARAMETERS)
+    expected_result = {
+        "ntp_servers": ["10.1.0.1"],
+        "snmp": {"community": "private", "location": "site1", "contact": {"name": "site-noc",
+                                                                          "mail": "noc@example.com"}},
+        "domain": "example.com",
+        "hostname": "sw1"
+    }
+
+    assert to_dict(device) == expected_result
+    assert device == expected_result
+    assert len(device) == 4
+    assert sorted(device.keys()) == ["domain", "hostname", "ntp_servers", "snmp"]
+    assert "hostname" in device
+    assert "hostname" not in site
+    assert device["snmp"]["contact"]["mail"] == "noc@example.com"
+    assert device.get("missing", "default") == "default"
+
+    with pytest.raises(KeyError):
+        device["missing"]
+
+    # the layers are not modified
+    assert SITE_PARAMETERS["snmp"] == {"location": "site1", "contact": {"name": "site-noc"}}
+    assert "community" not in SITE_PARAMETERS["snmp"]
+
+    # values, that are not part of the device layer, are shared with the site instance
+    other_device = add_layer(site, {"hostname": "sw2"})
+    assert other_device["snmp"] is site["snmp"]
+    assert device["snmp"] is not site["snmp"]
+
+
+def test_layered_parameters_digest_and_pickle():
+    device = add_layer(LayeredParameters(GLOBAL_PARAMETERS, SITE_PARAMETERS), DEVICE_PARAMETERS)
+
+    assert parameter_digest(device) == parameter_digest(to_dict(device))
+    assert to_dict(pickle.loads(pickle.dumps(device))) == to_dict(device)
+
+
+def test_invalid_layered_parameters():
+    with pytest.raises(AttributeError):
+        LayeredParameters(GLOBAL_PARAMETERS, "invalid")
+
+    assert to_dict(LayeredParameters()) == {}
+
+
+def test_render_with_layered_parameters():
+    confgen = NetworkConfGen()
+    device = add_layer(LayeredParameters(GLOBAL_PARAMETERS, SITE_PARAMETERS), DEVICE_PARAMETERS)
+    template = "hostname {{ hostname }}.{{ domain }}\n" \
+               "snmp-server community {{ snmp.community }}\n" \
+               "snmp-server location {{ snmp['location'] }}\n" \
+               "snmp-server contact {{ snmp.contact.name }}\n" \
+               "{% for server in ntp_servers %}ntp server {{ server }}\n{% endfor %}" \
+               "{% for key, value in snmp.contact.items() %}{{ key }}={{ value }} {% endfor %}"
+
+    result = confgen.render_from_string(template_content=template, parameters=device)
+
+    assert result.render_error is False, result.error_text
+    assert result.template_result == "hostname sw1.example.com\n" \
+                                     "snmp-server community private\n" \
+                                     "snmp-server location site1\n" \
+                                     "snmp-server contact site-noc\n" \
+                                     "ntp server 10.1.0.1\n" \
+                                     "name=site-noc mail=noc@example.com "
+    assert "_ERROR_" not in device
+
+    projected = confgen.project_parameters(device, template_content="{{ snmp.location }}")
+    assert projected == {"snmp": {"location": "site1"}}
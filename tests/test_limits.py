@@ -0,0 +1,195 @@
+import tracemalloc
+import pytest
+from networkconfgen import NetworkConfGen
+from networkconfgen.limits import RenderLimits, MemoryTracker
+
+
+def test_loop_templates_with_limit_loop_filter():
+    # the loop limit filter is added to every for loop, the result must not be affected
+    confgen = NetworkConfGen(render_limits=RenderLimits(max_loop_iterations=1000))
+    param = {"values": [1, 2, 3], "interfaces": {"gi0/1": 10}, "tree": [{"name": "a", "children": [{"name": "b"}]}]}
+    test_templates = {
+        "{% for e in values %}{{ e }}{% endfor %}": "123",
+        "{% for e in values if e > 1 %}{{ e }}{% endfor %}": "23",
+        "{% for e in values|reverse %}{{ e }}{% else %}empty{% endfor %}": "321",
+        "{% for e in [] %}{{ e }}{% else %}empty{% endfor %}": "empty",
+        "{% for k, v in interfaces.items() %}{{ k }}={{ v }}{% endfor %}": "gi0/1=10",
+        "{% for (a, b) in [(1, 2), (3, 4)] %}{{ a + b }}{% endfor %}": "37",
+        "{% for e in range(3) %}{% for f in values %}{{ loop.index }}{% endfor %}{% endfor %}": "123123123",
+        "{% for e in tree recursive %}{{ e.name }}{{ loop(e.children or []) }}{% endfor %}": "ab",
+        "{% for e in tree if e recursive %}{{ loop.cycle('x', 'y') }}{{ loop((e.children or [])|list) }}{% endfor %}":
+            "xx",
+        "{% for e in tree recursive %}{% for f in values %}{{ loop.index }}{% endfor %}"
+        "{{ loop(e.get('children', [])) }}{% endfor %}": "123123",
+        "{% for e in values %}{{ e in values }}{% endfor %}": "TrueTrueTrue",
+        "{% set x = ['for', 'in'] %}{% for e in x %}{{ e }}{% endfor %}": "forin",
+    }
+
+    for template, expected_result in test_templates.items():
+        result = confgen.render_from_string(template_content=template, parameters=dict(param))
+        assert result.render_error is False, result.error_text
+        assert result.template_result == expected_result
+
+    # line statements
+    confgen = NetworkConfGen(line_statement_prefix="#", render_limits=RenderLimits(max_loop_iterations=1000))
+    result = confgen.render_from_string(template_content="# for e in values\n{{ e }}\n# endfor",
+                                        parameters=dict(param))
+    assert result.template_result == "1\n2\n3\n"
+
+
+def test_max_loop_iterations():
+    confgen = NetworkConfGen()
+    template = "{% for e in values %}{% for f in values %}{{ f }}{% endfor %}{% endfor %}"
+    param = {"values": list(range(10))}
+
+    result = confgen.render_from_string(template_content=template, parameters=dict(param),
+                                        render_limits=RenderLimits(max_loop_iterations=110))
+    assert result.render_error is False
+
+    result = confgen.render_from_string(template_content=template, parameters=dict(param),
+                                        render_limits=RenderLimits(max_loop_iterations=109))
+    assert result.render_error is True
+    assert result.template_result is None
+    assert result.error_text == "Render Limit Exceeded (maximum of 109 loop iterations exceeded)"
+
+    # loops without output are also limited
+    template = "{% set ns = namespace(counter=0) %}{% for e in range(100000) %}{% set ns.counter = e %}{% endfor %}"
+    result = confgen.render_from_string(template_content=template, parameters={},
+                                        render_limits=RenderLimits(max_loop_iterations=100))
+    assert result.error_text == "Render Limit Exceeded (maximum of 100 loop iterations exceeded)"
+
+
+def test_max_loop_iterations_with_recursive_loops():
+    confgen = NetworkConfGen()
+    template = "{% for e in tree recursive %}{{ e.name }}{% if e.children %}({{ loop(e.children) }}){% endif %}" \
+               "{% endfor %}"
+
+    def tree(depth):
+        return [{"name": "n%d" % depth, "children": tree(depth - 1) if depth > 1 else []} for _ in range(2)]
+
+    # 2 + 4 + 8 + 16 iterations
+    result = confgen.render_from_string(template_content=template, parameters={"tree": tree(4)},
+                                        render_limits=RenderLimits(max_loop_iterations=30))
+    assert result.render_error is False
+    assert result.template_result.count("n1") == 16
+
+    # the iterations of the recursive calls are counted
+    result = confgen.render_from_string(template_content=template, parameters={"tree": tree(4)},
+                                        render_limits=RenderLimits(max_loop_iterations=29))
+    assert result.error_text == "Render Limit Exceeded (maximum of 29 loop iterations exceeded)"
+
+    result = confgen.render_from_string(template_content=template, parameters={"tree": tree(12)},
+                                        render_limits=RenderLimits(max_loop_iterations=100))
+    assert result.error_text == "Render Limit Exceeded (maximum of 100 loop iterations exceeded)"
+
+
+def test_max_output_bytes():
+    confgen = NetworkConfGen(render_limits=RenderLimits(max_output_bytes=100))
+
+    result = confgen.render_from_string(template_content="{{ value }}", parameters={"value": "a" * 100})
+    assert result.render_error is False
+
+    result = confgen.render_from_string(template_content="{{ value }}", parameters={"value": "a" * 101})
+    assert result.render_error is True
+    assert result.error_text == "Render Limit Exceeded (maximum output size of 100 bytes exceeded)"
+
+    # the size is calculated based on the UTF-8 encoded result
+    result = confgen.render_from_string(template_content="{{ value }}", parameters={"value": "ä" * 51})
+    assert result.render_error is True
+
+
+def test_timeout(monkeypatch):
+    current_time = [1000.0]
+
+    def time_mock():
+        current_time[0] += 1
+        return current_time[0]
+
+    monkeypatch.setattr("networkconfgen.limits.time.time", time_mock)
+    confgen = NetworkConfGen(render_limits=RenderLimits(timeout=10))
+    template = "{% for e in values %}{{ e }}{% endfor %}"
+
+    result = confgen.render_from_string(template_content=template, parameters={"values": list(range(5))})
+    assert result.render_error is False
+
+    result = confgen.render_from_string(template_content=template, parameters={"values": list(range(20))})
+    assert result.render_error is True
+    assert result.error_text == "Render Limit Exceeded (timeout of 10 seconds exceeded)"
+
+
+def test_render_limits_with_file(tmpdir):
+    tmpdir.join("template.txt").write("{% for e in values %}{{ e }}{% endfor %}")
+    confgen = NetworkConfGen(searchpath=str(tmpdir), render_limits=RenderLimits(max_loop_iterations=5))
+
+    result = confgen.render_from_file(file="template.txt", parameters={"values": list(range(5))})
+    assert result.template_result == "01234"
+
+    result = confgen.render_from_file(file="template.txt", parameters={"values": list(range(6))})
+    assert result.error_text == "Render Limit Exceeded (maximum of 5 loop iterations exceeded)"
+
+    # limits of the render process take precedence
+    result = confgen.render_from_file(file="template.txt", parameters={"values": list(range(6))},
+                                      render_limits=RenderLimits(max_loop_iterations=6))
+    assert result.template_result == "012345"
+
+
+def test_invalid_render_limits():
+    with pytest.raises(AttributeError):
+        RenderLimits(timeout=0)
+
+    with pytest.raises(AttributeError):
+        RenderLimits(max_output_bytes=-1)
+
+    with pytest.raises(AttributeError):
+        RenderLimits(max_memory_bytes=0)
+
+
+def test_memory_accounting():
+    template = "{% for i in range(10) %}{% set x = 'x' * size %}{{ x | length }}{% endfor %}"
+
+    confgen = NetworkConfGen()
+    result = confgen.render_from_string(template_content=template, parameters={"size": 100000})
+    assert result.render_error is False
+    assert result.peak_memory is None
+
+    confgen = NetworkConfGen(memory_accounting=True)
+    result = confgen.render_from_string(template_content=template, parameters={"size": 100000})
+    assert result.render_error is False
+    assert result.peak_memory >= 100000
+    assert not tracemalloc.is_tracing()
+
+
+def test_max_memory_bytes():
+    template = "{% set values = [] %}{% for i in range(100) %}{% set _ = values.append('x' * size) %}{% endfor %}"
+    confgen = NetworkConfGen(render_limits=RenderLimits(max_memory_bytes=1000000))
+
+    result = confgen.render_from_string(template_content=template, parameters={"size": 100000})
+    assert result.render_error is True
+    assert result.error_text == "Memory Limit Exceeded (maximum memory allocation of 1000000 bytes exceeded)"
+    assert result.peak_memory > 1000000
+    assert not tracemalloc.is_tracing()
+
+    result = confgen.render_from_string(template_content="{{ 'x' * 1000 }}", parameters={})
+    assert result.render_error is False
+    assert result.peak_memory < 1000000
+
+
+def test_concurrent_memory_trackers():
+    tracker_1 = MemoryTracker()
+    tracker_2 = MemoryTracker()
+
+    tracker_1.start()
+    data_1 = [bytearray(1000) for _ in range(500)]
+    tracker_2.start()
+    data_2 = [bytearray(1000) for _ in range(5000)]
+    assert tracker_2.current() > 4000000
+
+    # the memory of the first render process is released, tracing continues for the second one
+    del data_1
+    assert tracker_1.stop() > 400000
+    assert tracemalloc.is_tracing()
+    assert tracker_2.current() > 4000000
+
+    assert tracker_2.stop() > 4000000
+    assert not tracemalloc.is_tracing()
+    del data_2
@@ -0,0 +1,99 @@
+import os
+import stat
+from networkconfgen import NetworkConfGen, NetworkConfGenResult
+from networkconfgen.diff import config_hash
+from networkconfgen.output_store import OutputStore, split_chunks, write_atomic, FILE_MODE
+
+ACCESS_SWITCH_TEMPLATE = "hostname {{ hostname }}\n" \
+                         "!\n" \
+                         "interface GigabitEthernet0/1\n" \
+                         " description uplink\n" \
+                         " switchport mode trunk\n" \
+                         "!\n" \
+                         "end\n"
+
+
+def count_objects(path):
+    return sum(len(files) for _, _, files in os.walk(os.path.join(path, "objects")))
+
+
+def test_split_chunks():
+    config = "hostname sw1\n!\ninterface Gi0/1\n description test\n\n shutdown\n!\nend"
+
+    assert split_chunks(config) == ["hostname sw1\n", "!\n", "interface Gi0/1\n description test\n\n shutdown\n",
+                                    "!\n", "end"]
+    assert "".join(split_chunks(config)) == config
+    assert split_chunks("") == []
+
+
+def test_output_store(tmpdir):
+    confgen = NetworkConfGen()
+    path = str(tmpdir.join("store"))
+    store = OutputStore(path)
+
+    results = dict((device_id, confgen.render_from_string(ACCESS_SWITCH_TEMPLATE, {"hostname": "sw"}))
+                   for device_id in ("sw1", "sw2", "site1/sw3"))
+    results["sw4"] = confgen.render_from_string(ACCESS_SWITCH_TEMPLATE, {"hostname": "sw4"})
+    results["sw5"] = confgen.render_from_string("{% if %}", {})
+
+    for device_id, result in results.items():
+        content_hash = store.put(device_id, result)
+        assert content_hash == result.template_result_hash
+
+    # identical configurations are stored once
+    assert count_objects(path) == 2
+    assert store.devices() == ["site1/sw3", "sw1", "sw2", "sw4", "sw5"]
+    assert store.get("site1/sw3") == results["site1/sw3"].template_result
+    assert store.get("sw5") is None
+    assert store.get("missing") is None
+    assert store.manifest("sw5")["error_text"] == results["sw5"].error_text
+
+    devices_by_hash = store.devices_by_hash()
+    assert devices_by_hash[results["sw1"].template_result_hash] == ["site1/sw3", "sw1", "sw2"]
+    assert devices_by_hash[results["sw4"].template_result_hash] == ["sw4"]
+
+    assert store.changed("sw1", results["sw1"]) is False
+    assert store.changed("sw1", results["sw4"]) is True
+    assert store.changed("sw1", results["sw1"].template_result_hash) is False
+    assert store.changed("sw5", results["sw5"]) is True
+    assert store.changed("missing", results["sw1"]) is True
+
+    # the store can be opened again
+    assert OutputStore(path).get_hash("sw4") == results["sw4"].template_result_hash
+    assert not [name for name in os.listdir(os.path.join(path, "manifests")) if name.startswith(".tmp-")]
+
+
+def test_chunked_output_store(tmpdir):
+    confgen = NetworkConfGen()
+    path = str(tmpdir.join("store"))
+    store = OutputStore(path, chunked=True)
+
+    for i in range(10):
+        result = confgen.render_from_string(ACCESS_SWITCH_TEMPLATE, {"hostname": "sw%d" % i})
+        store.put("sw%d" % i, result)
+
+    # 10 hostname blocks and the shared blocks
+    assert count_objects(path) == 13
+
+    for i in range(10):
+        config = store.get("sw%d" % i)
+        assert config == ACCESS_SWITCH_TEMPLATE.replace("{{ hostname }}", "sw%d" % i).rstrip("\n")
+        assert store.get_hash("sw%d" % i) == config_hash(config)
+
+    result = NetworkConfGenResult()
+    result.template_result = "hostname sw1"
+    assert store.changed("sw1", result) is True
+
+
+def test_write_atomic_permissions(tmpdir, monkeypatch):
+    def umask_mock(mask):
+        raise AssertionError("the umask of the process must not be changed")
+
+    monkeypatch.setattr("networkconfgen.output_store.os.umask", umask_mock)
+    path = str(tmpdir.join("config.txt"))
+    write_atomic(path, b"hostname sw1\n")
+
+    with open(path, "rb") as f:
+        assert f.read() == b"hostname sw1\n"
+
+    assert stat.S_IMODE(os.stat(path).st_mode) == FILE_MODE
@@ -0,0 +1,87 @@
+import os
+import tarfile
+import zipfile
+import pytest
+from networkconfgen import NetworkConfGen
+from networkconfgen.output_writer import OutputWriter
+
+
+def render_results(count):
+    confgen = NetworkConfGen()
+    results = [("site%d/sw%d.txt" % (i % 2, i), confgen.render_from_string("hostname {{ hostname }}",
+                                                                           {"hostname": "sw%d" % i}))
+               for i in range(count)]
+    results.append(("broken.txt", confgen.render_from_string("{% if %}", {})))
+    return results
+
+
+def test_output_writer_directory(tmpdir):
+    target = str(tmpdir.join("output"))
+
+    with OutputWriter(target, batch_size=4, queue_size=8) as writer:
+        writer.write_all(render_results(20))
+
+    assert writer.written == 20
+    assert writer.skipped == 1
+    assert sorted(os.listdir(target)) == ["site0", "site1"]
+    assert len(os.listdir(os.path.join(target, "site1"))) == 10
+
+    with open(os.path.join(target, "site1", "sw3.txt")) as f:
+        assert f.read() == "hostname sw3"
+
+    with OutputWriter(target, write_errors=True) as writer:
+        writer.write_all(render_results(0))
+
+    with open(os.path.join(target, "broken.txt")) as f:
+        assert f.read().startswith("Template Syntax Exception")
+
+
+@pytest.mark.parametrize("archive, compression", [("tar", None), ("tar", "gz"), ("zip", None), ("zip", "deflate")])
+def test_output_writer_archive(tmpdir, archive, compression):
+    target = str(tmpdir.join("configs.%s" % archive))
+
+    writer = OutputWriter(target, archive=archive, compression=compression)
+    writer.write_all(render_results(10))
+
+    # the archive is only visible after the writer is closed
+    assert not os.path.exists(target)
+    writer.close()
+    assert os.listdir(str(tmpdir)) == ["configs.%s" % archive]
+
+    if archive == "tar":
+        with tarfile.open(target) as f:
+            assert len(f.getnames()) == 10
+            assert f.extractfile("site0/sw4.txt").read() == b"hostname sw4"
+
+    else:
+        with zipfile.ZipFile(target) as f:
+            assert len(f.namelist()) == 10
+            assert f.read("site0/sw4.txt") == b"hostname sw4"
+
+
+def test_output_writer_abort(tmpdir):
+    target = str(tmpdir.join("configs.tar"))
+
+    with pytest.raises(ValueError):
+        with OutputWriter(target, archive="tar") as writer:
+            writer.write_all(render_results(10))
+            raise ValueError("render run failed")
+
+    assert os.listdir(str(tmpdir)) == []
+
+
+def test_invalid_output_writer(tmpdir):
+    with pytest.raises(AttributeError):
+        OutputWriter(str(tmpdir.join("configs.rar")), archive="rar")
+
+    with pytest.raises(AttributeError):
+        OutputWriter(str(tmpdir.join("configs.zip")), archive="zip", compression="xz")
+
+    result = render_results(1)[0][1]
+    with OutputWriter(str(tmpdir)) as writer:
+        for name in ("../sw1.txt", "/tmp/sw1.txt", "", None):
+            with pytest.raises(AttributeError):
+                writer.write(name, result)
+
+    with pytest.raises(AttributeError):
+        writer.write("sw1.txt", result)
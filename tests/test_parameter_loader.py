@@ -0,0 +1,61 @@
+import json
+import os
+import pytest
+from networkconfgen import NetworkConfGen
+from networkconfgen.parameter_loader import load_parameters, iter_parameters, iter_render_jobs
+
+
+def test_load_parameters():
+    json_parameters = load_parameters(os.path.join("examples", "example_parameters.json"))
+    yaml_parameters = load_parameters(os.path.join("examples", "example_parameters.yaml"))
+
+    assert json_parameters["hostname"] == "MyHostname"
+    assert yaml_parameters == json_parameters
+
+
+def test_load_parameters_with_invalid_format(tmpdir):
+    path = tmpdir.join("parameters.txt")
+    path.write("{}")
+
+    with pytest.raises(AttributeError):
+        load_parameters(str(path))
+
+    with pytest.raises(AttributeError):
+        load_parameters(str(path), file_format="xml")
+
+    assert load_parameters(str(path), file_format="json") == {}
+
+
+def test_iter_parameters(tmpdir):
+    devices = [{"hostname": "sw%d" % i} for i in range(5)]
+
+    ndjson_file = tmpdir.join("parameters.ndjson")
+    ndjson_file.write("\n".join(json.dumps(e) for e in devices) + "\n\n")
+    yaml_file = tmpdir.join("parameters.yml")
+    yaml_file.write("---\n" + "\n---\n".join("hostname: %s" % e["hostname"] for e in devices))
+    json_file = tmpdir.join("parameters.json")
+    json_file.write(json.dumps(devices))
+
+    for path in (ndjson_file, yaml_file, json_file):
+        assert list(iter_parameters(str(path))) == devices
+
+    # values of a JSON dictionary
+    json_file.write(json.dumps(dict((e["hostname"], e) for e in devices)))
+    assert sorted(iter_parameters(str(json_file)), key=lambda e: e["hostname"]) == devices
+
+    with pytest.raises(AttributeError):
+        load_parameters(str(ndjson_file))
+
+
+def test_iter_render_jobs(tmpdir):
+    path = tmpdir.join("parameters.ndjson")
+    path.write('{"hostname": "sw1"}\n{"hostname": "sw2"}\n')
+    confgen = NetworkConfGen(searchpath=os.path.join("tests", "data"))
+
+    jobs = iter_render_jobs(str(path), "valid_syntax.txt")
+    results = [e.template_result for e in confgen.render_batch(jobs)]
+
+    assert results == ["!\nhostname sw1\n!", "!\nhostname sw2\n!"]
+
+    jobs = iter_render_jobs(str(path), lambda e: "%s.txt" % e["hostname"])
+    assert [e[0] for e in jobs] == ["sw1.txt", "sw2.txt"]
@@ -0,0 +1,79 @@
+import os
+import pickle
+import pytest
+from networkconfgen.parameter_store import ParameterStore
+
+
+def test_create_and_read_parameter_store(tmpdir):
+    path = str(tmpdir.join("parameters.store"))
+    parameters = {
+        "sw1": {"hostname": "sw1", "site": "site2"},
+        "sw2": {"hostname": "sw2"}
+    }
+    shared = {"site": "site1", "ntp_servers": ["10.1.1.1", "10.1.1.2"]}
+
+    with ParameterStore.create(path, parameters, shared=shared) as store:
+        assert len(store) == 2
+        assert sorted(store.keys()) == ["sw1", "sw2"]
+        assert "sw1" in store
+        assert "sw3" not in store
+        assert store.shared == shared
+
+        # key parameters take precedence over the shared parameters
+        assert store.get("sw1") == {"hostname": "sw1", "site": "site2", "ntp_servers": ["10.1.1.1", "10.1.1.2"]}
+        assert store["sw2"] == {"hostname": "sw2", "site": "site1", "ntp_servers": ["10.1.1.1", "10.1.1.2"]}
+
+        with pytest.raises(KeyError):
+            store.get("sw3")
+
+        # only the path is pickled, the store is opened again
+        copy = pickle.loads(pickle.dumps(store))
+        assert copy.path == os.path.abspath(path)
+        assert copy.get("sw1") == store.get("sw1")
+        copy.close()
+
+
+def test_create_parameter_store_from_generator(tmpdir):
+    path = str(tmpdir.join("parameters.store"))
+
+    with ParameterStore.create(path, (("sw%d" % i, {"id": i}) for i in range(100))) as store:
+        assert len(store) == 100
+        assert store.shared == {}
+        assert store.get("sw42") == {"id": 42}
+
+
+def test_invalid_parameter_store(tmpdir):
+    path = tmpdir.join("invalid.store")
+    path.write("this is not a parameter store")
+
+    with pytest.raises(ValueError):
+        ParameterStore(str(path))
+
+
+def test_parameter_store_with_any_key(tmpdir):
+    path = str(tmpdir.join("parameters.store"))
+
+    # the shared parameters are stored outside of the index
+    with ParameterStore.create(path, {"__shared__": {"hostname": "sw1"}}, shared={"site": "site1"}) as store:
+        assert store.keys() == ["__shared__"]
+        assert len(store) == 1
+        assert "__shared__" in store
+        assert store.get("__shared__") == {"hostname": "sw1", "site": "site1"}
+        assert store.shared == {"site": "site1"}
+
+
+def test_truncated_parameter_store(tmpdir):
+    path = str(tmpdir.join("parameters.store"))
+    ParameterStore.create(path, {"sw1": {"hostname": "sw1"}}, shared={"site": "site1"}).close()
+    with open(path, "rb") as f:
+        data = f.read()
+
+    for size in (0, 10, 40, len(data) - 1):
+        truncated_path = str(tmpdir.join("truncated.store"))
+        with open(truncated_path, "wb") as f:
+            f.write(data[:size])
+
+        with pytest.raises(ValueError) as ex:
+            ParameterStore(truncated_path)
+
+        assert "is not a valid parameter store" in str(ex.value)
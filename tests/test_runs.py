@@ -0,0 +1,87 @@
+import os
+import pytest
+from networkconfgen import NetworkConfGen
+from networkconfgen.diff import config_hash
+from networkconfgen.runs import RenderJournal, RenderRun, shard_of
+
+
+def create_jobs(count):
+    jobs = [("sw%d" % i, "valid_syntax.txt", {"hostname": "sw%d" % i}) for i in range(count)]
+    jobs.append(("broken", "invalid_syntax.txt", {}))
+    return jobs
+
+
+def test_shard_of():
+    assert shard_of("sw1", 4) == shard_of("sw1", 4)
+    assert shard_of("sw1", 1) == 0
+
+    shards = [shard_of("sw%d" % i, 4) for i in range(1000)]
+    assert set(shards) == {0, 1, 2, 3}
+    assert min(shards.count(e) for e in range(4)) > 200
+
+
+def test_sharded_render_run(tmpdir):
+    confgen = NetworkConfGen(searchpath=os.path.join("tests", "data"))
+    jobs = create_jobs(50)
+    rendered_devices = []
+
+    for shard in range(3):
+        run = RenderRun(confgen, str(tmpdir.join("journal_%d.ndjson" % shard)), shard=shard, shard_count=3)
+        results = list(run.run(iter(jobs)))
+        rendered_devices.extend(device_id for device_id, _ in results)
+
+        for device_id, result in results:
+            if device_id != "broken":
+                assert result.template_result == "!\nhostname %s\n!" % device_id
+
+    # every device is rendered by exactly one shard
+    assert sorted(rendered_devices) == sorted(e[0] for e in jobs)
+
+
+def test_resume_render_run(tmpdir):
+    confgen = NetworkConfGen(searchpath=os.path.join("tests", "data"))
+    journal_path = str(tmpdir.join("journal.ndjson"))
+    jobs = create_jobs(20)
+
+    run = RenderRun(confgen, journal_path, processes=2, chunksize=3)
+    results = run.run(jobs)
+    for _ in range(10):
+        next(results)
+
+    # abort the run, the last yielded result is not processed by the caller
+    results.close()
+    assert run.rendered == 9
+
+    # simulate a crash while writing an entry
+    with open(journal_path, "a") as f:
+        f.write('{"device_id": "sw9", "ha')
+
+    run = RenderRun(confgen, journal_path)
+    results = list(run.run(jobs))
+
+    assert [device_id for device_id, _ in results] == ["sw%d" % i for i in range(9, 20)] + ["broken"]
+    assert run.skipped == 9
+    assert run.rendered == 12
+
+    with RenderJournal(journal_path) as journal:
+        assert sorted(journal.completed.keys()) == sorted("sw%d" % i for i in range(20))
+        assert journal.completed["sw1"] == config_hash("!\nhostname sw1\n!")
+        assert list(journal.failed.keys()) == ["broken"]
+
+    with open(journal_path) as f:
+        assert len([line for line in f if line.strip()]) == 22
+
+    # devices with render errors are rendered again
+    run = RenderRun(confgen, journal_path)
+    assert [device_id for device_id, _ in run.run(jobs)] == ["broken"]
+    assert run.skipped == 20
+
+
+def test_invalid_render_run(tmpdir):
+    confgen = NetworkConfGen()
+
+    with pytest.raises(AttributeError):
+        RenderRun(confgen, str(tmpdir.join("journal.ndjson")), shard=3, shard_count=3)
+
+    with pytest.raises(AttributeError):
+        RenderRun(confgen, str(tmpdir.join("journal.ndjson")), shard_count=0)
@@ -0,0 +1,46 @@
+import pytest
+from networkconfgen import custom_filters
+from networkconfgen.sanitize import SanitizeRule, get_rule
+
+
+def test_sanitize_rule():
+    rule = SanitizeRule("abc_", replacements={" ": "_", "d": "D"}, max_length=6)
+
+    assert rule("a b-c") == "a_bc"
+    assert rule("abcdabcd") == "abcDab"
+    assert rule("aä€b") == "ab"
+    assert rule(123) == ""
+    assert rule("a bä".encode("utf-8")) == "a_b"
+
+    rule = SanitizeRule("abc", replacement="-", case="upper")
+    assert rule("abxcä") == "AB-C-"
+
+    with pytest.raises(AttributeError):
+        SanitizeRule("abc", case="title")
+
+
+def test_vendor_rules():
+    test_values = [
+        ("vlan_name", "cisco_ios", "Data Network (Floor 1)", "Data_Network_Floor_1"),
+        ("vlan_name", "cisco_ios", "x" * 40, "x" * 32),
+        ("description", "cisco_ios", "uplink to core?\tswitch", "uplink to coreswitch"),
+        ("hostname", "cisco_ios", "Core Switch_01.example", "Core-Switch-01example"),
+        ("description", "juniper_junos", 'uplink "core"', "uplink 'core'"),
+        ("hostname", "juniper_junos", "Core Switch_01", "core-switch-01"),
+    ]
+
+    for kind, vendor, value, expected_result in test_values:
+        assert get_rule(kind, vendor)(value) == expected_result
+        assert custom_filters.sanitize(value, kind, vendor) == expected_result
+
+    with pytest.raises(KeyError):
+        get_rule("unknown")
+
+
+def test_sanitize_filters():
+    assert custom_filters.sanitize("VLAN 10", "vlan_name") == "VLAN_10"
+    assert custom_filters.sanitize("VLAN 10", "unknown") == \
+        "$$PARAMETER_ERROR$$(no sanitization rule 'unknown' for 'cisco_ios')"
+    assert custom_filters.sanitize_list(["VLAN 10", "VLAN#20"], "vlan_name") == ["VLAN_10", "VLAN20"]
+    assert custom_filters.sanitize_list(["VLAN 10"], "vlan_name", "unknown") == \
+        ["$$PARAMETER_ERROR$$(no sanitization rule 'vlan_name' for 'unknown')"]
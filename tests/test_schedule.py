@@ -0,0 +1,117 @@
+import logging
+import os
+import pytest
+from networkconfgen import NetworkConfGen
+from networkconfgen.parameter_store import ParameterStore
+from networkconfgen.schedule import RenderTimeHistory, ScheduleReport
+
+
+def test_render_time_history(tmpdir):
+    path = str(tmpdir.join("render_times.json"))
+    history = RenderTimeHistory(path, smoothing=0.5, default_time=1.0)
+
+    assert history.expected("unknown.txt") == 1.0
+
+    history.record("core.txt", "core1", 10.0)
+    history.record("core.txt", "core1", 20.0)
+    history.record("core.txt", "core2", 6.0)
+    history.record("access.txt", None, 0.5)
+    history.record("access.txt", None, None)
+
+    assert history.expected("core.txt", "core1") == 15.0
+    assert history.expected("core.txt", "core2") == 6.0
+    assert history.expected("core.txt", "core3") == 10.5
+    assert history.expected("access.txt", "sw1") == 0.5
+
+    history.save()
+    history = RenderTimeHistory(path)
+
+    assert history.expected("core.txt", "core1") == 15.0
+    assert history.expected("access.txt") == 0.5
+
+    with pytest.raises(AttributeError):
+        RenderTimeHistory(smoothing=0)
+
+    with pytest.raises(AttributeError):
+        RenderTimeHistory().save()
+
+
+def test_render_scheduled(tmpdir, monkeypatch):
+    confgen = NetworkConfGen(searchpath=os.path.join("tests", "data"))
+    store_path = str(tmpdir.join("parameters.store"))
+    ParameterStore.create(store_path, {"core1": {"hostname": "core1"}}).close()
+
+    history = RenderTimeHistory()
+    history.record("valid_syntax.txt", "core1", 5.0)
+    history.record("valid_syntax.txt", "sw3", 1.0)
+
+    jobs = [("valid_syntax.txt", {"hostname": "sw%d" % i}, "sw%d" % i) for i in range(6)]
+    jobs.append(("valid_syntax.txt", "core1"))
+
+    rendered = []
+    render_job = confgen._render_file
+
+    def recorded_render_file(file, parameters, **kwargs):
+        rendered.append(parameters["hostname"])
+        return render_job(file, parameters, **kwargs)
+
+    monkeypatch.setattr(confgen, "_render_file", recorded_render_file)
+
+    report = confgen.render_scheduled(jobs, history, parameter_store=store_path)
+
+    assert type(report) is ScheduleReport
+    assert [e.template_result for e in report.results] == ["!\nhostname sw%d\n!" % i for i in range(6)] + \
+                                                          ["!\nhostname core1\n!"]
+
+    # longest expected jobs first, unknown devices use the average of the template
+    assert rendered == ["core1", "sw0", "sw1", "sw2", "sw4", "sw5", "sw3"]
+    assert all(e.render_time >= 0 for e in report.results)
+    assert history.expected("valid_syntax.txt", "sw0") is not None
+    assert history.expected("valid_syntax.txt", "core1") < 5.0
+
+    assert 0 <= report.utilization <= 1
+    assert report.processes == 1
+    assert report.percentile(50) <= report.percentile(99)
+    assert sorted(report.to_json().keys()) == ["busy_time", "jobs", "makespan", "p50", "p99", "processes",
+                                               "tail_time", "utilization"]
+
+
+def test_render_scheduled_report_logging(monkeypatch, caplog):
+    confgen = NetworkConfGen(searchpath=os.path.join("tests", "data"))
+    jobs = [("valid_syntax.txt", {"hostname": "sw1"})]
+    calls = []
+    to_json = ScheduleReport.to_json
+
+    def recorded_to_json(report):
+        calls.append(report)
+        return to_json(report)
+
+    monkeypatch.setattr(ScheduleReport, "to_json", recorded_to_json)
+
+    # the report is only serialized if the debug level is enabled
+    caplog.set_level(logging.INFO, logger="networkconfgen")
+    confgen.render_scheduled(jobs, RenderTimeHistory())
+    assert calls == []
+
+    caplog.set_level(logging.DEBUG, logger="networkconfgen")
+    confgen.render_scheduled(jobs, RenderTimeHistory())
+    assert len(calls) == 1
+    assert "scheduled batch completed" in caplog.text
+
+
+def test_render_scheduled_with_processes():
+    confgen = NetworkConfGen(searchpath=os.path.join("tests", "data"))
+    history = RenderTimeHistory()
+    jobs = [("valid_syntax.txt", {"hostname": "sw%d" % i}, "sw%d" % i) for i in range(10)]
+    jobs.append(("invalid_syntax.txt", {}, "broken"))
+
+    report = confgen.render_scheduled(jobs, history, processes=2)
+
+    assert [e.template_result for e in report.results[:10]] == ["!\nhostname sw%d\n!" % i for i in range(10)]
+    assert report.results[10].render_error is True
+    assert 1 <= len(report.worker_finish_times) <= 2
+    assert 0 <= report.tail_time <= report.makespan
+    assert history.expected("valid_syntax.txt", "sw1") == report.results[1].render_time
+
+    with pytest.raises(AttributeError):
+        confgen.render_scheduled([("valid_syntax.txt", "sw1")], history)
@@ -0,0 +1,145 @@
+import os
+import socket
+import threading
+import time
+import pytest
+from networkconfgen import NetworkConfGen, NetworkConfGenResult
+from networkconfgen.parameter_store import ParameterStore
+from networkconfgen.server import RenderServer, RenderClient
+
+
+@pytest.fixture(params=[None, 2], ids=["in-process", "worker-processes"])
+def render_server(request, tmpdir):
+    store_path = str(tmpdir.join("parameters.store"))
+    ParameterStore.create(store_path, {"sw1": {"hostname": "sw1"}}).close()
+
+    confgen = NetworkConfGen(searchpath=os.path.join("tests", "data"), production_mode=True)
+    server = RenderServer(confgen, str(tmpdir.join("render.sock")), processes=request.param,
+                          parameter_store=store_path)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+    thread.join()
+    assert not os.path.exists(server.socket_path)
+
+
+def test_render_server(render_server):
+    with RenderClient(render_server.socket_path, timeout=30) as client:
+        result = client.render_from_file("valid_syntax.txt", parameters={"hostname": "sw0"})
+        assert type(result) is NetworkConfGenResult
+        assert result.template_result == "!\nhostname sw0\n!"
+        assert result.template_file_name == "valid_syntax.txt"
+        assert result.search_path == os.path.join("tests", "data")
+
+        result = client.render_from_file("valid_syntax.txt", parameter_key="sw1")
+        assert result.template_result == "!\nhostname sw1\n!"
+
+        result = client.render_from_string("hostname {{ hostname }}", parameters={"hostname": "sw2"})
+        assert result.template_result == "hostname sw2"
+        assert result.from_string is True
+
+        result = client.render_from_file("invalid_syntax.txt", parameters={})
+        assert result.render_error is True
+
+        with pytest.raises(RuntimeError):
+            client.render({"parameters": {}})
+
+        with pytest.raises(RuntimeError):
+            client.render_from_string("hostname {{ hostname }}", parameters="invalid")
+
+
+def test_render_server_pipelining(render_server):
+    requests = [{"id": i, "file": "valid_syntax.txt", "parameters": {"hostname": "sw%d" % i}} for i in range(50)]
+
+    with RenderClient(render_server.socket_path, timeout=30) as client:
+        results = list(client.render_many(requests, pipeline_depth=8))
+
+    assert [e.template_result for e in results] == ["!\nhostname sw%d\n!" % i for i in range(50)]
+
+
+def test_render_server_backpressure(tmpdir):
+    server = RenderServer(NetworkConfGen(), str(tmpdir.join("render.sock")), max_pending_requests=2)
+    submitted = []
+    finished = threading.Event()
+    submit = server.submit
+
+    def blocked_submit(line):
+        submitted.append(line)
+        get_response = submit(line)
+
+        def wait_for_response():
+            finished.wait(30)
+            return get_response()
+
+        return wait_for_response
+
+    server.submit = blocked_submit
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    requests = [{"id": i, "template": "{{ value }}", "parameters": {"value": i}} for i in range(20)]
+    try:
+        with RenderClient(server.socket_path, timeout=30) as client:
+            for request in requests:
+                client._send(request)
+
+            # the server stops reading, the writer thread processes one response and two responses are pending
+            time.sleep(0.5)
+            assert len(submitted) <= 4
+
+            finished.set()
+            results = [client._receive() for _ in requests]
+
+        assert len(submitted) == 20
+        assert [e.template_result for e in results] == [str(i) for i in range(20)]
+
+    finally:
+        finished.set()
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+    with pytest.raises(AttributeError):
+        RenderServer(NetworkConfGen(), str(tmpdir.join("other.sock")), max_pending_requests=0)
+
+
+def test_render_server_socket_path(tmpdir):
+    confgen = NetworkConfGen()
+    socket_path = str(tmpdir.join("render.sock"))
+
+    # a regular file is not removed
+    tmpdir.join("render.sock").write("data")
+    with pytest.raises(IOError):
+        RenderServer(confgen, socket_path)
+
+    assert tmpdir.join("render.sock").read() == "data"
+    os.unlink(socket_path)
+
+    # the socket of a running server is not removed
+    server = RenderServer(confgen, socket_path)
+    try:
+        with pytest.raises(IOError):
+            RenderServer(confgen, socket_path)
+
+        assert os.path.exists(socket_path)
+
+    finally:
+        server.server_close()
+
+    assert not os.path.exists(socket_path)
+
+    # a stale socket (no server is listening) is replaced
+    stale_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale_socket.bind(socket_path)
+    stale_socket.close()
+    assert os.path.exists(socket_path)
+
+    server = RenderServer(confgen, socket_path)
+    server.server_close()
+    assert not os.path.exists(socket_path)
@@ -0,0 +1,171 @@
+import os
+import pytest
+from networkconfgen import NetworkConfGen, parameter_digest
+from networkconfgen.tracing import Tracer, JsonLinesExporter, read_spans, parse_traceparent, STATUS_CODE_ERROR
+
+
+class ListExporter(object):
+    def __init__(self):
+        self.exports = []
+
+    def export(self, spans):
+        self.exports.append(spans)
+
+    @property
+    def spans(self):
+        return [span for spans in self.exports for span in spans]
+
+
+def _attributes(span_json):
+    return dict((e["key"], list(e["value"].values())[0]) for e in span_json["attributes"])
+
+
+def test_render_from_file_spans():
+    exporter = ListExporter()
+    confgen = NetworkConfGen(searchpath=os.path.join("tests", "data"), tracer=Tracer(exporter))
+    parameters = {"hostname": "sw1"}
+
+    result = confgen.render_from_file(file="valid_syntax.txt", parameters=parameters)
+    assert result.render_error is False
+
+    # the spans of the render process are exported at once
+    assert len(exporter.exports) == 1
+    spans = dict((span.name, span) for span in exporter.spans)
+    assert sorted(spans.keys()) == ["networkconfgen.render", "networkconfgen.template.load",
+                                    "networkconfgen.template.render"]
+
+    render_span = spans["networkconfgen.render"]
+    assert render_span.parent_span_id is None
+    assert render_span.attributes["networkconfgen.template"] == "valid_syntax.txt"
+    assert render_span.attributes["networkconfgen.parameter_hash"] == parameter_digest({"hostname": "sw1"})
+    for name in ("networkconfgen.template.load", "networkconfgen.template.render"):
+        assert spans[name].trace_id == render_span.trace_id
+        assert spans[name].parent_span_id == render_span.span_id
+        assert render_span.start_time <= spans[name].start_time <= spans[name].end_time <= render_span.end_time
+
+    # cleaning and error scanning of the result are child spans of the render process
+    assert result.content_error is False
+    result.cleaned_template_result()
+    assert [span.name for span in exporter.spans[3:]] == ["networkconfgen.result.scan_errors",
+                                                          "networkconfgen.result.clean"]
+    for span in exporter.spans[3:]:
+        assert span.trace_id == render_span.trace_id
+        assert span.parent_span_id == render_span.span_id
+
+
+def test_render_from_string_spans():
+    exporter = ListExporter()
+    confgen = NetworkConfGen(tracer=Tracer(exporter))
+
+    result = confgen.render_from_string(template_content="{{ value }}", parameters={"value": 1})
+    assert result.template_result == "1"
+    assert [span.name for span in exporter.spans] == ["networkconfgen.template.compile",
+                                                      "networkconfgen.template.render", "networkconfgen.render"]
+    assert exporter.spans[2].attributes["networkconfgen.template"] == "<string>"
+
+    # render errors are recorded within the render span
+    result = confgen.render_from_string(template_content="{% if %}", parameters={})
+    assert result.render_error is True
+    render_span = exporter.spans[-1]
+    assert render_span.name == "networkconfgen.render"
+    assert render_span.status_code == STATUS_CODE_ERROR
+    assert render_span.attributes["networkconfgen.error_text"] == result.error_text
+    assert exporter.spans[-2].name == "networkconfgen.template.compile"
+    assert exporter.spans[-2].status_code == STATUS_CODE_ERROR
+
+
+def test_attach_traceparent():
+    exporter = ListExporter()
+    tracer = Tracer(exporter)
+    confgen = NetworkConfGen(tracer=tracer)
+
+    with tracer.attach("00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"):
+        confgen.render_from_string(template_content="{{ value }}", parameters={"value": 1})
+
+    assert exporter.spans[-1].trace_id == "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert exporter.spans[-1].parent_span_id == "00f067aa0ba902b7"
+
+    confgen.render_from_string(template_content="{{ value }}", parameters={"value": 1})
+    assert exporter.spans[-1].trace_id != "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert exporter.spans[-1].parent_span_id is None
+
+    with pytest.raises(AttributeError):
+        parse_traceparent("invalid")
+
+
+def test_interrupted_render_process(tmpdir):
+    class Interrupt(object):
+        def __str__(self):
+            raise KeyboardInterrupt("interrupted")
+
+    tmpdir.join("template.txt").write("{{ value }}")
+    exporter = ListExporter()
+    tracer = Tracer(exporter)
+    confgen = NetworkConfGen(searchpath=str(tmpdir), tracer=tracer)
+
+    with pytest.raises(KeyboardInterrupt):
+        confgen.render_from_string(template_content="{{ value }}", parameters={"value": Interrupt()})
+
+    with pytest.raises(KeyboardInterrupt):
+        confgen.render_from_file(file="template.txt", parameters={"value": Interrupt()})
+
+    # the render spans are finished and exported
+    assert tracer.current_span() is None
+    assert len(exporter.exports) == 2
+    for spans in exporter.exports:
+        assert spans[-1].name == "networkconfgen.render"
+        assert spans[-1].status_code == STATUS_CODE_ERROR
+        assert spans[-1].status_message == "KeyboardInterrupt: interrupted"
+
+    result = confgen.render_from_string(template_content="{{ value }}", parameters={"value": 1})
+    assert result.template_result == "1"
+    assert exporter.spans[-1].parent_span_id is None
+
+
+def test_json_lines_exporter(tmpdir):
+    path = str(tmpdir.join("spans.jsonl"))
+    tracer = Tracer(JsonLinesExporter(path, service_name="provisioning"))
+    confgen = NetworkConfGen(searchpath=os.path.join("tests", "data"), tracer=tracer)
+
+    confgen.render_from_file(file="valid_syntax.txt", parameters={"hostname": "sw1"})
+    confgen.render_from_file(file="missing.txt", parameters={})
+    tracer.shutdown()
+
+    with open(path) as f:
+        lines = f.readlines()
+
+    assert len(lines) == 2
+    assert '"service.name"' in lines[0] and '"provisioning"' in lines[0]
+
+    spans = read_spans(path)
+    assert len(spans) == 5
+    render_spans = [span for span in spans if span["name"] == "networkconfgen.render"]
+    assert _attributes(render_spans[0])["networkconfgen.template"] == "valid_syntax.txt"
+    assert render_spans[0]["status"] == {"code": 0}
+    assert render_spans[1]["status"]["code"] == STATUS_CODE_ERROR
+    assert len(render_spans[0]["traceId"]) == 32 and len(render_spans[0]["spanId"]) == 16
+    assert int(render_spans[0]["endTimeUnixNano"]) >= int(render_spans[0]["startTimeUnixNano"])
+
+
+def test_tracing_within_worker_processes(tmpdir):
+    path = str(tmpdir.join("spans.jsonl"))
+    confgen = NetworkConfGen(searchpath=os.path.join("tests", "data"), tracer=Tracer(JsonLinesExporter(path)))
+    jobs = [("valid_syntax.txt", {"hostname": "sw%d" % i}) for i in range(10)]
+
+    results = list(confgen.render_batch(jobs, processes=2))
+    assert all(not result.render_error for result in results)
+
+    spans = read_spans(path)
+    assert len([span for span in spans if span["name"] == "networkconfgen.render"]) == 10
+
+    # the results of the worker processes are not traced within the parent process
+    assert results[0].content_error is False
+    assert len(read_spans(path)) == len(spans)
+
+
+def test_tracing_disabled():
+    confgen = NetworkConfGen()
+    result = confgen.render_from_string(template_content="{{ value }}", parameters={"value": 1})
+    assert result.template_result == "1"
+    assert result.content_error is False
+    assert result.cleaned_template_result() == "1"